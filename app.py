@@ -1,22 +1,64 @@
 ''' Módulo responsável por inicializar a aplicação. '''
 
-import re
-import logging
-from logging.handlers import RotatingFileHandler
-from datetime import datetime
-import json as jjson
-from src.basedados import bd
+import base64
+import binascii
+import math
+from collections import OrderedDict
+from src.basedados import bd, configurar_sqlite, iniciar_transacao_escrita
+from src.busca import configurar_indice_nome, criar_filtro_nome
+from src.cache import cache_dimensoes, cache_fragmentos, cache_respostas
+from src.compressao import compressao
+from src.espacial import indice_espacial
+from src.instrumentacao import instrumentacao_sql
+from src.metricas import metricas
+from src.logs import LogRequisicoes
+from src.provedor_json import ProvedorJson
+from src.serializacao import Serializador
 from src.excecoes import ViolacaoIndiceUnico
-from src.modelos import buscar_ou_criar
+from src.importacao import AtualizadorLote
+from src.modelos import buscar_ou_criar, criar_ou_buscar
+from src.modelos import carregamento_feira_livre, identificar_entidade_colunas
 from src.modelos import FeiraLivre, Endereco, Logradouro, Bairro
 from src.modelos import Regiao8, Regiao5, Distrito, Subprefeitura
-from flask import Flask, request, jsonify
-from sqlalchemy.exc import IntegrityError
+from flask import Flask, Response, request, jsonify, stream_with_context
+from flask import json as fjson
 
+# Maior id representável em uma coluna INTEGER do SQLite
+ID_MAXIMO = 2 ** 63 - 1
 
 app = Flask(__name__)
 app.config.from_object('config.ProductionConfig')
+app.config.from_envvar('FEIRASLIVRESAPI_CONFIG', silent=True)
+app.json = ProvedorJson(app)
 bd.init_app(app)
+configurar_sqlite(app)
+configurar_indice_nome(app)
+cache_dimensoes.init_app(app)
+cache_respostas.init_app(app)
+cache_fragmentos.init_app(app)
+indice_espacial.init_app(app)
+# A compressão deve ser o último hook de fim de requisição a executar
+compressao.init_app(app)
+log_requisicoes = LogRequisicoes(app)
+instrumentacao_sql.init_app(app)
+metricas.init_app(app)
+metricas.registrar_cache('dimensoes', cache_dimensoes)
+metricas.registrar_cache('respostas', cache_respostas)
+metricas.registrar_cache('fragmentos', cache_fragmentos)
+metricas.registrar_cache('compressao', compressao)
+metricas.registrar_coletor(lambda: [
+    ('feiraslivresapi_sql_instrucoes_lentas_total', (),
+     instrumentacao_sql.instrucoes_lentas)])
+
+
+@app.before_request
+def reservar_escrita():
+    '''
+    Reserva a escrita na base de dados para as requisições que alteram \
+    feiras livres (ver iniciar_transacao_escrita).
+    '''
+    if request.method in ('POST', 'PUT', 'DELETE'):
+        iniciar_transacao_escrita(bd.session())
 
 
 @app.route('/feira', methods=['POST'])
@@ -37,9 +79,6 @@ def adicionar():
                                         .format(', '.join(campos_obrigatorios)),
                             'erro': 400})
         resposta.status_code = 400
-        app.logger.error('%s - %s -\t%s\t- %s\n%s', datetime.now(),
-                         request.remote_addr, 'POST /feira',
-                         resposta.status_code, jjson.loads(resposta.data))
         return resposta
     feira_livre = FeiraLivre.query.filter_by(registro=json['registro']).first()
     if feira_livre is not None:
@@ -47,23 +86,15 @@ def adicionar():
                                         'já existe.'.format(json['registro']),
                             'erro': 400})
         resposta.status_code = 400
-        app.logger.error('%s - %s -\t%s\t- %s\n%s', datetime.now(),
-                         request.remote_addr, 'POST /feira',
-                         resposta.status_code, jjson.loads(resposta.data))
         return resposta
     try:
-        feira_livre = criar_ou_atualizar(json)
+        criar_ou_atualizar(json)
+        feira_livre = carregar_feira_livre(json['registro'])
         resposta = jsonify({'feira': feira_livre.dict})
         resposta.status_code = 200
-        app.logger.info('%s - %s -\t%s\t- %s\n%s', datetime.now(),
-                        request.remote_addr, 'POST /feira',
-                        resposta.status_code, jjson.loads(resposta.data))
     except ViolacaoIndiceUnico as erro:
         resposta = jsonify({'mensagem': str(erro), 'erro': 400})
         resposta.status_code = 400
-        app.logger.error('%s - %s -\t%s\t- %s\n%s', datetime.now(),
-                         request.remote_addr, 'POST /feira',
-                         resposta.status_code, jjson.loads(resposta.data))
     return resposta
 
 
@@ -85,9 +116,6 @@ def alterar():
                                         .format(', '.join(campos_obrigatorios)),
                             'erro': 400})
         resposta.status_code = 400
-        app.logger.error('%s - %s -\t%s\t- %s\n%s', datetime.now(),
-                         request.remote_addr, 'PUT /feira',
-                         resposta.status_code, jjson.loads(resposta.data))
         return resposta
     feira_livre = FeiraLivre.query.filter_by(registro=json['registro']).first()
     if feira_livre is None:
@@ -95,23 +123,15 @@ def alterar():
                                         'não existe.'.format(json['registro']),
                             'erro': 404})
         resposta.status_code = 404
-        app.logger.error('%s - %s -\t%s\t- %s\n%s', datetime.now(),
-                         request.remote_addr, 'PUT /feira',
-                         resposta.status_code, jjson.loads(resposta.data))
         return resposta
     try:
-        feira_livre = criar_ou_atualizar(json, feira_livre)
+        criar_ou_atualizar(json, feira_livre)
+        feira_livre = carregar_feira_livre(json['registro'])
         resposta = jsonify({'feira': feira_livre.dict})
         resposta.status_code = 200
-        app.logger.info('%s - %s -\t%s\t- %s\n%s', datetime.now(),
-                        request.remote_addr, 'PUT /feira',
-                        resposta.status_code, jjson.loads(resposta.data))
     except ViolacaoIndiceUnico as erro:
         resposta = jsonify({'mensagem': str(erro), 'erro': 400})
         resposta.status_code = 400
-        app.logger.error('%s - %s -\t%s\t- %s\n%s', datetime.now(),
-                         request.remote_addr, 'PUT /feira',
-                         resposta.status_code, jjson.loads(resposta.data))
     return resposta
 
 
@@ -126,31 +146,100 @@ def remover():
     str -- json contendo a feira removida ou mensagem de erro.
     '''
     registro = request.args.get('registro')
-    feira_livre = FeiraLivre.query.filter(FeiraLivre.registro == registro) \
-                                  .first()
+    feira_livre = carregar_feira_livre(registro)
     if feira_livre is None:
         resposta = jsonify({'mensagem': 'Feira livre com registro {0} '
                                         'não existe.'.format(registro),
                             'erro': 404})
         resposta.status_code = 404
-        app.logger.error('%s - %s -\t%s - %s\t- %s\n%s', datetime.now(),
-                         request.remote_addr, 'DELETE /feira', request.args,
-                         resposta.status_code, jjson.loads(resposta.data))
     else:
         bd.session.delete(feira_livre)
-        bd.session.commit()
         resposta = jsonify({'feira': feira_livre.dict})
+        bd.session.commit()
         resposta.status_code = 200
-        app.logger.info('%s - %s -\t%s - %s\t- %s\n%s', datetime.now(),
-                        request.remote_addr, 'DELETE /feira', request.args,
-                        resposta.status_code, jjson.loads(resposta.data))
     return resposta
 
 
+@app.route('/feiras/lote', methods=['POST'])
+def adicionar_lote():
+    '''
+    Insere ou altera, pelo registro, um lote de feiras livres em uma única \
+    transação.
+    O corpo é uma lista json ou, com Content-Type application/x-ndjson, \
+    uma feira livre json por linha.
+    Feiras livres inválidas são relatadas e não impedem a gravação das \
+    demais.
+
+    Retorno
+    =======
+    str -- json contendo o resultado de cada feira livre do lote ou \
+    mensagem de erro.
+    '''
+    try:
+        itens = recuperar_itens_lote()
+    except ValueError as erro:
+        resposta = jsonify({'mensagem': str(erro), 'erro': 400})
+        resposta.status_code = 400
+        return resposta
+    if len(itens) > app.config['LOTE_TAMANHO_MAXIMO']:
+        resposta = jsonify({'mensagem': 'Lote com {0} feiras excede o '
+                                        'máximo de {1}.'
+                                        .format(len(itens),
+                                                app.config[
+                                                    'LOTE_TAMANHO_MAXIMO']),
+                            'erro': 413})
+        resposta.status_code = 413
+        return resposta
+    resultados = list()
+    validos = list()
+    for posicao, item in enumerate(itens):
+        resultado = {'posicao': posicao}
+        resultados.append(resultado)
+        if not isinstance(item, dict):
+            resultado['situacao'] = 'erro'
+            resultado['mensagem'] = 'Feira livre deve ser um objeto json.'
+            continue
+        resultado['registro'] = item.get('registro')
+        campos_obrigatorios = verificar_campos_obrigatorios(item)
+        if len(campos_obrigatorios) > 0:
+            resultado['situacao'] = 'erro'
+            resultado['mensagem'] = 'Campo(s) obrigatório(s) não ' \
+                                    'encontrado(s): {0}.' \
+                                    .format(', '.join(campos_obrigatorios))
+            continue
+        campos_invalidos = verificar_campos_invalidos(item)
+        if len(campos_invalidos) > 0:
+            resultado['situacao'] = 'erro'
+            resultado['mensagem'] = 'Campo(s) com valor inválido (lista ' \
+                                    'ou objeto json): {0}.' \
+                                    .format(', '.join(campos_invalidos))
+            continue
+        validos.append((resultado, item))
+    atualizador = AtualizadorLote(bd.session, [i for _, i in validos])
+    for resultado, item in validos:
+        try:
+            resultado['situacao'] = atualizador.adicionar(item)
+        except ViolacaoIndiceUnico as erro:
+            resultado['situacao'] = 'erro'
+            resultado['mensagem'] = str(erro)
+    atualizador.gravar()
+    # A gravação em lote não passa pela sessão do ORM
+    cache_respostas.invalidar()
+    cache_fragmentos.limpar()
+    indice_espacial.limpar()
+    resumo = dict.fromkeys(('criada', 'alterada', 'inalterada', 'erro'), 0)
+    for resultado in resultados:
+        resumo[resultado['situacao']] += 1
+    return jsonify({'resultados': resultados, 'resumo': resumo})
+
+
 @app.route('/feiras', methods=['GET'])
 def buscar():
     '''
     Busca feira(s) livre(s) por região e/ou distrito e/ou bairro e/ou nome.
+    Com formato=normalizado, as feiras livres referenciam pelo id o \
+    logradouro, o bairro e as regiões, e cada entidade de dimensão é \
+    listada uma única vez em sua tabela.
 
     Retorno
     =======
@@ -160,13 +249,204 @@ def buscar():
     distrito = request.args.get('distrito')
     bairro = request.args.get('bairro')
     nome = request.args.get('nome')
-    consulta = criar_consulta_busca(regiao5, distrito, bairro, nome)
-    resultado = consulta.all()
-    resposta = jsonify({'feiras': [i.dict for i in resultado]})
-    app.logger.info('%s - %s -\t%s - %s\t- %s\n%s', datetime.now(),
-                    request.remote_addr, 'GET /feira', request.args,
-                    resposta.status_code, jjson.loads(resposta.data))
-    return resposta
+    try:
+        limite, apos = recuperar_paginacao(request.args.get('limite'),
+                                           request.args.get('cursor'))
+        limites = recuperar_limites(request.args.get('min_lat'),
+                                    request.args.get('max_lat'),
+                                    request.args.get('min_lon'),
+                                    request.args.get('max_lon'))
+        formato = recuperar_formato(request.args.get('formato'))
+    except ValueError as erro:
+        resposta = jsonify({'mensagem': str(erro), 'erro': 400})
+        resposta.status_code = 400
+        return resposta
+    if app.config['BUSCA_STREAMING'] and formato is None:
+        consulta = criar_consulta_busca(regiao5, distrito, bairro, nome,
+                                        limites)
+        if limite is not None:
+            consulta = paginar_consulta(consulta, apos, limite)
+        return Response(stream_with_context(gerar_busca_streaming(consulta,
+                                                                  limite)),
+                        mimetype='application/json')
+    chave = (regiao5, distrito, bairro, nome, limites, limite, apos, formato)
+    armazenada = cache_respostas.buscar(chave)
+    if armazenada is not None:
+        corpo, etag = armazenada
+    else:
+        # As gerações são lidas antes da primeira consulta, que inicia a
+        # transação de leitura: um commit posterior a esse ponto impede
+        # que o resultado, lido da versão anterior, seja armazenado
+        geracao = cache_respostas.geracao
+        geracao_fragmentos = cache_fragmentos.geracao
+        if formato == 'normalizado':
+            consulta = criar_consulta_busca(regiao5, distrito, bairro, nome,
+                                            limites)
+            if limite is not None:
+                consulta = paginar_consulta(consulta, apos, limite)
+            resultado = consulta.all()
+            conteudo = Serializador().normalizar(resultado[:limite])
+            if limite is not None:
+                conteudo['proximo'] = None
+                if len(resultado) > limite:
+                    conteudo['proximo'] = codificar_cursor(
+                        resultado[limite - 1].id)
+            corpo = jsonify(conteudo).get_data()
+        else:
+            consulta = criar_consulta_busca(regiao5, distrito, bairro, nome,
+                                            limites, somente_ids=True)
+            if limite is not None:
+                consulta = paginar_consulta(consulta, apos, limite)
+            ids = [i for i, in consulta]
+            fragmentos = serializar_feiras_livres(ids[:limite],
+                                                  geracao_fragmentos)
+            # O corpo é montado a partir do json já serializado de cada
+            # feira livre, no mesmo formato compacto e ordenado de jsonify
+            corpo = b'{"feiras":[' + b','.join(fragmentos.values()) + b']'
+            if limite is not None:
+                proximo = None
+                if len(ids) > limite:
+                    proximo = codificar_cursor(ids[limite - 1])
+                corpo += b',"proximo":' + serializar(proximo)
+            corpo += b'}\n'
+        etag = cache_respostas.armazenar(chave, geracao, corpo)
+    resposta = Response(corpo, mimetype='application/json')
+    resposta.set_etag(etag)
+    return resposta.make_conditional(request)
+
+
+@app.route('/feiras/proximas', methods=['GET'])
+def buscar_proximas():
+    '''
+    Busca as feiras livres mais próximas de um ponto (lat, lon), \
+    opcionalmente dentro de um raio (em metros), da mais próxima para a \
+    mais distante.
+
+    Retorno
+    =======
+    str -- json contendo o resultado da busca.
+    '''
+    try:
+        latitude, longitude, raio, limite = recuperar_proximidade(
+            request.args.get('lat'), request.args.get('lon'),
+            request.args.get('raio'), request.args.get('limite'))
+    except ValueError as erro:
+        resposta = jsonify({'mensagem': str(erro), 'erro': 400})
+        resposta.status_code = 400
+        return resposta
+    geracao_fragmentos = cache_fragmentos.geracao
+    indice_espacial.atualizar(bd.session)
+    encontradas = indice_espacial.buscar(latitude, longitude, limite, raio)
+    fragmentos = serializar_feiras_livres([i for _, i in encontradas],
+                                          geracao_fragmentos)
+    # "distancia" precede "endereco" na ordenação das chaves do json
+    corpo = b'{"feiras":[' + b','.join(
+        b'{"distancia":' + serializar(round(distancia, 1)) + b',' +
+        fragmentos[i][1:]
+        for distancia, i in encontradas if i in fragmentos) + b']}\n'
+    return Response(corpo, mimetype='application/json')
+
+
+@app.route('/metrics', methods=['GET'])
+def exportar_metricas():
+    '''
+    Exporta as métricas da aplicação no formato texto do Prometheus.
+
+    Retorno
+    =======
+    str -- métricas.
+    '''
+    return Response(metricas.exportar(),
+                    mimetype='text/plain; version=0.0.4')
+
+
+def serializar(valor):
+    '''
+    Serializa um valor como json compacto, com as chaves ordenadas, no \
+    mesmo formato utilizado por jsonify.
+
+    Parâmetros
+    ==========
+    valor -- valor a ser serializado.
+
+    Retorno
+    =======
+    bytes -- json do valor.
+    '''
+    return app.json.codificar(valor)
+
+
+def serializar_feiras_livres(ids, geracao):
+    '''
+    Recupera o json de cada feira livre, a partir do cache de fragmentos \
+    ou, para as feiras livres ausentes do cache, carregando-as em lotes \
+    de BUSCA_TAMANHO_LOTE e armazenando seu json no cache.
+    O dict de cada entidade relacionada é calculado uma única vez.
+
+    Parâmetros
+    ==========
+    ids [List(int)] -- ids das feiras livres.
+    geracao [int] -- geração do cache de fragmentos lida antes da \
+    primeira consulta da requisição.
+
+    Retorno
+    =======
+    OrderedDict(int, bytes) -- json das feiras livres existentes, \
+    indexado pelo id, na ordem dos ids.
+    '''
+    encontrados = cache_fragmentos.buscar(ids)
+    ausentes = [i for i in ids if i not in encontrados]
+    tamanho_lote = app.config['BUSCA_TAMANHO_LOTE']
+    serializador = Serializador()
+    for inicio in range(0, len(ausentes), tamanho_lote):
+        consulta = FeiraLivre.query \
+            .options(*carregamento_feira_livre()) \
+            .filter(FeiraLivre.id.in_(ausentes[inicio:inicio + tamanho_lote]))
+        carregados = [(i, serializar(serializador.converter(i)))
+                      for i in consulta]
+        cache_fragmentos.armazenar(carregados, geracao)
+        encontrados.update((i.id, fragmento) for i, fragmento in carregados)
+    return OrderedDict((i, encontrados[i]) for i in ids if i in encontrados)
+
+
+def gerar_busca_streaming(consulta, limite=None):
+    '''
+    Gera o json do resultado da busca em partes, carregando as feiras \
+    livres em lotes de BUSCA_TAMANHO_LOTE.
+    Apenas um lote de feiras livres é mantido em memória por vez.
+
+    Parâmetros
+    ==========
+    consulta [Query] -- consulta a ser executada para encontrar feiras livres.
+    limite [int] -- quantidade de feiras livres da página ou None se a \
+    busca não é paginada. (default=None)
+
+    Retorno
+    =======
+    Generator(str) -- partes do json contendo o resultado da busca.
+    '''
+    tamanho_lote = app.config['BUSCA_TAMANHO_LOTE']
+    consulta = consulta.yield_per(tamanho_lote)
+    quantidade = 0
+    lote = list()
+    proximo = None
+    yield '{"feiras": ['
+    for feira_livre in consulta:
+        if limite is not None and quantidade == limite:
+            proximo = codificar_cursor(ultimo_id)
+            break
+        lote.append(fjson.dumps(feira_livre.dict))
+        quantidade += 1
+        ultimo_id = feira_livre.id
+        if len(lote) == tamanho_lote:
+            yield (',' if quantidade > len(lote) else '') + ','.join(lote)
+            lote = list()
+    if len(lote) > 0:
+        yield (',' if quantidade > len(lote) else '') + ','.join(lote)
+    if limite is None:
+        yield ']}'
+    else:
+        yield '], "proximo": {0}}}'.format(fjson.dumps(proximo))
 
 
 def criar_ou_atualizar(json, feira_livre=None):
@@ -186,39 +466,48 @@ def criar_ou_atualizar(json, feira_livre=None):
     ViolacaoIndiceUnico
     '''
     try:
-        subprefeitura = buscar_ou_criar(bd.session, Subprefeitura,
-                                        codigo=json['cod_subpref'],
-                                        nome=json['subprefeitura'])
-        distrito = buscar_ou_criar(bd.session, Distrito,
-                                   codigo=json['cod_distrito'],
-                                   nome=json['distrito'],
-                                   subprefeitura_id=subprefeitura.id)
-        regiao5 = buscar_ou_criar(bd.session, Regiao5,
-                                  nome=json['regiao5'])
-        regiao8 = buscar_ou_criar(bd.session, Regiao8,
-                                  nome=json['regiao8'])
-        bairro = buscar_ou_criar(bd.session, Bairro,
-                                 nome=json['bairro'],
-                                 distrito_id=distrito.id)
-        logradouro = buscar_ou_criar(bd.session, Logradouro,
-                                     nome=json['logradouro'])
-        endereco = buscar_ou_criar(bd.session, Endereco,
-                                   logradouro_id=logradouro.id,
-                                   numero=json['numero'],
-                                   referencia=json['referencia'],
-                                   bairro_id=bairro.id,
-                                   regiao5_id=regiao5.id,
-                                   regiao8_id=regiao8.id,
-                                   latitude=json['latitude'],
-                                   longitude=json['longitude'],
-                                   setor_censitario=json['setor_censitario'],
-                                   area_ponderacao=json['area_ponderacao'])
+        subprefeitura_id = cache_dimensoes.buscar_ou_criar(
+            bd.session, Subprefeitura,
+            codigo=json['cod_subpref'],
+            nome=json['subprefeitura'])
+        distrito_id = cache_dimensoes.buscar_ou_criar(
+            bd.session, Distrito,
+            codigo=json['cod_distrito'],
+            nome=json['distrito'],
+            subprefeitura_id=subprefeitura_id)
+        regiao5_id = cache_dimensoes.buscar_ou_criar(
+            bd.session, Regiao5,
+            nome=json['regiao5'])
+        regiao8_id = cache_dimensoes.buscar_ou_criar(
+            bd.session, Regiao8,
+            nome=json['regiao8'])
+        bairro_id = cache_dimensoes.buscar_ou_criar(
+            bd.session, Bairro,
+            nome=json['bairro'],
+            distrito_id=distrito_id)
+        logradouro_id = cache_dimensoes.buscar_ou_criar(
+            bd.session, Logradouro,
+            nome=json['logradouro'])
+        inserir = buscar_ou_criar
+        if app.config['INSERCAO_OTIMISTA']:
+            inserir = criar_ou_buscar
+        endereco = inserir(bd.session, Endereco,
+                           logradouro_id=logradouro_id,
+                           numero=json['numero'],
+                           referencia=json['referencia'],
+                           bairro_id=bairro_id,
+                           regiao5_id=regiao5_id,
+                           regiao8_id=regiao8_id,
+                           latitude=json['latitude'],
+                           longitude=json['longitude'],
+                           setor_censitario=json['setor_censitario'],
+                           area_ponderacao=json['area_ponderacao'])
         if feira_livre is None:
-            feira_livre = buscar_ou_criar(bd.session, FeiraLivre,
-                                          identificador=json['identificador'],
-                                          nome=json['nome'],
-                                          registro=json['registro'],
-                                          endereco_id=endereco.id)
+            feira_livre = inserir(bd.session, FeiraLivre,
+                                  identificador=json['identificador'],
+                                  nome=json['nome'],
+                                  registro=json['registro'],
+                                  endereco_id=endereco.id)
         else:
             feira_livre.identificador = json['identificador']
             feira_livre.nome = json['nome']
@@ -233,6 +522,54 @@ def criar_ou_atualizar(json, feira_livre=None):
         raise e
 
 
+def carregar_feira_livre(registro):
+    '''
+    Recupera a feira livre dado seu registro, carregando na mesma \
+    consulta todas as entidades necessárias para sua serialização.
+
+    Parâmetros
+    ==========
+    registro [str] -- registro da feira livre.
+
+    Retorno
+    =======
+    FeiraLivre -- feira livre ou None se não existir.
+    '''
+    return FeiraLivre.query.options(*carregamento_feira_livre()) \
+                           .filter(FeiraLivre.registro == registro) \
+                           .first()
+
+
+def recuperar_itens_lote():
+    '''
+    Recupera as feiras livres do corpo da requisição do lote.
+
+    Retorno
+    =======
+    List -- json de cada feira livre do lote.
+
+    Exceções/Erros
+    ==============
+    ValueError -- se o corpo não é uma lista json nem json por linha.
+    '''
+    if request.mimetype == 'application/x-ndjson':
+        itens = list()
+        for numero, linha in enumerate(request.get_data(as_text=True)
+                                       .splitlines(), 1):
+            if linha.strip() == '':
+                continue
+            try:
+                itens.append(fjson.loads(linha))
+            except ValueError:
+                raise ValueError('Linha {0} não é um json válido.'
+                                 .format(numero))
+        return itens
+    itens = request.get_json(force=True, silent=True)
+    if not isinstance(itens, list):
+        raise ValueError('O corpo deve ser uma lista de feiras livres.')
+    return itens
+
+
 def verificar_campos_obrigatorios(json):
     '''
     Verifica se existem campos obrigatórios que não estão presentes no json.
@@ -258,27 +595,244 @@ def verificar_campos_obrigatorios(json):
     return campos_nao_existentes
 
 
-def identificar_entidade_colunas(mensagem):
+def verificar_campos_invalidos(json):
+    '''
+    Verifica se existem campos cujo valor não é escalar (lista ou objeto \
+    json), que não podem ser gravados.
+
+    Parâmetros
+    ==========
+    json [Dict] -- json a ser verificado.
+
+    Retorno
+    =======
+    List -- campos do json com valor lista ou objeto, em ordem alfabética.
+    '''
+    return sorted(campo for campo, valor in json.items()
+                  if isinstance(valor, (list, dict)))
+
+
+def recuperar_formato(formato):
+    '''
+    Valida o formato da resposta da busca.
+
+    Parâmetros
+    ==========
+    formato [str] -- formato informado ou None.
+
+    Retorno
+    =======
+    str -- formato da resposta ou None para o formato padrão.
+
+    Exceções/Erros
+    ==============
+    ValueError -- se o formato é desconhecido.
+    '''
+    if formato is not None and formato != 'normalizado':
+        raise ValueError('Formato {0} inválido. Formato aceito: '
+                         'normalizado.'.format(formato))
+    return formato
+
+
+def codificar_cursor(identificador):
+    '''
+    Codifica o id da última feira livre de uma página como cursor opaco.
+
+    Parâmetros
+    ==========
+    identificador [int] -- id da última feira livre da página.
+
+    Retorno
+    =======
+    str -- cursor para a próxima página.
+    '''
+    return base64.urlsafe_b64encode(str(identificador).encode()) \
+                 .decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    '''
+    Recupera o id da última feira livre da página anterior a partir \
+    do cursor.
+
+    Parâmetros
+    ==========
+    cursor [str] -- cursor gerado por codificar_cursor.
+
+    Retorno
+    =======
+    int -- id da última feira livre da página anterior.
+
+    Exceções/Erros
+    ==============
+    ValueError -- se o cursor é inválido ou o id está fora do intervalo \
+    dos inteiros do SQLite (0 a 2^63 - 1).
+    '''
+    try:
+        preenchimento = '=' * (-len(cursor) % 4)
+        identificador = int(base64.urlsafe_b64decode(cursor + preenchimento)
+                            .decode())
+        if not 0 <= identificador <= ID_MAXIMO:
+            raise ValueError()
+        return identificador
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError('Cursor {0} inválido.'.format(cursor))
+
+
+def recuperar_paginacao(limite, cursor):
+    '''
+    Recupera o tamanho da página e o id a partir do qual a página começa.
+    O tamanho da página é limitado por BUSCA_LIMITE_MAXIMO.
+    Se nem limite nem cursor forem informados, a página tem tamanho \
+    BUSCA_LIMITE_PADRAO, que pode ser None (busca não paginada).
+
+    Parâmetros
+    ==========
+    limite [str] -- tamanho da página informado na requisição.
+    cursor [str] -- cursor informado na requisição.
+
+    Retorno
+    =======
+    Tuple(int, int) -- tamanho da página e id da última feira livre da \
+    página anterior, respectivamente.
+
+    Exceções/Erros
+    ==============
+    ValueError -- se o limite ou o cursor são inválidos.
+    '''
+    apos = None
+    if cursor is not None:
+        apos = decodificar_cursor(cursor)
+    if limite is None:
+        if cursor is None and app.config['BUSCA_LIMITE_PADRAO'] is None:
+            return None, None
+        limite = app.config['BUSCA_LIMITE_PADRAO'] or \
+            app.config['BUSCA_LIMITE_MAXIMO']
+    else:
+        try:
+            valor = int(limite)
+        except ValueError:
+            valor = 0
+        if valor < 1:
+            raise ValueError('Limite {0} inválido.'.format(limite))
+        limite = valor
+    return min(limite, app.config['BUSCA_LIMITE_MAXIMO']), apos
+
+
+def recuperar_proximidade(latitude, longitude, raio, limite):
+    '''
+    Recupera os parâmetros da busca por proximidade.
+    A quantidade de feiras livres é limitada por BUSCA_LIMITE_MAXIMO.
+
+    Parâmetros
+    ==========
+    latitude [str] -- latitude do ponto, em graus.
+    longitude [str] -- longitude do ponto, em graus.
+    raio [str] -- distância máxima, em metros, ou None.
+    limite [str] -- quantidade de feiras livres ou None.
+
+    Retorno
+    =======
+    Tuple(float, float, float, int) -- latitude, longitude, raio e limite, \
+    respectivamente.
+
+    Exceções/Erros
+    ==============
+    ValueError -- se algum dos parâmetros é inválido.
+    '''
+    def converter(valor, nome, minimo, maximo):
+        try:
+            numero = float(valor)
+        except (TypeError, ValueError):
+            numero = None
+        if numero is None or not minimo <= numero <= maximo:
+            raise ValueError('{0} {1} inválido(a).'.format(nome, valor))
+        return numero
+    latitude = converter(latitude, 'Latitude', -90, 90)
+    longitude = converter(longitude, 'Longitude', -180, 180)
+    if raio is not None:
+        raio = converter(raio, 'Raio', 0, float('inf'))
+    maximo = app.config['BUSCA_LIMITE_MAXIMO']
+    if limite is None:
+        return latitude, longitude, raio, maximo
+    try:
+        valor = int(limite)
+    except ValueError:
+        valor = 0
+    if valor < 1:
+        raise ValueError('Limite {0} inválido.'.format(limite))
+    return latitude, longitude, raio, min(valor, maximo)
+
+
+def recuperar_limites(latitude_minima, latitude_maxima, longitude_minima,
+                      longitude_maxima):
+    '''
+    Recupera os limites da área (bounding box) da busca de feiras livres.
+    Cada limite é opcional.
+
+    Parâmetros
+    ==========
+    latitude_minima [str] -- latitude mínima, em graus, ou None.
+    latitude_maxima [str] -- latitude máxima, em graus, ou None.
+    longitude_minima [str] -- longitude mínima, em graus, ou None.
+    longitude_maxima [str] -- longitude máxima, em graus, ou None.
+
+    Retorno
+    =======
+    Tuple(float, float, float, float) -- latitudes mínima e máxima e \
+    longitudes mínima e máxima, respectivamente, ou None se nenhum limite \
+    foi informado.
+
+    Exceções/Erros
+    ==============
+    ValueError -- se algum dos limites é inválido (não numérico, nan ou \
+    infinito).
+    '''
+    valores = (latitude_minima, latitude_maxima,
+               longitude_minima, longitude_maxima)
+    if all(i is None for i in valores):
+        return None
+    limites = list()
+    for nome, valor in zip(('min_lat', 'max_lat', 'min_lon', 'max_lon'),
+                           valores):
+        try:
+            numero = None if valor is None else float(valor)
+            if numero is not None and not math.isfinite(numero):
+                raise ValueError()
+        except ValueError:
+            raise ValueError('Limite {0}={1} inválido.'.format(nome, valor))
+        limites.append(numero)
+    for minimo, maximo in ((limites[0], limites[1]), (limites[2], limites[3])):
+        if minimo is not None and maximo is not None and minimo > maximo:
+            raise ValueError('Limite mínimo {0} maior que o máximo {1}.'
+                             .format(minimo, maximo))
+    return tuple(limites)
+
+
+def paginar_consulta(consulta, apos, limite):
     '''
-    Identifica qual a entidade (e suas colunas) que gerou um erro de \
-    índice único.
+    Restringe a consulta a uma página de feiras livres ordenadas por id.
+    A página começa após a feira livre de id apos (keyset), e contém \
+    uma feira livre a mais que o limite para indicar se existe próxima \
+    página.
 
     Parâmetros
     ==========
-    mensagem [str] -- mensagem de erro de índice único.
+    consulta [Query] -- consulta a ser executada para encontrar feiras livres.
+    apos [int] -- id da última feira livre da página anterior ou None.
+    limite [int] -- tamanho da página.
 
     Retorno
     =======
-    Tuple(str, Tuple) -- contém a entidade e as colunas respectivamente.
+    Query -- consulta restrita à página.
     '''
-    resultado = re.findall('[^.]*:? ([^.]*).([a-z0-9A-Z_][a-z0-9A-Z_]*),?', mensagem)
-    colunas = list()
-    for entidade, coluna in resultado:
-        colunas.append(coluna)
-    return (entidade, tuple(colunas))
+    if apos is not None:
+        consulta = consulta.filter(FeiraLivre.id > apos)
+    return consulta.order_by(FeiraLivre.id).limit(limite + 1)
 
 
-def criar_consulta_busca(regiao5, distrito, bairro, nome):
+def criar_consulta_busca(regiao5, distrito, bairro, nome, limites=None,
+                         somente_ids=False):
     '''
     Cria a consulta a ser utilizada na busca de feiras livres.
 
@@ -288,6 +842,11 @@ def criar_consulta_busca(regiao5, distrito, bairro, nome):
     distrito [str] -- distrito da localização da feira livre.
     bairro [str] -- bairro da localização da feira livre.
     nome [str] -- nome da feira livre.
+    limites [Tuple(float, float, float, float)] -- latitudes mínima e \
+    máxima e longitudes mínima e máxima da localização da feira livre; \
+    limites None são ignorados. (default=None)
+    somente_ids [bool] -- se a consulta retorna apenas os ids das feiras \
+    livres, sem carregar as entidades. (default=False)
 
     Retorno
     =======
@@ -296,7 +855,11 @@ def criar_consulta_busca(regiao5, distrito, bairro, nome):
     filtros = list()
     relacoes = list()
     if nome is not None:
-        filtros.append(FeiraLivre.nome.like('%' + nome + '%'))
+        indexado = app.config['BUSCA_NOME_INDEXADA'] and \
+            bd.engine.dialect.name == 'sqlite'
+        filtro_nome = criar_filtro_nome(nome, indexado)
+        if filtro_nome is not None:
+            filtros.append(filtro_nome)
     if regiao5 is not None:
         relacoes.append(FeiraLivre.endereco)
         relacoes.append(Endereco.regiao5)
@@ -310,7 +873,22 @@ def criar_consulta_busca(regiao5, distrito, bairro, nome):
         relacoes.append(FeiraLivre.endereco)
         relacoes.append(Endereco.bairro)
         filtros.append(Bairro.nome == bairro)
-    consulta = FeiraLivre.query
+    if limites is not None:
+        latitude_minima, latitude_maxima, \
+            longitude_minima, longitude_maxima = limites
+        relacoes.append(FeiraLivre.endereco)
+        if latitude_minima is not None:
+            filtros.append(Endereco.latitude >= latitude_minima)
+        if latitude_maxima is not None:
+            filtros.append(Endereco.latitude <= latitude_maxima)
+        if longitude_minima is not None:
+            filtros.append(Endereco.longitude >= longitude_minima)
+        if longitude_maxima is not None:
+            filtros.append(Endereco.longitude <= longitude_maxima)
+    if somente_ids:
+        consulta = bd.session.query(FeiraLivre.id)
+    else:
+        consulta = FeiraLivre.query.options(*carregamento_feira_livre())
     # Adiciona na consulta relações únicas
     relacoes_utilizadas = set()
     for relacao in relacoes:
@@ -324,7 +902,7 @@ def criar_consulta_busca(regiao5, distrito, bairro, nome):
 
 
 if __name__ == '__main__':
-    handler = RotatingFileHandler('log.txt', maxBytes=10000, backupCount=1)
-    handler.setLevel(logging.INFO)
-    app.logger.addHandler(handler)
+    log_requisicoes.iniciar_escrita()
+    with app.app_context():
+        indice_espacial.atualizar(bd.session)
     app.run()
@@ -0,0 +1,602 @@
+''' Módulo responsável pelo benchmark da importação e dos endpoints. '''
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+CABECALHO = ['ID', 'LONG', 'LAT', 'SETCENS', 'AREAP', 'CODDIST', 'DISTRITO',
+             'CODSUBPREF', 'SUBPREFE', 'REGIAO5', 'REGIAO8', 'NOME_FEIRA',
+             'REGISTRO', 'LOGRADOURO', 'NUMERO', 'BAIRRO', 'REFERENCIA']
+ARQUIVO_SEMENTE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               'recursos', 'DEINFO_AB_FEIRASLIVRES_2014.csv')
+TIPOS_LOGRADOURO = ('RUA', 'AV', 'PCA', 'TV', 'AL', 'EST')
+# Proporções de bairros e logradouros por feira no arquivo DEINFO,
+# limitadas pela quantidade aproximada existente no Município
+PROPORCAO_BAIRROS, MAXIMO_BAIRROS = 0.64, 3000
+PROPORCAO_LOGRADOUROS, MAXIMO_LOGRADOUROS = 0.97, 60000
+TAMANHO_LOTE_ESCRITA = 1000
+
+
+def carregar_distritos(caminho_arquivo_csv=ARQUIVO_SEMENTE):
+    '''
+    Carrega os distritos, com suas subprefeituras e regiões, do arquivo \
+    csv de feiras livres.
+
+    Parâmetros
+    ==========
+    caminho_arquivo_csv [str] -- caminho para o arquivo csv. \
+    (default=ARQUIVO_SEMENTE)
+
+    Retorno
+    =======
+    List(Dict) -- colunas CODDIST, DISTRITO, CODSUBPREF, SUBPREFE, \
+    REGIAO5 e REGIAO8 de cada distrito.
+    '''
+    colunas = ('CODDIST', 'DISTRITO', 'CODSUBPREF', 'SUBPREFE', 'REGIAO5',
+               'REGIAO8')
+    distritos = dict()
+    with open(caminho_arquivo_csv, 'r') as arquivo:
+        for linha in csv.DictReader(arquivo):
+            distritos.setdefault(linha['CODDIST'],
+                                 {c: linha[c] for c in colunas})
+    return [distritos[c] for c in sorted(distritos, key=int)]
+
+
+def calcular_cardinalidades(linhas):
+    '''
+    Calcula a quantidade de bairros e de logradouros distintos de um \
+    arquivo sintético.
+
+    Parâmetros
+    ==========
+    linhas [int] -- quantidade de linhas do arquivo.
+
+    Retorno
+    =======
+    Tuple(int, int) -- quantidade de bairros e de logradouros.
+    '''
+    return (max(1, min(int(linhas * PROPORCAO_BAIRROS), MAXIMO_BAIRROS)),
+            max(1, min(int(linhas * PROPORCAO_LOGRADOUROS),
+                       MAXIMO_LOGRADOUROS)))
+
+
+def gerar_linhas(linhas, semente=0, inicio=1, prefixo_registro=''):
+    '''
+    Gera linhas sintéticas no formato do arquivo csv de feiras livres.
+    Subprefeituras, distritos e regiões são os do arquivo DEINFO; \
+    bairros e logradouros seguem calcular_cardinalidades; coordenadas \
+    são sorteadas no território do Município.
+
+    Parâmetros
+    ==========
+    linhas [int] -- quantidade de linhas.
+    semente [int] -- semente do gerador de números aleatórios. (default=0)
+    inicio [int] -- ID da primeira linha. (default=1)
+    prefixo_registro [str] -- prefixo do REGISTRO das feiras livres. \
+    (default='')
+
+    Retorno
+    =======
+    Generator(Dict) -- linhas do arquivo csv.
+    '''
+    aleatorio = random.Random(semente)
+    distritos = carregar_distritos()
+    quantidade_bairros, quantidade_logradouros = \
+        calcular_cardinalidades(linhas)
+    bairros = [('BAIRRO {0}'.format(i), distritos[i % len(distritos)])
+               for i in range(quantidade_bairros)]
+    logradouros = ['{0} LOGRADOURO {1}'
+                   .format(TIPOS_LOGRADOURO[i % len(TIPOS_LOGRADOURO)], i)
+                   for i in range(quantidade_logradouros)]
+    for identificador in range(inicio, inicio + linhas):
+        bairro, distrito = aleatorio.choice(bairros)
+        logradouro = aleatorio.choice(logradouros)
+        numero = 'S/N'
+        if aleatorio.random() < 0.7:
+            numero = '{0}.000000'.format(aleatorio.randint(1, 5000))
+        linha = {'ID': str(identificador),
+                 'LONG': str(aleatorio.randint(-46820000, -46370000)),
+                 'LAT': str(aleatorio.randint(-24000000, -23360000)),
+                 'SETCENS': '3550308{0:08d}'
+                            .format(aleatorio.randint(0, 99999999)),
+                 'AREAP': '355030800{0:04d}'.format(aleatorio.randint(0,
+                                                                      9999)),
+                 'NOME_FEIRA': aleatorio.choice((bairro, logradouro)),
+                 'REGISTRO': '{0}{1}-{2}'.format(prefixo_registro,
+                                                 identificador,
+                                                 identificador % 10),
+                 'LOGRADOURO': logradouro,
+                 'NUMERO': numero,
+                 'BAIRRO': bairro,
+                 'REFERENCIA': 'PROXIMO A {0}'
+                               .format(aleatorio.choice(logradouros))}
+        linha.update(distrito)
+        yield linha
+
+
+def gerar_csv(caminho_arquivo_csv, linhas, semente=0):
+    '''
+    Gera um arquivo csv sintético de feiras livres.
+
+    Parâmetros
+    ==========
+    caminho_arquivo_csv [str] -- caminho para o arquivo csv.
+    linhas [int] -- quantidade de linhas.
+    semente [int] -- semente do gerador de números aleatórios. (default=0)
+    '''
+    with open(caminho_arquivo_csv, 'w', newline='') as arquivo:
+        escritor = csv.DictWriter(arquivo, fieldnames=CABECALHO)
+        escritor.writeheader()
+        escritor.writerows(gerar_linhas(linhas, semente))
+
+
+def calcular_percentil(valores, percentil):
+    '''
+    Calcula o percentil (método nearest-rank) dos valores.
+
+    Parâmetros
+    ==========
+    valores [List(float)] -- valores ordenados.
+    percentil [float] -- percentil, entre 0 e 100.
+
+    Retorno
+    =======
+    float -- valor do percentil ou None se não há valores.
+    '''
+    if len(valores) == 0:
+        return None
+    posicao = max(0, -(-len(valores) * percentil // 100) - 1)
+    return valores[int(posicao)]
+
+
+def resumir_latencias(latencias, erros=0, linhas=None):
+    '''
+    Resume as latências de um cenário.
+
+    Parâmetros
+    ==========
+    latencias [List(float)] -- latência de cada requisição, em segundos.
+    erros [int] -- quantidade de respostas com erro. (default=0)
+    linhas [int] -- quantidade de feiras livres gravadas ou None. \
+    (default=None)
+
+    Retorno
+    =======
+    Dict -- quantidade de requisições e de erros, latências p50, p99 e \
+    média em milissegundos, requisições por segundo e, se informado, \
+    feiras livres por segundo.
+    '''
+    ordenadas = sorted(latencias)
+    total = sum(ordenadas)
+    resumo = {'requisicoes': len(ordenadas),
+              'erros': erros,
+              'p50_ms': round(calcular_percentil(ordenadas, 50) * 1000, 3),
+              'p99_ms': round(calcular_percentil(ordenadas, 99) * 1000, 3),
+              'media_ms': round(total / len(ordenadas) * 1000, 3),
+              'requisicoes_por_segundo': round(len(ordenadas) / total, 1)}
+    if linhas is not None:
+        resumo['linhas_por_segundo'] = round(linhas / total, 1)
+    return resumo
+
+
+def medir_pico_memoria():
+    '''
+    Recupera o pico de memória residente (RSS) do processo.
+
+    Retorno
+    =======
+    float -- pico de memória, em MiB.
+    '''
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é medido em bytes no macOS e em KiB nos demais sistemas
+    if sys.platform == 'darwin':
+        pico = pico / 1024
+    return round(pico / 1024, 1)
+
+
+def configurar_base_dados(diretorio):
+    '''
+    Cria o arquivo de configuração que direciona a aplicação para uma \
+    base de dados do benchmark, sem cache de respostas, e o registra em \
+    FEIRASLIVRESAPI_CONFIG para este processo e seus filhos.
+
+    Parâmetros
+    ==========
+    diretorio [str] -- diretório da base de dados e da configuração, \
+    criado caso não exista.
+    '''
+    os.makedirs(diretorio, exist_ok=True)
+    caminho = os.path.join(diretorio, 'configuracao.py')
+    with open(caminho, 'w') as arquivo:
+        arquivo.write('SQLALCHEMY_DATABASE_URI = {0!r}\n'
+                      'CACHE_RESPOSTAS_TAMANHO = 0\n'
+                      .format('sqlite:///' + os.path.join(diretorio,
+                                                          'benchmark.db')))
+    os.environ['FEIRASLIVRESAPI_CONFIG'] = caminho
+
+
+def executar_isolado(funcao, *args):
+    '''
+    Executa a função em um novo processo, para que a memória e o estado \
+    da aplicação de cada medição sejam independentes.
+
+    Parâmetros
+    ==========
+    funcao [Callable] -- função a ser executada.
+    args -- argumentos da função.
+
+    Retorno
+    =======
+    object -- retorno da função.
+    '''
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(1, mp_context=contexto) as pool:
+        return pool.submit(funcao, *args).result()
+
+
+def medir_importacao(caminho_arquivo_csv, linhas, modo, processos=None):
+    '''
+    Recria a base de dados do benchmark e mede a importação do arquivo.
+    Executada em um processo isolado.
+
+    Parâmetros
+    ==========
+    caminho_arquivo_csv [str] -- caminho para o arquivo csv.
+    linhas [int] -- quantidade de linhas do arquivo.
+    modo [str] -- modo de importação: 'linha', 'lote' ou 'paralelo'.
+    processos [int] -- quantidade de processos do modo 'paralelo'. \
+    (default=None)
+
+    Retorno
+    =======
+    Dict -- duração, linhas por segundo e pico de memória do processo.
+    '''
+    import script
+    from app import app
+    from src.basedados import bd
+    with app.app_context():
+        bd.drop_all()
+        bd.create_all()
+        inicio = time.perf_counter()
+        if modo == 'linha':
+            script.criar_entidades(caminho_arquivo_csv)
+        elif modo == 'paralelo':
+            script.criar_entidades_paralelo(caminho_arquivo_csv, processos)
+        else:
+            script.criar_entidades_lote(caminho_arquivo_csv)
+        duracao = time.perf_counter() - inicio
+        bd.session.remove()
+    return {'segundos': round(duracao, 3),
+            'linhas_por_segundo': round(linhas / duracao, 1),
+            'pico_rss_mb': medir_pico_memoria()}
+
+
+def medir_requisicoes(cliente, requisicoes):
+    '''
+    Executa as requisições, em sequência, e mede suas latências.
+
+    Parâmetros
+    ==========
+    cliente [FlaskClient] -- cliente de teste da aplicação.
+    requisicoes [Iterable(Tuple(str, str, Dict))] -- método, url e \
+    argumentos de cada requisição.
+
+    Retorno
+    =======
+    Tuple(List(float), int) -- latências, em segundos, e quantidade de \
+    respostas com erro.
+    '''
+    latencias = list()
+    erros = 0
+    for metodo, url, argumentos in requisicoes:
+        inicio = time.perf_counter()
+        resposta = cliente.open(url, method=metodo, **argumentos)
+        resposta.get_data()
+        latencias.append(time.perf_counter() - inicio)
+        if resposta.status_code >= 400:
+            erros += 1
+    return latencias, erros
+
+
+def medir_endpoints(quantidade, semente=0):
+    '''
+    Mede as latências das buscas e das escritas na base de dados do \
+    benchmark, já populada.
+    Executada em um processo isolado.
+
+    Parâmetros
+    ==========
+    quantidade [int] -- quantidade de requisições de cada cenário.
+    semente [int] -- semente do gerador de números aleatórios. (default=0)
+
+    Retorno
+    =======
+    Tuple(Dict, Dict, float) -- resumo de cada cenário de busca, de cada \
+    cenário de escrita e pico de memória do processo.
+    '''
+    from app import app
+    from src.basedados import bd
+    from src.importacao import converter_linha_csv
+    from src.modelos import Regiao5, Distrito, Bairro
+    aleatorio = random.Random(semente)
+    cliente = app.test_client()
+    with app.app_context():
+        regioes = [i for i, in bd.session.query(Regiao5.nome)]
+        distritos = [i for i, in bd.session.query(Distrito.nome)]
+        bairros = [i for i, in bd.session.query(Bairro.nome)]
+        bd.session.remove()
+
+    def buscar(montar_url):
+        return [('GET', montar_url(), {}) for i in range(quantidade)]
+
+    def sortear_ponto():
+        return (aleatorio.uniform(-24.0, -23.36),
+                aleatorio.uniform(-46.82, -46.37))
+
+    def sortear_area():
+        latitude, longitude = sortear_ponto()
+        return ('/feiras?min_lat={0}&max_lat={1}&min_lon={2}&max_lon={3}'
+                '&limite=100'.format(latitude, latitude + 0.02,
+                                     longitude, longitude + 0.02))
+
+    cenarios_busca = {
+        'regiao5': buscar(lambda: '/feiras?regiao5={0}&limite=100'
+                                  .format(aleatorio.choice(regioes))),
+        'distrito': buscar(lambda: '/feiras?distrito={0}&limite=100'
+                                   .format(aleatorio.choice(distritos))),
+        'bairro': buscar(lambda: '/feiras?bairro={0}&limite=100'
+                                 .format(aleatorio.choice(bairros))),
+        'nome': buscar(lambda: '/feiras?nome={0}&limite=100'
+                               .format(aleatorio.choice(bairros))),
+        'area': buscar(sortear_area),
+        'proximas': buscar(lambda: '/feiras/proximas?lat={0}&lon={1}'
+                                   '&limite=10'.format(*sortear_ponto()))}
+    busca = dict()
+    for cenario, requisicoes in cenarios_busca.items():
+        busca[cenario] = resumir_latencias(*medir_requisicoes(cliente,
+                                                              requisicoes))
+
+    novas = [converter_linha_csv(i)
+             for i in gerar_linhas(quantidade, semente + 1,
+                                   prefixo_registro='BENCH')]
+    alteradas = [dict(i, nome=i['nome'] + ' ALTERADA') for i in novas]
+    lotes = [[converter_linha_csv(i)
+              for i in gerar_linhas(TAMANHO_LOTE_ESCRITA, semente + 2 + n,
+                                    prefixo_registro='LOTE{0}-'.format(n))]
+             for n in range(max(1, quantidade // 100))]
+    cenarios_escrita = {
+        'adicionar': [('POST', '/feira', {'json': i}) for i in novas],
+        'alterar': [('PUT', '/feira', {'json': i}) for i in alteradas],
+        'remover': [('DELETE', '/feira?registro=' + i['registro'], {})
+                    for i in novas],
+        'lote': [('POST', '/feiras/lote', {'json': i}) for i in lotes]}
+    escrita = dict()
+    for cenario, requisicoes in cenarios_escrita.items():
+        latencias, erros = medir_requisicoes(cliente, requisicoes)
+        linhas = None
+        if cenario == 'lote':
+            linhas = len(requisicoes) * TAMANHO_LOTE_ESCRITA
+        escrita[cenario] = resumir_latencias(latencias, erros, linhas)
+    return busca, escrita, medir_pico_memoria()
+
+
+def medir_codificadores(repeticoes=5):
+    '''
+    Mede a codificação json de todas as feiras livres da base de dados \
+    do benchmark, já populada, com cada codificador disponível.
+    Executada em um processo isolado.
+
+    Parâmetros
+    ==========
+    repeticoes [int] -- quantidade de codificações de cada codificador. \
+    (default=5)
+
+    Retorno
+    =======
+    Dict -- mediana da duração, vazão e tamanho do json de cada \
+    codificador.
+    '''
+    from app import app
+    from src.basedados import bd
+    from src.modelos import FeiraLivre, carregamento_feira_livre
+    from src.provedor_json import ProvedorJson
+    from src.provedor_json import listar_codificadores_disponiveis
+    with app.app_context():
+        conteudo = {'feiras': [i.dict for i in FeiraLivre.query.options(
+            *carregamento_feira_livre())]}
+        bd.session.remove()
+    provedor = ProvedorJson(app)
+    resultado = dict()
+    for codificador in listar_codificadores_disponiveis():
+        provedor.codificador = codificador
+        duracoes = list()
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            corpo = provedor.codificar(conteudo)
+            duracoes.append(time.perf_counter() - inicio)
+        mediana = calcular_percentil(duracoes, 50)
+        resultado[codificador] = {
+            'mediana_ms': round(mediana * 1000, 3),
+            'mb_por_segundo': round(len(corpo) / mediana / 1024 / 1024, 1),
+            'bytes': len(corpo)}
+    return resultado
+
+
+def executar(tamanhos, modos, processos=None, requisicoes=200, semente=0,
+             diretorio=None):
+    '''
+    Executa o benchmark para cada tamanho de arquivo: gera o arquivo \
+    sintético, mede a importação em cada modo e, em seguida, as buscas, \
+    as escritas e a codificação json de todas as feiras livres.
+
+    Parâmetros
+    ==========
+    tamanhos [List(int)] -- quantidades de linhas dos arquivos.
+    modos [List(str)] -- modos de importação.
+    processos [int] -- quantidade de processos do modo 'paralelo'. \
+    (default=None)
+    requisicoes [int] -- quantidade de requisições de cada cenário. \
+    (default=200)
+    semente [int] -- semente do gerador de números aleatórios. (default=0)
+    diretorio [str] -- diretório dos arquivos gerados ou None para um \
+    diretório temporário. (default=None)
+
+    Retorno
+    =======
+    Dict -- ambiente, parâmetros e resultados do benchmark.
+    '''
+    diretorio = diretorio or tempfile.mkdtemp(prefix='benchmark-')
+    configurar_base_dados(diretorio)
+    resultados = list()
+    for linhas in tamanhos:
+        caminho_arquivo_csv = os.path.join(diretorio,
+                                           'feiras-{0}.csv'.format(linhas))
+        inicio = time.perf_counter()
+        gerar_csv(caminho_arquivo_csv, linhas, semente)
+        resultado = {'linhas': linhas,
+                     'geracao_segundos': round(time.perf_counter() - inicio,
+                                               3),
+                     'importacao': dict()}
+        for modo in modos:
+            resultado['importacao'][modo] = executar_isolado(
+                medir_importacao, caminho_arquivo_csv, linhas, modo,
+                processos)
+            print('{0} linhas, importação {1}: {2}'
+                  .format(linhas, modo, resultado['importacao'][modo]))
+        busca, escrita, pico = executar_isolado(medir_endpoints,
+                                                requisicoes, semente)
+        codificadores = executar_isolado(medir_codificadores)
+        resultado.update({'busca': busca, 'escrita': escrita,
+                          'pico_rss_mb_endpoints': pico,
+                          'codificadores': codificadores})
+        print('{0} linhas, busca: {1}'.format(linhas, busca))
+        print('{0} linhas, escrita: {1}'.format(linhas, escrita))
+        print('{0} linhas, codificadores json: {1}'.format(linhas,
+                                                          codificadores))
+        resultados.append(resultado)
+    return {'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'ambiente': {'python': platform.python_version(),
+                         'sqlite': sqlite3.sqlite_version,
+                         'plataforma': platform.platform(),
+                         'processadores': os.cpu_count()},
+            'parametros': {'modos': modos, 'processos': processos,
+                           'requisicoes': requisicoes, 'semente': semente},
+            'resultados': resultados}
+
+
+def comparar(anterior, atual, tolerancia=0.1):
+    '''
+    Compara dois resultados do benchmark e identifica regressões: \
+    importações ou escritas com menos linhas por segundo, buscas ou \
+    escritas com p99 maior e codificadores json com menor vazão, além da \
+    tolerância.
+
+    Parâmetros
+    ==========
+    anterior [Dict] -- resultado de referência.
+    atual [Dict] -- resultado a ser comparado.
+    tolerancia [float] -- variação relativa tolerada. (default=0.1)
+
+    Retorno
+    =======
+    List(str) -- descrição de cada regressão encontrada.
+    '''
+    referencias = {i['linhas']: i for i in anterior['resultados']}
+    regressoes = list()
+
+    def verificar(descricao, valor_anterior, valor_atual, maior_melhor):
+        if valor_anterior is None or valor_atual is None:
+            return
+        variacao = (valor_atual - valor_anterior) / valor_anterior
+        if (maior_melhor and variacao < -tolerancia) or \
+                (not maior_melhor and variacao > tolerancia):
+            regressoes.append('{0}: {1} -> {2} ({3:+.1%})'
+                              .format(descricao, valor_anterior, valor_atual,
+                                      variacao))
+
+    for resultado in atual['resultados']:
+        referencia = referencias.get(resultado['linhas'])
+        if referencia is None:
+            continue
+        prefixo = '{0} linhas'.format(resultado['linhas'])
+        for modo, medicao in resultado['importacao'].items():
+            if modo in referencia['importacao']:
+                verificar('{0}, importação {1}, linhas/s'.format(prefixo,
+                                                                 modo),
+                          referencia['importacao'][modo]['linhas_por_segundo'],
+                          medicao['linhas_por_segundo'], True)
+        for grupo in ('busca', 'escrita'):
+            for cenario, medicao in resultado[grupo].items():
+                anterior_cenario = referencia[grupo].get(cenario)
+                if anterior_cenario is None:
+                    continue
+                verificar('{0}, {1} {2}, p99 ms'.format(prefixo, grupo,
+                                                        cenario),
+                          anterior_cenario['p99_ms'], medicao['p99_ms'],
+                          False)
+                if 'linhas_por_segundo' in medicao:
+                    verificar('{0}, {1} {2}, linhas/s'.format(prefixo, grupo,
+                                                             cenario),
+                              anterior_cenario.get('linhas_por_segundo'),
+                              medicao['linhas_por_segundo'], True)
+        for codificador, medicao in resultado.get('codificadores',
+                                                  dict()).items():
+            anterior_codificador = referencia.get('codificadores',
+                                                  dict()).get(codificador)
+            if anterior_codificador is not None:
+                verificar('{0}, codificador {1}, MB/s'.format(prefixo,
+                                                             codificador),
+                          anterior_codificador['mb_por_segundo'],
+                          medicao['mb_por_segundo'], True)
+    return regressoes
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Mede a importação e os '
+                                                 'endpoints com arquivos '
+                                                 'csv sintéticos.')
+    parser.add_argument('--linhas', nargs='+', type=int,
+                        default=[10000, 100000, 1000000],
+                        help='Quantidades de linhas dos arquivos gerados')
+    parser.add_argument('--modos', nargs='+', default=['lote', 'paralelo'],
+                        choices=['linha', 'lote', 'paralelo'],
+                        help='Modos de importação medidos')
+    parser.add_argument('--processos', default=None, type=int,
+                        help='Quantidade de processos do modo paralelo')
+    parser.add_argument('--requisicoes', default=200, type=int,
+                        help='Quantidade de requisições de cada cenário')
+    parser.add_argument('--semente', default=0, type=int,
+                        help='Semente do gerador de números aleatórios')
+    parser.add_argument('--diretorio', default=None, type=str,
+                        help='Diretório dos arquivos gerados')
+    parser.add_argument('--saida', default=None, type=str,
+                        help='Arquivo json do resultado')
+    parser.add_argument('--comparar', default=None, type=str,
+                        help='Arquivo json de um resultado anterior')
+    parser.add_argument('--tolerancia', default=0.1, type=float,
+                        help='Variação relativa tolerada na comparação')
+    args = parser.parse_args()
+
+    resultado = executar(args.linhas, args.modos, args.processos,
+                         args.requisicoes, args.semente, args.diretorio)
+    saida = args.saida or time.strftime('benchmark-%Y%m%d-%H%M%S.json')
+    with open(saida, 'w') as arquivo:
+        json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+    print('Resultado gravado em {0}'.format(saida))
+    if args.comparar is not None:
+        with open(args.comparar, 'r') as arquivo:
+            regressoes = comparar(json.load(arquivo), resultado,
+                                  args.tolerancia)
+        for regressao in regressoes:
+            print('Regressão: ' + regressao)
+        sys.exit(1 if len(regressoes) > 0 else 0)
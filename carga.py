@@ -0,0 +1,634 @@
+''' Módulo responsável pelo teste de carga dos endpoints. '''
+
+import argparse
+import itertools
+import json
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from benchmark import calcular_percentil
+
+OPERACOES = ('buscar', 'proximas', 'adicionar', 'alterar', 'remover')
+FILTROS = ('regiao5', 'distrito', 'bairro', 'nome', 'area')
+MIX_PADRAO = 'buscar=70,proximas=10,adicionar=10,alterar=5,remover=5'
+# Limites superiores, em milissegundos, dos intervalos dos histogramas
+INTERVALOS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+def interpretar_mix(mix):
+    '''
+    Interpreta o mix de operações.
+
+    Parâmetros
+    ==========
+    mix [str] -- pesos das operações, no formato \
+    'operacao=peso,operacao=peso'.
+
+    Retorno
+    =======
+    Dict -- peso de cada operação com peso positivo.
+
+    Exceções/Erros
+    ==============
+    ValueError -- se a operação ou o peso são inválidos.
+    '''
+    pesos = dict()
+    for item in mix.split(','):
+        operacao, _, peso = item.partition('=')
+        operacao = operacao.strip()
+        if operacao not in OPERACOES:
+            raise ValueError('Operação {0} inválida.'.format(operacao))
+        try:
+            peso = float(peso)
+        except ValueError:
+            raise ValueError('Peso {0} inválido.'.format(peso))
+        if peso < 0:
+            raise ValueError('Peso {0} inválido.'.format(peso))
+        if peso > 0:
+            pesos[operacao] = peso
+    if len(pesos) == 0:
+        raise ValueError('Mix {0} sem operações.'.format(mix))
+    return pesos
+
+
+def listar_combinacoes(combinacoes=None):
+    '''
+    Lista as combinações de filtros de GET /feiras.
+
+    Parâmetros
+    ==========
+    combinacoes [List(str)] -- combinações no formato 'filtro+filtro' ou \
+    None para todas as combinações, inclusive sem filtros. (default=None)
+
+    Retorno
+    =======
+    List(Tuple(str)) -- filtros de cada combinação, na ordem de FILTROS.
+
+    Exceções/Erros
+    ==============
+    ValueError -- se um filtro é inválido.
+    '''
+    if combinacoes is None:
+        return [i for n in range(len(FILTROS) + 1)
+                for i in itertools.combinations(FILTROS, n)]
+    resultado = list()
+    for combinacao in combinacoes:
+        filtros = set(i for i in combinacao.split('+') if i != '')
+        invalidos = filtros.difference(FILTROS)
+        if len(invalidos) > 0:
+            raise ValueError('Filtro(s) {0} inválido(s).'
+                             .format(', '.join(sorted(invalidos))))
+        resultado.append(tuple(i for i in FILTROS if i in filtros))
+    return resultado
+
+
+def nomear_combinacao(filtros):
+    '''
+    Nomeia a combinação de filtros de GET /feiras.
+
+    Parâmetros
+    ==========
+    filtros [Tuple(str)] -- filtros da combinação.
+
+    Retorno
+    =======
+    str -- nome da combinação.
+    '''
+    return 'GET /feiras [{0}]'.format('+'.join(filtros) or 'sem filtros')
+
+
+class Histograma:
+    '''
+    Armazena as latências e os erros das requisições de um endpoint.
+
+    Atributos
+    ==========
+    latencias [List(float)] -- latência de cada requisição, em segundos.
+    erros [int] -- quantidade de respostas com status 5xx ou sem resposta.
+    '''
+    def __init__(self):
+        ''' Construtor. '''
+        self.latencias = list()
+        self.erros = 0
+
+    def registrar(self, latencia, status):
+        '''
+        Registra uma requisição.
+
+        Parâmetros
+        ==========
+        latencia [float] -- latência, em segundos.
+        status [int] -- status da resposta ou None se não houve resposta.
+        '''
+        self.latencias.append(latencia)
+        if status is None or status >= 500:
+            self.erros += 1
+
+    def combinar(self, outro):
+        '''
+        Acrescenta as requisições de outro histograma.
+
+        Parâmetros
+        ==========
+        outro [Histograma] -- histograma.
+        '''
+        self.latencias.extend(outro.latencias)
+        self.erros += outro.erros
+
+    def resumir(self, duracao):
+        '''
+        Resume as requisições registradas.
+
+        Parâmetros
+        ==========
+        duracao [float] -- duração do teste de carga, em segundos.
+
+        Retorno
+        =======
+        Dict -- quantidade de requisições e de erros, vazão, latências \
+        p50, p90, p99 e máxima em milissegundos e quantidade de \
+        requisições em cada intervalo do histograma.
+        '''
+        ordenadas = sorted(i * 1000 for i in self.latencias)
+        intervalos = dict()
+        posicao = 0
+        for limite in INTERVALOS_MS:
+            inicio = posicao
+            while posicao < len(ordenadas) and ordenadas[posicao] <= limite:
+                posicao += 1
+            intervalos['<={0}'.format(limite)] = posicao - inicio
+        intervalos['>{0}'.format(INTERVALOS_MS[-1])] = \
+            len(ordenadas) - posicao
+
+        def arredondar(valor):
+            return None if valor is None else round(valor, 3)
+        return {'requisicoes': len(ordenadas),
+                'erros': self.erros,
+                'requisicoes_por_segundo': round(len(ordenadas) / duracao, 1),
+                'p50_ms': arredondar(calcular_percentil(ordenadas, 50)),
+                'p90_ms': arredondar(calcular_percentil(ordenadas, 90)),
+                'p99_ms': arredondar(calcular_percentil(ordenadas, 99)),
+                'maximo_ms': arredondar(ordenadas[-1] if ordenadas
+                                        else None),
+                'histograma_ms': intervalos}
+
+
+class ClienteTeste:
+    ''' Envia as requisições pelo cliente de teste do Flask. '''
+    def __init__(self, app):
+        '''
+        Construtor.
+
+        Parâmetros
+        ==========
+        app [Flask] -- aplicação.
+        '''
+        self.cliente = app.test_client()
+
+    def requisitar(self, metodo, caminho, corpo=None):
+        '''
+        Envia uma requisição.
+
+        Parâmetros
+        ==========
+        metodo [str] -- método HTTP.
+        caminho [str] -- caminho e query string.
+        corpo [Dict] -- json do corpo da requisição ou None. (default=None)
+
+        Retorno
+        =======
+        Tuple(int, bytes) -- status e corpo da resposta.
+        '''
+        resposta = self.cliente.open(caminho, method=metodo, json=corpo)
+        return resposta.status_code, resposta.get_data()
+
+
+class ClienteHttp:
+    ''' Envia as requisições a um servidor HTTP. '''
+    def __init__(self, url):
+        '''
+        Construtor.
+
+        Parâmetros
+        ==========
+        url [str] -- url base do servidor, ex.: http://localhost:5000.
+        '''
+        self.url = url.rstrip('/')
+
+    def requisitar(self, metodo, caminho, corpo=None):
+        '''
+        Envia uma requisição.
+
+        Parâmetros
+        ==========
+        metodo [str] -- método HTTP.
+        caminho [str] -- caminho e query string.
+        corpo [Dict] -- json do corpo da requisição ou None. (default=None)
+
+        Retorno
+        =======
+        Tuple(int, bytes) -- status e corpo da resposta.
+        '''
+        dados = None
+        cabecalhos = dict()
+        if corpo is not None:
+            dados = json.dumps(corpo).encode('utf-8')
+            cabecalhos['Content-Type'] = 'application/json'
+        requisicao = urllib.request.Request(self.url + caminho, data=dados,
+                                            headers=cabecalhos,
+                                            method=metodo)
+        try:
+            with urllib.request.urlopen(requisicao) as resposta:
+                return resposta.status, resposta.read()
+        except urllib.error.HTTPError as erro:
+            return erro.code, erro.read()
+
+
+def obter(dicionario, *chaves):
+    '''
+    Recupera um valor aninhado em dicionários.
+
+    Parâmetros
+    ==========
+    dicionario [Dict] -- dicionário.
+    chaves [str] -- chaves, do nível mais externo ao mais interno.
+
+    Retorno
+    =======
+    object -- valor ou None se alguma chave não existe.
+    '''
+    for chave in chaves:
+        if dicionario is None:
+            return None
+        dicionario = dicionario.get(chave)
+    return dicionario
+
+
+def carregar_amostra(cliente, tamanho):
+    '''
+    Carrega, por GET /feiras, as feiras livres usadas como base dos \
+    filtros e dos endereços das escritas.
+
+    Parâmetros
+    ==========
+    cliente [ClienteTeste|ClienteHttp] -- cliente.
+    tamanho [int] -- quantidade máxima de feiras livres.
+
+    Retorno
+    =======
+    List(Dict) -- feiras livres.
+
+    Exceções/Erros
+    ==============
+    ValueError -- se a busca falha ou não há feiras livres.
+    '''
+    amostra = list()
+    caminho = '/feiras?limite=100'
+    while caminho is not None and len(amostra) < tamanho:
+        status, corpo = cliente.requisitar('GET', caminho)
+        if status != 200:
+            raise ValueError('GET {0} respondeu {1}.'.format(caminho, status))
+        conteudo = json.loads(corpo)
+        amostra.extend(conteudo['feiras'])
+        caminho = None
+        if conteudo.get('proximo') is not None:
+            caminho = '/feiras?limite=100&cursor=' + conteudo['proximo']
+    if len(amostra) == 0:
+        raise ValueError('Nenhuma feira livre cadastrada.')
+    return amostra[:tamanho]
+
+
+def converter_feira_json(feira_livre, registro, nome):
+    '''
+    Converte uma feira livre de GET /feiras no json de POST/PUT /feira, \
+    com outro registro e nome.
+
+    Parâmetros
+    ==========
+    feira_livre [Dict] -- feira livre da amostra.
+    registro [str] -- registro.
+    nome [str] -- nome.
+
+    Retorno
+    =======
+    Dict -- json da feira livre.
+    '''
+    endereco = feira_livre.get('endereco')
+    return {'identificador': feira_livre.get('identificador'),
+            'latitude': obter(endereco, 'latitude'),
+            'longitude': obter(endereco, 'longitude'),
+            'setor_censitario': obter(endereco, 'setor_censitario'),
+            'area_ponderacao': obter(endereco, 'area_ponderacao'),
+            'cod_distrito': obter(endereco, 'bairro', 'distrito', 'codigo'),
+            'distrito': obter(endereco, 'bairro', 'distrito', 'nome'),
+            'cod_subpref': obter(endereco, 'bairro', 'distrito',
+                                 'subprefeitura', 'codigo'),
+            'subprefeitura': obter(endereco, 'bairro', 'distrito',
+                                   'subprefeitura', 'nome'),
+            'regiao5': obter(endereco, 'regiao5', 'nome'),
+            'regiao8': obter(endereco, 'regiao8', 'nome'),
+            'nome': nome,
+            'registro': registro,
+            'logradouro': obter(endereco, 'logradouro', 'nome'),
+            'numero': obter(endereco, 'numero'),
+            'bairro': obter(endereco, 'bairro', 'nome'),
+            'referencia': obter(endereco, 'referencia')}
+
+
+class Trabalhador:
+    '''
+    Executa uma sequência de operações sorteadas conforme o mix.
+    As escritas usam feiras livres criadas pelo próprio trabalhador: \
+    alterar e remover sem feiras criadas executam adicionar.
+
+    Atributos
+    ==========
+    indice [int] -- índice do trabalhador.
+    cliente [ClienteTeste|ClienteHttp] -- cliente.
+    amostra [List(Dict)] -- feiras livres base dos filtros e endereços.
+    pesos [Dict] -- peso de cada operação.
+    combinacoes [List(Tuple(str))] -- combinações de filtros de buscar.
+    aleatorio [Random] -- gerador de números aleatórios.
+    histogramas [Dict] -- histograma de cada endpoint.
+    criadas [List(Dict)] -- feiras livres criadas e ainda não removidas.
+    '''
+    def __init__(self, indice, cliente, amostra, pesos, combinacoes,
+                 semente=0):
+        '''
+        Construtor.
+
+        Parâmetros
+        ==========
+        indice [int] -- índice do trabalhador.
+        cliente [ClienteTeste|ClienteHttp] -- cliente.
+        amostra [List(Dict)] -- feiras livres base dos filtros e endereços.
+        pesos [Dict] -- peso de cada operação.
+        combinacoes [List(Tuple(str))] -- combinações de filtros.
+        semente [int] -- semente do gerador de números aleatórios. \
+        (default=0)
+        '''
+        self.indice = indice
+        self.cliente = cliente
+        self.amostra = amostra
+        self.operacoes = list(pesos)
+        self.pesos = [pesos[i] for i in self.operacoes]
+        self.combinacoes = combinacoes
+        self.aleatorio = random.Random(semente * 1000 + indice)
+        self.histogramas = dict()
+        self.criadas = list()
+        self.sequencia = 0
+
+    def executar(self, requisicoes):
+        '''
+        Executa as requisições.
+
+        Parâmetros
+        ==========
+        requisicoes [int] -- quantidade de requisições.
+        '''
+        for _ in range(requisicoes):
+            operacao = self.aleatorio.choices(self.operacoes, self.pesos)[0]
+            if operacao in ('alterar', 'remover') and \
+                    len(self.criadas) == 0:
+                operacao = 'adicionar'
+            getattr(self, operacao)()
+
+    def medir(self, nome, metodo, caminho, corpo=None):
+        '''
+        Envia a requisição e registra sua latência no histograma.
+
+        Parâmetros
+        ==========
+        nome [str] -- nome do endpoint no relatório.
+        metodo [str] -- método HTTP.
+        caminho [str] -- caminho e query string.
+        corpo [Dict] -- json do corpo da requisição ou None. \
+        (default=None)
+
+        Retorno
+        =======
+        int -- status da resposta ou None se não houve resposta.
+        '''
+        status = None
+        inicio = time.perf_counter()
+        try:
+            status, _ = self.cliente.requisitar(metodo, caminho, corpo)
+        except Exception:
+            pass
+        latencia = time.perf_counter() - inicio
+        self.histogramas.setdefault(nome, Histograma()).registrar(latencia,
+                                                                  status)
+        return status
+
+    def buscar(self):
+        ''' GET /feiras com uma combinação de filtros sorteada. '''
+        filtros = self.aleatorio.choice(self.combinacoes)
+        feira_livre = self.aleatorio.choice(self.amostra)
+        endereco = feira_livre.get('endereco')
+        parametros = [('limite', 100)]
+        valores = {'regiao5': obter(endereco, 'regiao5', 'nome'),
+                   'distrito': obter(endereco, 'bairro', 'distrito', 'nome'),
+                   'bairro': obter(endereco, 'bairro', 'nome'),
+                   'nome': (feira_livre.get('nome') or '').split(' ')[0]}
+        for filtro in filtros:
+            if filtro != 'area':
+                parametros.append((filtro, valores[filtro] or ''))
+            elif obter(endereco, 'latitude') is not None and \
+                    obter(endereco, 'longitude') is not None:
+                parametros.extend([
+                    ('min_lat', endereco['latitude'] - 0.01),
+                    ('max_lat', endereco['latitude'] + 0.01),
+                    ('min_lon', endereco['longitude'] - 0.01),
+                    ('max_lon', endereco['longitude'] + 0.01)])
+        self.medir(nomear_combinacao(filtros), 'GET',
+                   '/feiras?' + urllib.parse.urlencode(parametros))
+
+    def proximas(self):
+        ''' GET /feiras/proximas de uma feira livre sorteada. '''
+        endereco = self.aleatorio.choice(self.amostra).get('endereco')
+        latitude = obter(endereco, 'latitude') or -23.55
+        longitude = obter(endereco, 'longitude') or -46.63
+        self.medir('GET /feiras/proximas', 'GET',
+                   '/feiras/proximas?lat={0}&lon={1}&limite=10'
+                   .format(latitude, longitude))
+
+    def adicionar(self):
+        ''' POST /feira de uma nova feira livre. '''
+        self.sequencia += 1
+        registro = 'CARGA{0}-{1}'.format(self.indice, self.sequencia)
+        json = converter_feira_json(self.aleatorio.choice(self.amostra),
+                                    registro, 'FEIRA ' + registro)
+        if self.medir('POST /feira', 'POST', '/feira', json) == 200:
+            self.criadas.append(json)
+
+    def alterar(self):
+        ''' PUT /feira de uma feira livre criada pelo trabalhador. '''
+        json = self.aleatorio.choice(self.criadas)
+        json['nome'] = '{0} {1}'.format(json['registro'],
+                                        self.aleatorio.randint(1, 1000))
+        self.medir('PUT /feira', 'PUT', '/feira', json)
+
+    def remover(self):
+        ''' DELETE /feira de uma feira livre criada pelo trabalhador. '''
+        json = self.criadas.pop(self.aleatorio.randrange(len(self.criadas)))
+        self.medir('DELETE /feira', 'DELETE',
+                   '/feira?registro=' + urllib.parse.quote(json['registro']))
+
+    def limpar(self):
+        ''' Remove, sem medir, as feiras livres criadas pelo trabalhador. '''
+        for json in self.criadas:
+            self.cliente.requisitar('DELETE', '/feira?registro=' +
+                                    urllib.parse.quote(json['registro']))
+        self.criadas = list()
+
+
+def executar(criar_cliente, requisicoes, concorrencia=1, mix=MIX_PADRAO,
+             combinacoes=None, semente=0, amostra=1000, limpar=True):
+    '''
+    Executa o teste de carga: cada trabalhador, em sua thread, envia \
+    sua parte das requisições.
+
+    Parâmetros
+    ==========
+    criar_cliente [Callable] -- cria o cliente de cada trabalhador.
+    requisicoes [int] -- quantidade total de requisições.
+    concorrencia [int] -- quantidade de trabalhadores simultâneos. \
+    (default=1)
+    mix [str] -- pesos das operações. (default=MIX_PADRAO)
+    combinacoes [List(str)] -- combinações de filtros de GET /feiras ou \
+    None para todas. (default=None)
+    semente [int] -- semente do gerador de números aleatórios. (default=0)
+    amostra [int] -- quantidade de feiras livres base dos filtros e \
+    endereços. (default=1000)
+    limpar [bool] -- remove, ao final, as feiras livres criadas. \
+    (default=True)
+
+    Retorno
+    =======
+    Dict -- parâmetros, duração, vazão total e resumo de cada endpoint.
+
+    Exceções/Erros
+    ==============
+    ValueError -- se o mix ou as combinações são inválidos ou não há \
+    feiras livres cadastradas.
+    '''
+    pesos = interpretar_mix(mix)
+    filtros = listar_combinacoes(combinacoes)
+    feiras_livres = carregar_amostra(criar_cliente(), amostra)
+    trabalhadores = [Trabalhador(i, criar_cliente(), feiras_livres, pesos,
+                                 filtros, semente)
+                     for i in range(concorrencia)]
+    threads = [threading.Thread(target=t.executar,
+                                args=(requisicoes // concorrencia +
+                                      (1 if i < requisicoes % concorrencia
+                                       else 0),))
+               for i, t in enumerate(trabalhadores)]
+    inicio = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duracao = time.perf_counter() - inicio
+    if limpar:
+        for trabalhador in trabalhadores:
+            trabalhador.limpar()
+    histogramas = dict()
+    for trabalhador in trabalhadores:
+        for nome, histograma in trabalhador.histogramas.items():
+            histogramas.setdefault(nome, Histograma()).combinar(histograma)
+    total = sum(len(i.latencias) for i in histogramas.values())
+    return {'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'parametros': {'requisicoes': requisicoes,
+                           'concorrencia': concorrencia,
+                           'mix': pesos, 'semente': semente,
+                           'amostra': len(feiras_livres)},
+            'duracao_segundos': round(duracao, 3),
+            'requisicoes_por_segundo': round(total / duracao, 1),
+            'endpoints': {nome: histogramas[nome].resumir(duracao)
+                          for nome in sorted(histogramas)}}
+
+
+def imprimir(resultado):
+    '''
+    Imprime o resumo de cada endpoint do teste de carga.
+
+    Parâmetros
+    ==========
+    resultado [Dict] -- resultado de executar.
+    '''
+    print('{0:<50} {1:>7} {2:>6} {3:>8} {4:>9} {5:>9} {6:>9}'
+          .format('endpoint', 'req', 'erros', 'req/s', 'p50 ms', 'p90 ms',
+                  'p99 ms'))
+    for nome, resumo in resultado['endpoints'].items():
+        print('{0:<50} {1:>7} {2:>6} {3:>8} {4:>9} {5:>9} {6:>9}'
+              .format(nome, resumo['requisicoes'], resumo['erros'],
+                      resumo['requisicoes_por_segundo'], resumo['p50_ms'],
+                      resumo['p90_ms'], resumo['p99_ms']))
+    print('Total: {0} req/s em {1} s'
+          .format(resultado['requisicoes_por_segundo'],
+                  resultado['duracao_segundos']))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Executa um teste de carga '
+                                                 'nos endpoints.')
+    parser.add_argument('--url', default=None, type=str,
+                        help='Url de um servidor em execução; se omitida, '
+                             'usa o cliente de teste do Flask')
+    parser.add_argument('--servidor', action='store_true',
+                        help='Sobe um servidor WSGI local para o teste')
+    parser.add_argument('--requisicoes', default=1000, type=int,
+                        help='Quantidade total de requisições')
+    parser.add_argument('--concorrencia', default=4, type=int,
+                        help='Quantidade de requisições simultâneas')
+    parser.add_argument('--mix', default=MIX_PADRAO, type=str,
+                        help='Pesos das operações {0}'
+                             .format(', '.join(OPERACOES)))
+    parser.add_argument('--combinacoes', nargs='+', default=None,
+                        help='Combinações de filtros de GET /feiras, ex.: '
+                             'bairro distrito+nome (padrão: todas)')
+    parser.add_argument('--semente', default=0, type=int,
+                        help='Semente do gerador de números aleatórios')
+    parser.add_argument('--amostra', default=1000, type=int,
+                        help='Quantidade de feiras livres base dos filtros')
+    parser.add_argument('--saida', default=None, type=str,
+                        help='Arquivo json do resultado')
+    args = parser.parse_args()
+
+    servidor = None
+    if args.url is not None:
+        def criar_cliente():
+            return ClienteHttp(args.url)
+    else:
+        from app import app
+        if args.servidor:
+            from werkzeug.serving import make_server
+            servidor = make_server('127.0.0.1', 0, app, threaded=True)
+            threading.Thread(target=servidor.serve_forever,
+                             daemon=True).start()
+            url = 'http://127.0.0.1:{0}'.format(servidor.server_port)
+
+            def criar_cliente():
+                return ClienteHttp(url)
+        else:
+            def criar_cliente():
+                return ClienteTeste(app)
+    try:
+        resultado = executar(criar_cliente, args.requisicoes,
+                             args.concorrencia, args.mix, args.combinacoes,
+                             args.semente, args.amostra)
+    except ValueError as erro:
+        print(erro)
+        sys.exit(1)
+    finally:
+        if servidor is not None:
+            servidor.shutdown()
+    imprimir(resultado)
+    if args.saida is not None:
+        with open(args.saida, 'w') as arquivo:
+            json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+        print('Resultado gravado em {0}'.format(args.saida))
@@ -7,11 +7,49 @@ class Config(object):
     TESTING = False
     SQLALCHEMY_DATABASE_URI = 'sqlite://:memory:'
     SQLALCHEMY_TRACK_MODIFICATIONS = True
+    BUSCA_STREAMING = False
+    BUSCA_TAMANHO_LOTE = 100
+    BUSCA_LIMITE_PADRAO = None
+    BUSCA_LIMITE_MAXIMO = 100
+    BUSCA_NOME_INDEXADA = True
+    CACHE_DIMENSOES_TAMANHO = 1024
+    CACHE_FRAGMENTOS_TAMANHO = 20000
+    CACHE_FRAGMENTOS_TTL = 60
+    CACHE_RESPOSTAS_TAMANHO = 256
+    CACHE_RESPOSTAS_TTL = 60
+    COMPRESSAO = True
+    COMPRESSAO_TAMANHO_MINIMO = 1024
+    COMPRESSAO_CODIFICACOES = ('br', 'zstd', 'gzip')
+    COMPRESSAO_CACHE_TAMANHO = 256
+    INDICE_ESPACIAL_CELULA = 0.01
+    INDICE_ESPACIAL_TTL = 60
+    INSERCAO_OTIMISTA = True
+    INSTRUMENTACAO_SQL = True
+    JSON_CODIFICADOR = 'auto'
+    LOTE_TAMANHO_MAXIMO = 5000
+    LOG_ARQUIVO = 'log.txt'
+    LOG_TAMANHO_MAXIMO = 10 * 1024 * 1024
+    LOG_QUANTIDADE_ARQUIVOS = 5
+    LOG_AMOSTRAGEM_CORPO = 0.0
+    METRICAS = True
+    METRICAS_DIRETORIO = None
+    METRICAS_INTERVALO_GRAVACAO = 5
+    SQL_LENTO_LIMITE_MS = 100
+    SQLITE_PRAGMAS = None
 
 
 class ProductionConfig(Config):
     ''' Configuração para ambiente de produção '''
     SQLALCHEMY_DATABASE_URI = 'sqlite:///feiraslivresapi.db'
+    SQLALCHEMY_ENGINE_OPTIONS = {'pool_size': 10,
+                                 'max_overflow': 10,
+                                 'pool_timeout': 10}
+    SQLITE_PRAGMAS = {'journal_mode': 'WAL',
+                      'synchronous': 'NORMAL',
+                      'cache_size': -64000,
+                      'mmap_size': 256 * 1024 * 1024,
+                      'busy_timeout': 5000,
+                      'temp_store': 'MEMORY'}
 
 
 class TestingConfig(Config):
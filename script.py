@@ -4,6 +4,9 @@ import argparse
 import csv
 from app import app
 from src.basedados import bd
+from src.importacao import ImportadorLote, SincronizadorCsv
+from src.importacao import converter_localizacao
+from src.paralelo import ImportadorParalelo
 from src.modelos import buscar_ou_criar
 from src.modelos import FeiraLivre, Endereco, Logradouro, Bairro
 from src.modelos import Regiao8, Regiao5, Distrito, Subprefeitura
@@ -19,6 +22,7 @@ def criar_entidades(caminho_arquivo_csv):
     arquivo = open(caminho_arquivo_csv, 'r')
     leitor = csv.DictReader(arquivo, delimiter=',')
     for linha in leitor:
+        latitude, longitude = converter_localizacao(linha)
         subprefeitura = buscar_ou_criar(bd.session, Subprefeitura,
                                         codigo=linha['CODSUBPREF'],
                                         nome=linha['SUBPREFE'])
@@ -42,8 +46,8 @@ def criar_entidades(caminho_arquivo_csv):
                                    bairro=bairro,
                                    regiao5=regiao5,
                                    regiao8=regiao8,
-                                   latitude=linha['LAT'],
-                                   longitude=linha['LONG'],
+                                   latitude=latitude,
+                                   longitude=longitude,
                                    setor_censitario=linha['SETCENS'],
                                    area_ponderacao=linha['AREAP'])
         feira_livre = buscar_ou_criar(bd.session, FeiraLivre,
@@ -54,13 +58,68 @@ def criar_entidades(caminho_arquivo_csv):
         bd.session.commit()
 
 
-def importar(arquivo_csv, conf):
+def criar_entidades_lote(caminho_arquivo_csv):
+    ''' Cria as entidades a partir dos dados do arquivo csv resolvendo \
+    as entidades em memória e gravando cada tabela em lote, em uma única \
+    transação.
+
+    Parâmetros
+    ==========
+    caminho_arquivo_csv [str] -- caminho para o arquivo csv
+    '''
+    importador = ImportadorLote(bd.session)
+    with open(caminho_arquivo_csv, 'r') as arquivo:
+        leitor = csv.DictReader(arquivo, delimiter=',')
+        for linha in leitor:
+            importador.adicionar(linha)
+    importador.gravar()
+
+
+def criar_entidades_paralelo(caminho_arquivo_csv, processos=None):
+    ''' Cria as entidades a partir dos dados do arquivo csv interpretando \
+    e normalizando blocos de linhas em um pool de processos, enquanto um \
+    único escritor resolve e grava as entidades, em uma única transação.
+
+    Parâmetros
+    ==========
+    caminho_arquivo_csv [str] -- caminho para o arquivo csv
+    processos [int] -- quantidade de processos ou None para a quantidade \
+    de processadores. (default=None)
+    '''
+    ImportadorParalelo(bd.session, processos).importar(caminho_arquivo_csv)
+
+
+def sincronizar(caminho_arquivo_csv):
+    ''' Sincroniza a base de dados com o arquivo csv de forma incremental, \
+    aplicando apenas as inclusões, alterações e remoções de feiras livres, \
+    em uma única transação, e imprime o resumo das diferenças.
+
+    Parâmetros
+    ==========
+    caminho_arquivo_csv [str] -- caminho para o arquivo csv
+    '''
+    sincronizador = SincronizadorCsv(bd.session)
+    with open(caminho_arquivo_csv, 'r') as arquivo:
+        leitor = csv.DictReader(arquivo, delimiter=',')
+        resumo = sincronizador.sincronizar(leitor)
+    print('Criadas: {criada}, alteradas: {alterada}, removidas: {removida}, '
+          'inalteradas: {inalterada}, erros: {erro}'.format(**resumo))
+    for erro in sincronizador.erros:
+        print(erro)
+
+
+def importar(arquivo_csv, conf, modo='linha', processos=None):
     ''' Cria a base de dados e importa os dados do arquivo csv
 
     Parâmetros
     ==========
-    csv [str] -- caminho para o arquivo csv.
-    arquivo_csv [str] -- tipo de configuração.
+    arquivo_csv [str] -- caminho para o arquivo csv.
+    conf [str] -- tipo de configuração.
+    modo [str] -- modo de importação: 'linha', 'lote', 'paralelo' ou \
+    'sincronizar'. No modo 'sincronizar', a base de dados não é recriada. \
+    (default='linha')
+    processos [int] -- quantidade de processos do modo 'paralelo' ou None \
+    para a quantidade de processadores. (default=None)
     '''
     if conf == 'prod':
         app.config.from_object('config.ProductionConfig')
@@ -68,9 +127,17 @@ def importar(arquivo_csv, conf):
         app.config.from_object('config.TestingConfig')
     contexto = app.app_context()
     contexto.push()
-    bd.drop_all()
+    if modo != 'sincronizar':
+        bd.drop_all()
     bd.create_all()
-    criar_entidades(arquivo_csv)
+    if modo == 'sincronizar':
+        sincronizar(arquivo_csv)
+    elif modo == 'lote':
+        criar_entidades_lote(arquivo_csv)
+    elif modo == 'paralelo':
+        criar_entidades_paralelo(arquivo_csv, processos)
+    else:
+        criar_entidades(arquivo_csv)
     bd.session.remove()
     contexto.pop()
 
@@ -84,6 +151,11 @@ if __name__ == '__main__':
     parser.add_argument('--conf', default='prod', type=str,
                         choices=['prod', 'test'],
                         help='Tipo de configuração')
+    parser.add_argument('--modo', default='linha', type=str,
+                        choices=['linha', 'lote', 'paralelo', 'sincronizar'],
+                        help='Modo de importação')
+    parser.add_argument('--processos', default=None, type=int,
+                        help='Quantidade de processos do modo paralelo')
     args = parser.parse_args()
 
-    importar(args.csv, args.conf)
+    importar(args.csv, args.conf, args.modo, args.processos)
@@ -1,4 +1,94 @@
 ''' Módulo responsável por manter a base de dados. '''
 
+import sqlite3
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 bd = SQLAlchemy()
+
+
+@event.listens_for(Engine, 'connect')
+def desativar_transacao_implicita(conexao_dbapi, registro_conexao):
+    '''
+    Impede que o driver do SQLite inicie e finalize transações por conta \
+    própria, o que faz com que SAVEPOINTs (Session.begin_nested) não \
+    funcionem corretamente.
+    As transações passam a ser iniciadas em iniciar_transacao.
+
+    Parâmetros
+    ==========
+    conexao_dbapi -- conexão do driver.
+    registro_conexao -- registro da conexão no pool.
+    '''
+    if isinstance(conexao_dbapi, sqlite3.Connection):
+        conexao_dbapi.isolation_level = None
+
+
+@event.listens_for(Engine, 'begin')
+def iniciar_transacao(conexao):
+    '''
+    Inicia explicitamente a transação nas conexões com o SQLite.
+    Conexões marcadas por iniciar_transacao_escrita reservam a escrita \
+    desde o início (BEGIN IMMEDIATE).
+
+    Parâmetros
+    ==========
+    conexao [Connection] -- conexão.
+    '''
+    if conexao.dialect.name == 'sqlite':
+        if conexao.get_execution_options().get('transacao_escrita'):
+            conexao.exec_driver_sql('BEGIN IMMEDIATE')
+        else:
+            conexao.exec_driver_sql('BEGIN')
+
+
+def iniciar_transacao_escrita(sessao):
+    '''
+    Inicia a transação da sessão reservando a escrita na base de dados.
+    No SQLite com WAL, uma transação que começa lendo e depois escreve \
+    falha imediatamente (database is locked) se outra conexão gravou \
+    nesse intervalo; reservando a escrita no início, a transação aguarda \
+    a vez por até busy_timeout, enquanto as leituras seguem livres.
+    Nada é feito se a sessão já está em uma transação.
+
+    Parâmetros
+    ==========
+    sessao [Session] -- sessão.
+    '''
+    if not sessao.in_transaction():
+        sessao.connection(execution_options={'transacao_escrita': True})
+
+
+def aplicar_pragmas(conexao_dbapi, pragmas):
+    '''
+    Aplica os PRAGMAs na conexão com o SQLite.
+
+    Parâmetros
+    ==========
+    conexao_dbapi -- conexão do driver.
+    pragmas [Dict] -- valor de cada PRAGMA, indexado pelo nome.
+    '''
+    cursor = conexao_dbapi.cursor()
+    for nome, valor in pragmas.items():
+        cursor.execute('PRAGMA {0}={1}'.format(nome, valor))
+    cursor.close()
+
+
+def configurar_sqlite(app):
+    '''
+    Configura a base de dados SQLite da aplicação para aplicar \
+    SQLITE_PRAGMAS em cada nova conexão do pool.
+    Nada é configurado para outras bases de dados.
+
+    Parâmetros
+    ==========
+    app [Flask] -- aplicação, já registrada em bd.
+    '''
+    pragmas = app.config.get('SQLITE_PRAGMAS')
+    with app.app_context():
+        motor = bd.engine
+    if not pragmas or motor.dialect.name != 'sqlite':
+        return
+    event.listen(motor, 'connect',
+                 lambda conexao_dbapi, registro_conexao:
+                 aplicar_pragmas(conexao_dbapi, pragmas))
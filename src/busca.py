@@ -0,0 +1,159 @@
+''' Módulo responsável pelo índice de busca por nome das feiras livres. '''
+
+import re
+from sqlalchemy import DDL, event, select, table, column
+from src.basedados import bd
+from src.modelos import FeiraLivre
+
+INDICE_NOME = 'FeiraLivreBusca'
+
+INSTRUCAO_TABELA_INDICE_NOME = (
+    'CREATE VIRTUAL TABLE IF NOT EXISTS "FeiraLivreBusca" USING fts5('
+    'nome, content="FeiraLivre", content_rowid="id", '
+    'tokenize="unicode61 remove_diacritics 2")')
+
+INSTRUCOES_GATILHOS_INDICE_NOME = (
+    'CREATE TRIGGER IF NOT EXISTS "FeiraLivreBusca_insercao" '
+    'AFTER INSERT ON "FeiraLivre" BEGIN '
+    'INSERT INTO "FeiraLivreBusca"(rowid, nome) VALUES (new.id, new.nome); '
+    'END',
+    'CREATE TRIGGER IF NOT EXISTS "FeiraLivreBusca_remocao" '
+    'AFTER DELETE ON "FeiraLivre" BEGIN '
+    'INSERT INTO "FeiraLivreBusca"("FeiraLivreBusca", rowid, nome) '
+    'VALUES (\'delete\', old.id, old.nome); '
+    'END',
+    'CREATE TRIGGER IF NOT EXISTS "FeiraLivreBusca_alteracao" '
+    'AFTER UPDATE OF nome ON "FeiraLivre" BEGIN '
+    'INSERT INTO "FeiraLivreBusca"("FeiraLivreBusca", rowid, nome) '
+    'VALUES (\'delete\', old.id, old.nome); '
+    'INSERT INTO "FeiraLivreBusca"(rowid, nome) VALUES (new.id, new.nome); '
+    'END')
+
+INSTRUCAO_RECONSTRUIR_INDICE_NOME = (
+    'INSERT INTO "FeiraLivreBusca"("FeiraLivreBusca") VALUES (\'rebuild\')')
+
+indice_nome = table(INDICE_NOME, column('rowid'), column('nome'))
+
+
+def existe_tabela(conexao, nome):
+    '''
+    Verifica se a tabela (inclusive virtual) existe na base de dados SQLite.
+
+    Parâmetros
+    ==========
+    conexao [Connection] -- conexão com a base de dados.
+    nome [str] -- nome da tabela.
+
+    Retorno
+    =======
+    bool -- True se a tabela existe.
+    '''
+    return conexao.exec_driver_sql(
+        'SELECT 1 FROM sqlite_master WHERE type = \'table\' AND name = ?',
+        (nome,)).first() is not None
+
+
+def criar_indice_nome(conexao):
+    '''
+    Cria, caso não existam, o índice de texto completo (FTS5) dos nomes \
+    das feiras livres e os gatilhos que o mantêm sincronizado com a \
+    tabela FeiraLivre. O índice é reconstruído a partir das feiras livres \
+    já cadastradas apenas quando é criado, de forma que a função pode \
+    ser chamada a cada inicialização.
+    Disponível apenas para o SQLite; nada é feito se a tabela FeiraLivre \
+    não existe.
+
+    Parâmetros
+    ==========
+    conexao [Connection] -- conexão com a base de dados.
+    '''
+    if conexao.dialect.name != 'sqlite' or \
+            not existe_tabela(conexao, FeiraLivre.__tablename__):
+        return
+    novo = not existe_tabela(conexao, INDICE_NOME)
+    conexao.exec_driver_sql(INSTRUCAO_TABELA_INDICE_NOME)
+    for instrucao in INSTRUCOES_GATILHOS_INDICE_NOME:
+        conexao.exec_driver_sql(instrucao)
+    if novo:
+        conexao.exec_driver_sql(INSTRUCAO_RECONSTRUIR_INDICE_NOME)
+
+
+@event.listens_for(FeiraLivre.metadata, 'after_create')
+def criar_indice_nome_apos_criar_tabelas(metadados, conexao, **kwargs):
+    '''
+    Cria o índice de busca por nome a cada create_all, inclusive quando \
+    a tabela FeiraLivre já existia (bases de dados anteriores ao índice).
+
+    Parâmetros
+    ==========
+    metadados [MetaData] -- metadados das tabelas.
+    conexao [Connection] -- conexão com a base de dados.
+    '''
+    criar_indice_nome(conexao)
+
+
+def configurar_indice_nome(app):
+    '''
+    Cria, na inicialização da aplicação, o índice de busca por nome nas \
+    bases de dados criadas antes dele, caso BUSCA_NOME_INDEXADA seja True.
+
+    Parâmetros
+    ==========
+    app [Flask] -- aplicação, já registrada em bd.
+    '''
+    if not app.config.get('BUSCA_NOME_INDEXADA', True):
+        return
+    with app.app_context():
+        with bd.engine.begin() as conexao:
+            criar_indice_nome(conexao)
+
+
+event.listen(FeiraLivre.__table__, 'before_drop',
+             DDL('DROP TABLE IF EXISTS "FeiraLivreBusca"')
+             .execute_if(dialect='sqlite'))
+
+
+def criar_termos_busca(nome):
+    '''
+    Converte o nome buscado em uma consulta FTS5 em que cada palavra \
+    deve ser o prefixo de uma palavra do nome da feira livre.
+
+    Parâmetros
+    ==========
+    nome [str] -- nome buscado.
+
+    Retorno
+    =======
+    str -- consulta FTS5 ou None se o nome não contém palavras.
+    '''
+    palavras = re.findall(r'\w+', nome)
+    if len(palavras) == 0:
+        return None
+    return ' '.join('"{0}"*'.format(palavra) for palavra in palavras)
+
+
+def criar_filtro_nome(nome, indexado=True):
+    '''
+    Cria o filtro da busca de feiras livres por nome.
+    Se indexado, utiliza o índice FTS5, em que a busca ignora acentos e \
+    maiúsculas e cada palavra buscada é prefixo de uma palavra do nome; \
+    caso contrário, busca o nome como parte do nome da feira livre (LIKE).
+
+    Parâmetros
+    ==========
+    nome [str] -- nome buscado.
+    indexado [bool] -- informa se o índice FTS5 deve ser utilizado. \
+    (default=True)
+
+    Retorno
+    =======
+    ColumnElement -- filtro a ser aplicado à consulta ou None se todas as \
+    feiras livres satisfazem o filtro.
+    '''
+    if not indexado:
+        return FeiraLivre.nome.like('%' + nome + '%')
+    termos = criar_termos_busca(nome)
+    if termos is None:
+        return None
+    return FeiraLivre.id.in_(select(indice_nome.c.rowid)
+                             .where(indice_nome.c.nome.match(termos)))
@@ -0,0 +1,534 @@
+''' Módulo responsável por manter os caches da aplicação. '''
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from src.modelos import Modelo, buscar_ou_criar
+
+
+class CacheDimensoes:
+    '''
+    Cache em memória, compartilhado pelo processo, dos ids das entidades \
+    de dimensão (subprefeitura, distrito, regiões, bairro e logradouro) \
+    indexados pela chave natural de cada modelo.
+    Ao atingir o tamanho máximo, descarta a entrada menos usada (LRU).
+    Entradas criadas durante uma transação só são adicionadas ao cache \
+    após o commit; em caso de rollback, são descartadas.
+
+    Atributos
+    ==========
+    tamanho [int] -- quantidade máxima de entradas. 0 desativa o cache.
+    entradas [OrderedDict] -- entradas do cache, da menos para a mais usada.
+    trava [Lock] -- trava que protege as entradas.
+    acertos [int] -- quantidade de buscas encontradas no cache.
+    falhas [int] -- quantidade de buscas não encontradas no cache.
+    '''
+
+    def __init__(self, tamanho=1024):
+        '''
+        Construtor.
+
+        Parâmetros
+        ==========
+        tamanho [int] -- quantidade máxima de entradas. (default=1024)
+        '''
+        self.tamanho = tamanho
+        self.entradas = OrderedDict()
+        self.trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        event.listen(Session, 'after_commit', self.confirmar)
+        event.listen(Session, 'after_transaction_end', self.descartar)
+        event.listen(Modelo.metadata, 'after_drop', self.limpar)
+
+    def init_app(self, app):
+        '''
+        Configura o cache a partir da configuração da aplicação.
+
+        Parâmetros
+        ==========
+        app [Flask] -- aplicação.
+        '''
+        self.tamanho = app.config.get('CACHE_DIMENSOES_TAMANHO', self.tamanho)
+        self.limpar()
+
+    @staticmethod
+    def criar_chave(modelo, kwargs):
+        '''
+        Cria a chave da entrada a partir da chave natural do modelo, isto é, \
+        as colunas de seu primeiro índice de chave única.
+
+        Parâmetros
+        ==========
+        modelo [Modelo] -- modelo.
+        kwargs [Dict] -- informações da entidade.
+
+        Retorno
+        =======
+        Tuple -- chave da entrada.
+        '''
+        indice = modelo.recuperar_indices_chave_unica()[0]
+        return (modelo.__name__,) + tuple(kwargs.get(c) for c in indice)
+
+    def buscar_ou_criar(self, sessao, modelo, **kwargs):
+        '''
+        Recupera o id de um elemento dadas suas informações.
+        Caso não esteja no cache, utiliza buscar_ou_criar.
+
+        Parâmetros
+        ==========
+        sessao [Session] -- sessão.
+        modelo [Modelo] -- modelo.
+        kwargs -- informações pelas qual a entidade será \
+        procurada ou criada.
+
+        Retorno
+        =======
+        int -- id do elemento encontrado ou criado.
+
+        Exceções/Erros
+        ==============
+        ViolacaoIndiceUnico
+        '''
+        chave = self.criar_chave(modelo, kwargs)
+        with self.trava:
+            entrada = self.entradas.get(chave)
+            if entrada is not None and entrada[1] == kwargs:
+                self.entradas.move_to_end(chave)
+                self.acertos += 1
+                return entrada[0]
+            self.falhas += 1
+        instancia = buscar_ou_criar(sessao, modelo, **kwargs)
+        if self.tamanho > 0:
+            sessao.info.setdefault(self, list()) \
+                       .append((chave, (instancia.id, kwargs)))
+        return instancia.id
+
+    def confirmar(self, sessao):
+        '''
+        Adiciona ao cache as entradas pendentes da sessão após o commit.
+
+        Parâmetros
+        ==========
+        sessao [Session] -- sessão.
+        '''
+        pendentes = sessao.info.pop(self, None)
+        if not pendentes:
+            return
+        with self.trava:
+            for chave, entrada in pendentes:
+                self.entradas[chave] = entrada
+                self.entradas.move_to_end(chave)
+            while len(self.entradas) > self.tamanho:
+                self.entradas.popitem(last=False)
+
+    def descartar(self, sessao, transacao):
+        '''
+        Descarta as entradas pendentes da sessão quando a transação \
+        termina sem commit (rollback ou fechamento da sessão).
+
+        Parâmetros
+        ==========
+        sessao [Session] -- sessão.
+        transacao [SessionTransaction] -- transação encerrada.
+        '''
+        if transacao.parent is None:
+            sessao.info.pop(self, None)
+
+    def limpar(self, *args, **kwargs):
+        ''' Remove todas as entradas do cache. '''
+        with self.trava:
+            self.entradas.clear()
+
+
+class CacheRespostas:
+    '''
+    Cache em memória, compartilhado pelo processo, das respostas \
+    serializadas da busca de feiras livres, indexadas pelos filtros \
+    normalizados da busca.
+    Ao atingir o tamanho máximo, descarta a entrada menos usada (LRU); \
+    entradas expiram após ttl segundos.
+    Todo commit que altera entidades da base de dados incrementa a \
+    geração do cache, invalidando todas as entradas existentes.
+    A invalidação alcança apenas o processo que fez o commit: com vários \
+    processos, os demais continuam respondendo com as respostas (e ETags) \
+    anteriores até que expirem, após ttl segundos.
+
+    Atributos
+    ==========
+    tamanho [int] -- quantidade máxima de entradas. 0 desativa o cache.
+    ttl [float] -- tempo de vida das entradas, em segundos.
+    geracao [int] -- geração atual do cache.
+    entradas [OrderedDict] -- entradas do cache, da menos para a mais usada.
+    trava [Lock] -- trava que protege as entradas.
+    acertos [int] -- quantidade de buscas encontradas no cache.
+    falhas [int] -- quantidade de buscas não encontradas no cache.
+    '''
+    def __init__(self, tamanho=256, ttl=60):
+        '''
+        Construtor.
+
+        Parâmetros
+        ==========
+        tamanho [int] -- quantidade máxima de entradas. (default=256)
+        ttl [float] -- tempo de vida das entradas, em segundos. (default=60)
+        '''
+        self.tamanho = tamanho
+        self.ttl = ttl
+        self.geracao = 0
+        self.entradas = OrderedDict()
+        self.trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        event.listen(Session, 'after_flush', self.marcar_alteracao)
+        event.listen(Session, 'after_commit', self.confirmar)
+        event.listen(Session, 'after_transaction_end', self.descartar)
+        event.listen(Modelo.metadata, 'after_drop', self.invalidar)
+
+    def init_app(self, app):
+        '''
+        Configura o cache a partir da configuração da aplicação.
+
+        Parâmetros
+        ==========
+        app [Flask] -- aplicação.
+        '''
+        self.tamanho = app.config.get('CACHE_RESPOSTAS_TAMANHO', self.tamanho)
+        self.ttl = app.config.get('CACHE_RESPOSTAS_TTL', self.ttl)
+        self.invalidar()
+
+    def buscar(self, chave):
+        '''
+        Recupera a resposta armazenada para a chave.
+
+        Parâmetros
+        ==========
+        chave [Tuple] -- filtros normalizados da busca.
+
+        Retorno
+        =======
+        Tuple(bytes, str) -- corpo da resposta e seu ETag ou None se não \
+        existe entrada válida para a chave.
+        '''
+        with self.trava:
+            entrada = self.entradas.get(chave)
+            if entrada is None:
+                self.falhas += 1
+                return None
+            geracao, expira_em, corpo, etag = entrada
+            if geracao != self.geracao or expira_em < time.monotonic():
+                del self.entradas[chave]
+                self.falhas += 1
+                return None
+            self.entradas.move_to_end(chave)
+            self.acertos += 1
+            return corpo, etag
+
+    def armazenar(self, chave, geracao, corpo):
+        '''
+        Armazena a resposta para a chave, caso a geração do cache não \
+        tenha mudado desde que a resposta começou a ser gerada.
+
+        Parâmetros
+        ==========
+        chave [Tuple] -- filtros normalizados da busca.
+        geracao [int] -- geração do cache no início da busca.
+        corpo [bytes] -- corpo da resposta.
+
+        Retorno
+        =======
+        str -- ETag da resposta.
+        '''
+        etag = hashlib.sha1(corpo).hexdigest()
+        with self.trava:
+            if self.tamanho > 0 and geracao == self.geracao:
+                self.entradas[chave] = (geracao, time.monotonic() + self.ttl,
+                                        corpo, etag)
+                self.entradas.move_to_end(chave)
+                while len(self.entradas) > self.tamanho:
+                    self.entradas.popitem(last=False)
+        return etag
+
+    def invalidar(self, *args, **kwargs):
+        ''' Incrementa a geração do cache e remove todas as entradas. '''
+        with self.trava:
+            self.geracao += 1
+            self.entradas.clear()
+
+    def marcar_alteracao(self, sessao, contexto):
+        '''
+        Marca que a transação da sessão alterou entidades.
+
+        Parâmetros
+        ==========
+        sessao [Session] -- sessão.
+        contexto [UOWTransaction] -- unidade de trabalho do flush.
+        '''
+        sessao.info[self] = True
+
+    def confirmar(self, sessao):
+        '''
+        Invalida o cache após o commit de uma transação que alterou \
+        entidades.
+
+        Parâmetros
+        ==========
+        sessao [Session] -- sessão.
+        '''
+        if sessao.info.pop(self, False):
+            self.invalidar()
+
+    def descartar(self, sessao, transacao):
+        '''
+        Descarta a marcação de alteração quando a transação termina sem \
+        commit.
+
+        Parâmetros
+        ==========
+        sessao [Session] -- sessão.
+        transacao [SessionTransaction] -- transação encerrada.
+        '''
+        if transacao.parent is None:
+            sessao.info.pop(self, None)
+
+
+class CacheFragmentos:
+    '''
+    Cache em memória, compartilhado pelo processo, do json serializado \
+    de cada feira livre (FeiraLivre.dict), indexado pelo id da feira livre.
+    Cada entrada registra as entidades das quais o json depende (feira \
+    livre, endereço, logradouro, bairro, distrito, subprefeitura e \
+    regiões); o commit de uma transação que altera ou remove uma dessas \
+    entidades descarta apenas as entradas que dependem dela.
+    A invalidação alcança apenas o processo que fez o commit: com vários \
+    processos, as entradas dos demais expiram após ttl segundos.
+    Ao atingir o tamanho máximo, descarta a entrada menos usada (LRU).
+
+    Atributos
+    ==========
+    tamanho [int] -- quantidade máxima de entradas. 0 desativa o cache.
+    ttl [float] -- tempo de vida das entradas, em segundos.
+    geracao [int] -- geração atual do cache, incrementada a cada \
+    invalidação.
+    entradas [OrderedDict] -- json, dependências e instante de expiração \
+    de cada feira livre, da menos para a mais usada.
+    dependentes [Dict] -- ids das feiras livres que dependem de cada \
+    entidade, indexados por (nome do modelo, id).
+    trava [Lock] -- trava que protege as entradas.
+    acertos [int] -- quantidade de feiras livres encontradas no cache.
+    falhas [int] -- quantidade de feiras livres não encontradas no cache.
+    '''
+    def __init__(self, tamanho=20000, ttl=60):
+        '''
+        Construtor.
+
+        Parâmetros
+        ==========
+        tamanho [int] -- quantidade máxima de entradas. (default=20000)
+        ttl [float] -- tempo de vida das entradas, em segundos. (default=60)
+        '''
+        self.tamanho = tamanho
+        self.ttl = ttl
+        self.geracao = 0
+        self.entradas = OrderedDict()
+        self.dependentes = dict()
+        self.trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        event.listen(Session, 'after_flush', self.marcar_alteracoes)
+        event.listen(Session, 'after_commit', self.confirmar)
+        event.listen(Session, 'after_transaction_end', self.descartar)
+        event.listen(Modelo.metadata, 'after_drop', self.limpar)
+
+    def init_app(self, app):
+        '''
+        Configura o cache a partir da configuração da aplicação.
+
+        Parâmetros
+        ==========
+        app [Flask] -- aplicação.
+        '''
+        self.tamanho = app.config.get('CACHE_FRAGMENTOS_TAMANHO',
+                                      self.tamanho)
+        self.ttl = app.config.get('CACHE_FRAGMENTOS_TTL', self.ttl)
+        self.limpar()
+
+    @staticmethod
+    def listar_dependencias(feira_livre):
+        '''
+        Lista as entidades utilizadas na serialização da feira livre.
+
+        Parâmetros
+        ==========
+        feira_livre [FeiraLivre] -- feira livre carregada com \
+        carregamento_feira_livre.
+
+        Retorno
+        =======
+        List(Tuple(str, int)) -- nome do modelo e id de cada entidade.
+        '''
+        dependencias = [('FeiraLivre', feira_livre.id)]
+        endereco = feira_livre.endereco
+        if endereco is None:
+            return dependencias
+        entidades = [endereco, endereco.logradouro, endereco.regiao5,
+                     endereco.regiao8, endereco.bairro]
+        if endereco.bairro is not None:
+            distrito = endereco.bairro.distrito
+            entidades.append(distrito)
+            if distrito is not None:
+                entidades.append(distrito.subprefeitura)
+        dependencias.extend((type(i).__name__, i.id) for i in entidades
+                            if i is not None)
+        return dependencias
+
+    def buscar(self, ids):
+        '''
+        Recupera o json armazenado das feiras livres.
+
+        Parâmetros
+        ==========
+        ids [List(int)] -- ids das feiras livres.
+
+        Retorno
+        =======
+        Dict(int, bytes) -- json das feiras livres encontradas e não \
+        expiradas no cache, indexado pelo id.
+        '''
+        encontrados = dict()
+        agora = time.monotonic()
+        with self.trava:
+            for identificador in ids:
+                entrada = self.entradas.get(identificador)
+                if entrada is None:
+                    continue
+                if entrada[2] < agora:
+                    self.remover(identificador)
+                    continue
+                self.entradas.move_to_end(identificador)
+                encontrados[identificador] = entrada[0]
+            self.acertos += len(encontrados)
+            self.falhas += len(ids) - len(encontrados)
+        return encontrados
+
+    def armazenar(self, fragmentos, geracao):
+        '''
+        Armazena o json das feiras livres, caso a geração do cache não \
+        tenha mudado desde que as feiras livres começaram a ser carregadas.
+
+        Parâmetros
+        ==========
+        fragmentos [List(Tuple(FeiraLivre, bytes))] -- feiras livres \
+        carregadas com carregamento_feira_livre e seus json.
+        geracao [int] -- geração do cache antes do carregamento.
+        '''
+        if self.tamanho <= 0:
+            return
+        itens = [(i.id, fragmento, self.listar_dependencias(i))
+                 for i, fragmento in fragmentos]
+        expira_em = time.monotonic() + self.ttl
+        with self.trava:
+            if geracao != self.geracao:
+                return
+            for identificador, fragmento, dependencias in itens:
+                self.remover(identificador)
+                self.entradas[identificador] = (fragmento, dependencias,
+                                                expira_em)
+                for dependencia in dependencias:
+                    self.dependentes.setdefault(dependencia, set()) \
+                                    .add(identificador)
+            while len(self.entradas) > self.tamanho:
+                self.remover(next(iter(self.entradas)))
+
+    def remover(self, identificador):
+        '''
+        Remove a entrada de uma feira livre e suas dependências.
+        Deve ser chamado com a trava adquirida.
+
+        Parâmetros
+        ==========
+        identificador [int] -- id da feira livre.
+        '''
+        entrada = self.entradas.pop(identificador, None)
+        if entrada is None:
+            return
+        for dependencia in entrada[1]:
+            dependentes = self.dependentes.get(dependencia)
+            if dependentes is not None:
+                dependentes.discard(identificador)
+                if not dependentes:
+                    del self.dependentes[dependencia]
+
+    def invalidar(self, entidades):
+        '''
+        Incrementa a geração do cache e remove as entradas que dependem \
+        das entidades.
+
+        Parâmetros
+        ==========
+        entidades [Iterable(Tuple(str, int))] -- nome do modelo e id de \
+        cada entidade alterada.
+        '''
+        with self.trava:
+            self.geracao += 1
+            for entidade in entidades:
+                for identificador in list(self.dependentes.get(entidade, ())):
+                    self.remover(identificador)
+
+    def limpar(self, *args, **kwargs):
+        '''
+        Incrementa a geração do cache e remove todas as entradas.
+        Deve ser utilizado após alterações que não passam pela sessão do ORM.
+        '''
+        with self.trava:
+            self.geracao += 1
+            self.entradas.clear()
+            self.dependentes.clear()
+
+    def marcar_alteracoes(self, sessao, contexto):
+        '''
+        Registra as entidades alteradas ou removidas pelo flush da sessão.
+
+        Parâmetros
+        ==========
+        sessao [Session] -- sessão.
+        contexto [UOWTransaction] -- unidade de trabalho do flush.
+        '''
+        alteradas = {(type(i).__name__, i.id)
+                     for i in list(sessao.dirty) + list(sessao.deleted)}
+        if alteradas:
+            sessao.info.setdefault(self, set()).update(alteradas)
+
+    def confirmar(self, sessao):
+        '''
+        Invalida as entradas que dependem das entidades alteradas após o \
+        commit.
+
+        Parâmetros
+        ==========
+        sessao [Session] -- sessão.
+        '''
+        alteradas = sessao.info.pop(self, None)
+        if alteradas:
+            self.invalidar(alteradas)
+
+    def descartar(self, sessao, transacao):
+        '''
+        Descarta as entidades alteradas registradas quando a transação \
+        termina sem commit.
+
+        Parâmetros
+        ==========
+        sessao [Session] -- sessão.
+        transacao [SessionTransaction] -- transação encerrada.
+        '''
+        if transacao.parent is None:
+            sessao.info.pop(self, None)
+
+
+cache_dimensoes = CacheDimensoes()
+cache_respostas = CacheRespostas()
+cache_fragmentos = CacheFragmentos()
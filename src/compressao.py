@@ -0,0 +1,252 @@
+''' Módulo responsável pela compressão das respostas da aplicação. '''
+
+import gzip
+import threading
+from collections import OrderedDict
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def comprimir_gzip(corpo):
+    '''
+    Comprime o corpo com gzip.
+
+    Parâmetros
+    ==========
+    corpo [bytes] -- corpo da resposta.
+
+    Retorno
+    =======
+    bytes -- corpo comprimido.
+    '''
+    return gzip.compress(corpo, compresslevel=6, mtime=0)
+
+
+def comprimir_brotli(corpo):
+    '''
+    Comprime o corpo com brotli.
+
+    Parâmetros
+    ==========
+    corpo [bytes] -- corpo da resposta.
+
+    Retorno
+    =======
+    bytes -- corpo comprimido.
+    '''
+    return brotli.compress(corpo, quality=5)
+
+
+def comprimir_zstd(corpo):
+    '''
+    Comprime o corpo com zstd.
+
+    Parâmetros
+    ==========
+    corpo [bytes] -- corpo da resposta.
+
+    Retorno
+    =======
+    bytes -- corpo comprimido.
+    '''
+    return zstandard.ZstdCompressor(level=3).compress(corpo)
+
+
+def listar_codificacoes_disponiveis():
+    '''
+    Lista as codificações cujas bibliotecas estão instaladas.
+    gzip está sempre disponível; brotli e zstd dependem dos pacotes \
+    opcionais brotli e zstandard.
+
+    Retorno
+    =======
+    Dict(str, Callable) -- função de compressão de cada codificação, \
+    indexada pelo nome usado em Accept-Encoding.
+    '''
+    disponiveis = {'gzip': comprimir_gzip}
+    if brotli is not None:
+        disponiveis['br'] = comprimir_brotli
+    if zstandard is not None:
+        disponiveis['zstd'] = comprimir_zstd
+    return disponiveis
+
+
+class Compressao:
+    '''
+    Comprime as respostas com a codificação negociada pelo cabeçalho \
+    Accept-Encoding (brotli, zstd ou gzip), a partir de um tamanho mínimo.
+    Respostas com ETag, como as da busca de feiras livres, são \
+    comprimidas uma única vez por codificação: o corpo comprimido é \
+    mantido em cache, indexado pelo ETag, e reutilizado enquanto o \
+    resultado não muda. O ETag das respostas comprimidas é fraco \
+    (W/"..."), de forma que If-None-Match continua valendo.
+
+    Atributos
+    ==========
+    app [Flask] -- aplicação.
+    tamanho_minimo [int] -- tamanho, em bytes, a partir do qual as \
+    respostas são comprimidas.
+    codificacoes [OrderedDict] -- função de compressão de cada \
+    codificação disponível, da preferida para a menos preferida.
+    tamanho [int] -- quantidade máxima de corpos comprimidos em cache. \
+    0 desativa o cache.
+    entradas [OrderedDict] -- corpos comprimidos, indexados por ETag e \
+    codificação, do menos para o mais usado.
+    trava [Lock] -- trava que protege as entradas.
+    acertos [int] -- quantidade de corpos encontrados no cache.
+    falhas [int] -- quantidade de corpos não encontrados no cache.
+    '''
+    TIPOS_COMPRIMIVEIS = ('application/json', 'application/x-ndjson',
+                          'text/plain', 'text/html')
+
+    def __init__(self, app=None):
+        '''
+        Construtor.
+
+        Parâmetros
+        ==========
+        app [Flask] -- aplicação. (default=None)
+        '''
+        self.app = None
+        self.tamanho_minimo = 1024
+        self.codificacoes = OrderedDict()
+        self.tamanho = 256
+        self.entradas = OrderedDict()
+        self.trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        '''
+        Configura a compressão e registra o hook de fim de requisição na \
+        aplicação.
+        Nada é registrado se COMPRESSAO é False.
+        Deve ser chamado antes de registrar os demais hooks de fim de \
+        requisição, para que a compressão seja o último deles.
+
+        Parâmetros
+        ==========
+        app [Flask] -- aplicação.
+        '''
+        self.app = app
+        if not app.config.get('COMPRESSAO', True):
+            return
+        self.tamanho_minimo = app.config.get('COMPRESSAO_TAMANHO_MINIMO',
+                                             self.tamanho_minimo)
+        self.tamanho = app.config.get('COMPRESSAO_CACHE_TAMANHO',
+                                      self.tamanho)
+        disponiveis = listar_codificacoes_disponiveis()
+        self.codificacoes = OrderedDict(
+            (i, disponiveis[i])
+            for i in app.config.get('COMPRESSAO_CODIFICACOES',
+                                    ('br', 'zstd', 'gzip'))
+            if i in disponiveis)
+        self.limpar()
+        app.after_request(self.comprimir)
+
+    def negociar(self, aceitas):
+        '''
+        Escolhe a codificação de maior qualidade em Accept-Encoding; em \
+        caso de empate, a preferida pela aplicação.
+
+        Parâmetros
+        ==========
+        aceitas [Accept] -- codificações aceitas pelo cliente.
+
+        Retorno
+        =======
+        str -- codificação escolhida ou None se nenhuma é aceita.
+        '''
+        escolhida = None
+        maior_qualidade = 0
+        for codificacao in self.codificacoes:
+            qualidade = aceitas.quality(codificacao)
+            if qualidade > maior_qualidade:
+                escolhida = codificacao
+                maior_qualidade = qualidade
+        return escolhida
+
+    def buscar_ou_comprimir(self, etag, codificacao, corpo):
+        '''
+        Recupera o corpo comprimido do cache ou o comprime, armazenando-o \
+        no cache se a resposta tem ETag.
+
+        Parâmetros
+        ==========
+        etag [str] -- ETag da resposta ou None.
+        codificacao [str] -- codificação.
+        corpo [bytes] -- corpo da resposta.
+
+        Retorno
+        =======
+        bytes -- corpo comprimido.
+        '''
+        if etag is None or self.tamanho <= 0:
+            return self.codificacoes[codificacao](corpo)
+        chave = (etag, codificacao)
+        with self.trava:
+            comprimido = self.entradas.get(chave)
+            if comprimido is not None:
+                self.entradas.move_to_end(chave)
+                self.acertos += 1
+                return comprimido
+            self.falhas += 1
+        comprimido = self.codificacoes[codificacao](corpo)
+        with self.trava:
+            self.entradas[chave] = comprimido
+            self.entradas.move_to_end(chave)
+            while len(self.entradas) > self.tamanho:
+                self.entradas.popitem(last=False)
+        return comprimido
+
+    def comprimir(self, resposta):
+        '''
+        Comprime a resposta, caso seja bem-sucedida, de um tipo \
+        comprimível, não enviada em partes, com tamanho a partir do mínimo \
+        e o cliente aceite uma das codificações.
+
+        Parâmetros
+        ==========
+        resposta [Response] -- resposta da requisição.
+
+        Retorno
+        =======
+        Response -- a mesma resposta.
+        '''
+        if resposta.status_code != 200 or resposta.direct_passthrough or \
+                resposta.is_streamed or \
+                'Content-Encoding' in resposta.headers or \
+                resposta.mimetype not in self.TIPOS_COMPRIMIVEIS:
+            return resposta
+        corpo = resposta.get_data()
+        if len(corpo) < self.tamanho_minimo:
+            return resposta
+        resposta.vary.add('Accept-Encoding')
+        codificacao = self.negociar(request.accept_encodings)
+        if codificacao is None:
+            return resposta
+        etag, _ = resposta.get_etag()
+        resposta.set_data(self.buscar_ou_comprimir(etag, codificacao, corpo))
+        resposta.headers['Content-Encoding'] = codificacao
+        if etag is not None:
+            resposta.set_etag(etag, weak=True)
+        return resposta
+
+    def limpar(self):
+        ''' Remove todos os corpos comprimidos do cache. '''
+        with self.trava:
+            self.entradas.clear()
+
+
+compressao = Compressao()
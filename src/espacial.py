@@ -0,0 +1,438 @@
+''' Módulo responsável pelo índice espacial das feiras livres. '''
+
+import heapq
+import math
+import threading
+import time
+from sqlalchemy import event, or_
+from sqlalchemy.orm import Session
+from src.modelos import Modelo, FeiraLivre, Endereco
+
+RAIO_TERRA = 6371008.8
+METROS_POR_GRAU = 2 * math.pi * RAIO_TERRA / 360
+
+
+def calcular_distancia(latitude1, longitude1, latitude2, longitude2):
+    '''
+    Calcula a distância entre dois pontos pela fórmula de haversine.
+
+    Parâmetros
+    ==========
+    latitude1 [float] -- latitude do primeiro ponto, em graus.
+    longitude1 [float] -- longitude do primeiro ponto, em graus.
+    latitude2 [float] -- latitude do segundo ponto, em graus.
+    longitude2 [float] -- longitude do segundo ponto, em graus.
+
+    Retorno
+    =======
+    float -- distância entre os pontos, em metros.
+    '''
+    phi1 = math.radians(latitude1)
+    phi2 = math.radians(latitude2)
+    delta_phi = phi2 - phi1
+    delta_lambda = math.radians(longitude2 - longitude1)
+    a = math.sin(delta_phi / 2) ** 2 + \
+        math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2
+    return 2 * RAIO_TERRA * math.asin(min(1.0, math.sqrt(a)))
+
+
+class IndiceEspacial:
+    '''
+    Índice espacial em memória da localização das feiras livres.
+    Os pontos são agrupados em uma grade de células de tamanho fixo \
+    (em graus); as buscas examinam apenas as células próximas ao ponto \
+    buscado, em anéis crescentes, limitados ao retângulo que contém as \
+    células ocupadas.
+    As buscas são feitas sobre um instantâneo imutável do índice, \
+    recriado após as alterações, sem manter a trava durante a busca.
+    O índice é construído na primeira busca e mantido atualizado a partir \
+    dos commits que criam, alteram ou removem feiras livres neste processo.
+    As alterações feitas por outros processos não geram eventos neste \
+    processo: o índice é reconstruído a partir da base de dados na \
+    primeira busca após ttl segundos de sua construção.
+
+    Atributos
+    ==========
+    tamanho_celula [float] -- tamanho das células da grade, em graus.
+    ttl [float] -- tempo, em segundos, após o qual o índice é reconstruído.
+    pontos [Dict] -- localização (latitude, longitude) de cada feira livre, \
+    indexada pelo id.
+    celulas [Dict] -- ids das feiras livres de cada célula da grade.
+    construido [bool] -- informa se o índice já foi construído.
+    construido_em [float] -- instante (time.monotonic) da construção do \
+    índice.
+    pendentes [Set] -- ids das feiras livres criadas ou alteradas cuja \
+    localização ainda deve ser lida da base de dados.
+    enderecos_pendentes [Set] -- ids dos endereços alterados cujas feiras \
+    livres ainda devem ser lidas da base de dados.
+    instantaneo [Tuple] -- pontos, células e limites (linha e coluna \
+    mínimas e máximas) das células ocupadas, para as buscas, ou None se \
+    o índice foi alterado desde sua criação.
+    trava [RLock] -- trava que protege o índice.
+    '''
+    def __init__(self, tamanho_celula=0.01, ttl=60):
+        '''
+        Construtor.
+
+        Parâmetros
+        ==========
+        tamanho_celula [float] -- tamanho das células da grade, em graus. \
+        (default=0.01)
+        ttl [float] -- tempo, em segundos, após o qual o índice é \
+        reconstruído. (default=60)
+        '''
+        self.tamanho_celula = tamanho_celula
+        self.ttl = ttl
+        self.trava = threading.RLock()
+        self.limpar()
+        event.listen(Session, 'after_flush', self.registrar_alteracoes)
+        event.listen(Session, 'after_commit', self.confirmar)
+        event.listen(Session, 'after_transaction_end', self.descartar)
+        event.listen(Modelo.metadata, 'after_drop', self.limpar)
+
+    def init_app(self, app):
+        '''
+        Configura o índice a partir da configuração da aplicação.
+
+        Parâmetros
+        ==========
+        app [Flask] -- aplicação.
+        '''
+        self.tamanho_celula = app.config.get('INDICE_ESPACIAL_CELULA',
+                                             self.tamanho_celula)
+        self.ttl = app.config.get('INDICE_ESPACIAL_TTL', self.ttl)
+        self.limpar()
+
+    def limpar(self, *args, **kwargs):
+        ''' Remove todos os pontos; o índice será reconstruído. '''
+        with self.trava:
+            self.pontos = dict()
+            self.celulas = dict()
+            self.pendentes = set()
+            self.enderecos_pendentes = set()
+            self.construido = False
+            self.construido_em = None
+            self.instantaneo = None
+
+    def calcular_celula(self, latitude, longitude):
+        '''
+        Calcula a célula da grade que contém o ponto.
+
+        Parâmetros
+        ==========
+        latitude [float] -- latitude do ponto, em graus.
+        longitude [float] -- longitude do ponto, em graus.
+
+        Retorno
+        =======
+        Tuple(int, int) -- linha e coluna da célula.
+        '''
+        return (math.floor(latitude / self.tamanho_celula),
+                math.floor(longitude / self.tamanho_celula))
+
+    def inserir(self, identificador, latitude, longitude):
+        '''
+        Insere ou move o ponto de uma feira livre.
+        Feiras livres sem localização são removidas do índice.
+
+        Parâmetros
+        ==========
+        identificador [int] -- id da feira livre.
+        latitude [float] -- latitude, em graus.
+        longitude [float] -- longitude, em graus.
+        '''
+        with self.trava:
+            self.remover(identificador)
+            if latitude is None or longitude is None:
+                return
+            self.instantaneo = None
+            self.pontos[identificador] = (latitude, longitude)
+            self.celulas.setdefault(self.calcular_celula(latitude, longitude),
+                                    set()).add(identificador)
+
+    def remover(self, identificador):
+        '''
+        Remove o ponto de uma feira livre.
+
+        Parâmetros
+        ==========
+        identificador [int] -- id da feira livre.
+        '''
+        with self.trava:
+            ponto = self.pontos.pop(identificador, None)
+            if ponto is None:
+                return
+            self.instantaneo = None
+            celula = self.calcular_celula(*ponto)
+            self.celulas[celula].discard(identificador)
+            if len(self.celulas[celula]) == 0:
+                del self.celulas[celula]
+
+    def atualizar(self, sessao):
+        '''
+        Constrói o índice, se necessário ou se foi construído há ttl \
+        segundos ou mais, e lê a localização das feiras livres pendentes.
+
+        Parâmetros
+        ==========
+        sessao [Session] -- sessão.
+        '''
+        with self.trava:
+            if self.construido and \
+                    time.monotonic() - self.construido_em >= self.ttl:
+                self.limpar()
+            if self.construido and len(self.pendentes) == 0 and \
+                    len(self.enderecos_pendentes) == 0:
+                return
+            consulta = sessao.query(FeiraLivre.id, Endereco.latitude,
+                                    Endereco.longitude) \
+                             .join(FeiraLivre.endereco)
+            if self.construido:
+                consulta = consulta.filter(or_(
+                    FeiraLivre.id.in_(self.pendentes),
+                    FeiraLivre.endereco_id.in_(self.enderecos_pendentes)))
+                for identificador in self.pendentes:
+                    self.remover(identificador)
+            else:
+                self.construido_em = time.monotonic()
+            for identificador, latitude, longitude in consulta:
+                self.inserir(identificador, latitude, longitude)
+            self.pendentes = set()
+            self.enderecos_pendentes = set()
+            self.construido = True
+
+    def criar_instantaneo(self):
+        '''
+        Recupera o instantâneo do índice, criando-o se o índice foi \
+        alterado desde a última busca.
+
+        Retorno
+        =======
+        Tuple(Dict, Dict, Tuple) -- localização de cada feira livre, ids \
+        das feiras livres de cada célula e limites das células ocupadas \
+        (linha mínima, linha máxima, coluna mínima, coluna máxima), None \
+        se o índice está vazio.
+        '''
+        with self.trava:
+            if self.instantaneo is None:
+                limites = None
+                if self.celulas:
+                    linhas = [linha for linha, _ in self.celulas]
+                    colunas = [coluna for _, coluna in self.celulas]
+                    limites = (min(linhas), max(linhas),
+                               min(colunas), max(colunas))
+                self.instantaneo = (dict(self.pontos),
+                                    {celula: tuple(ids) for celula, ids
+                                     in self.celulas.items()},
+                                    limites)
+            return self.instantaneo
+
+    def buscar(self, latitude, longitude, limite=None, raio=None):
+        '''
+        Busca as feiras livres mais próximas do ponto.
+
+        Parâmetros
+        ==========
+        latitude [float] -- latitude do ponto, em graus.
+        longitude [float] -- longitude do ponto, em graus.
+        limite [int] -- quantidade máxima de feiras livres ou None para \
+        todas as feiras livres dentro do raio. (default=None)
+        raio [float] -- distância máxima, em metros, ou None para não \
+        limitar a distância. (default=None)
+
+        Retorno
+        =======
+        List(Tuple(float, int)) -- distância, em metros, e id de cada \
+        feira livre encontrada, da mais próxima para a mais distante.
+        '''
+        pontos, celulas, limites = self.criar_instantaneo()
+        if limites is None:
+            return []
+        linha_minima, linha_maxima, coluna_minima, coluna_maxima = limites
+        # Distância mínima, em metros, entre o ponto e qualquer célula fora
+        # dos anéis já examinados. O grau de longitude diminui com a
+        # latitude: utiliza a maior latitude entre o ponto e as células.
+        latitude_maxima = max(abs(latitude),
+                              abs(linha_minima * self.tamanho_celula),
+                              abs((linha_maxima + 1) * self.tamanho_celula))
+        fator = math.cos(math.radians(min(latitude_maxima +
+                                          self.tamanho_celula, 90)))
+        metros_por_anel = self.tamanho_celula * METROS_POR_GRAU * fator
+        linha, coluna = self.calcular_celula(latitude, longitude)
+        # Os anéis anteriores ao retângulo das células ocupadas estão vazios
+        # e os posteriores ao último anel não contêm células ocupadas
+        anel = max(linha_minima - linha, linha - linha_maxima,
+                   coluna_minima - coluna, coluna - coluna_maxima, 0)
+        ultimo_anel = max(linha - linha_minima, linha_maxima - linha,
+                          coluna - coluna_minima, coluna_maxima - coluna)
+        encontrados = list()
+        examinados = 0
+        visitadas = 0
+        while anel <= ultimo_anel and examinados < len(pontos):
+            distancia_anel = max(anel - 1, 0) * metros_por_anel
+            if raio is not None and distancia_anel > raio:
+                break
+            if limite is not None and len(encontrados) == limite and \
+                    -encontrados[0][0] <= distancia_anel:
+                break
+            if visitadas > len(celulas):
+                # Com as células ocupadas espalhadas, percorrer os anéis
+                # custa mais que calcular a distância de todos os pontos
+                return self.selecionar(latitude, longitude, pontos,
+                                       pontos, limite, raio)
+            identificadores = list()
+            for celula in self.listar_celulas_anel(linha, coluna, anel,
+                                                   limites):
+                visitadas += 1
+                identificadores.extend(celulas.get(celula, ()))
+            examinados += len(identificadores)
+            self.selecionar(latitude, longitude, pontos, identificadores,
+                            limite, raio, encontrados)
+            anel += 1
+        return sorted((-distancia, identificador)
+                      for distancia, identificador in encontrados)
+
+    @staticmethod
+    def selecionar(latitude, longitude, pontos, identificadores, limite,
+                   raio, encontrados=None):
+        '''
+        Calcula a distância das feiras livres ao ponto e mantém as mais \
+        próximas em um heap.
+
+        Parâmetros
+        ==========
+        latitude [float] -- latitude do ponto, em graus.
+        longitude [float] -- longitude do ponto, em graus.
+        pontos [Dict] -- localização de cada feira livre, indexada pelo id.
+        identificadores [Iterable(int)] -- ids das feiras livres.
+        limite [int] -- quantidade máxima de feiras livres ou None.
+        raio [float] -- distância máxima, em metros, ou None.
+        encontrados [List] -- heap (distância negativa, id) das feiras \
+        livres mais próximas, atualizado com as novas feiras livres, ou \
+        None para calcular um novo resultado. (default=None)
+
+        Retorno
+        =======
+        List(Tuple(float, int)) -- se encontrados é None, distância e id \
+        das feiras livres selecionadas, da mais próxima para a mais \
+        distante; caso contrário, o próprio heap.
+        '''
+        novo = encontrados is None
+        if novo:
+            encontrados = list()
+        for identificador in identificadores:
+            distancia = calcular_distancia(latitude, longitude,
+                                           *pontos[identificador])
+            if raio is not None and distancia > raio:
+                continue
+            item = (-distancia, identificador)
+            if limite is None or len(encontrados) < limite:
+                heapq.heappush(encontrados, item)
+            elif item > encontrados[0]:
+                heapq.heapreplace(encontrados, item)
+        if not novo:
+            return encontrados
+        return sorted((-distancia, identificador)
+                      for distancia, identificador in encontrados)
+
+    @staticmethod
+    def listar_celulas_anel(linha, coluna, anel, limites=None):
+        '''
+        Lista as células que estão a exatamente anel células de distância \
+        (Chebyshev) da célula central.
+
+        Parâmetros
+        ==========
+        linha [int] -- linha da célula central.
+        coluna [int] -- coluna da célula central.
+        anel [int] -- distância, em células, da célula central.
+        limites [Tuple(int, int, int, int)] -- linha mínima, linha máxima, \
+        coluna mínima e coluna máxima das células a serem listadas ou None \
+        para listar todo o anel. (default=None)
+
+        Retorno
+        =======
+        Generator(Tuple(int, int)) -- células do anel.
+        '''
+        if limites is None:
+            limites = (linha - anel, linha + anel, coluna - anel,
+                       coluna + anel)
+        linha_minima, linha_maxima, coluna_minima, coluna_maxima = limites
+        if anel == 0:
+            if linha_minima <= linha <= linha_maxima and \
+                    coluna_minima <= coluna <= coluna_maxima:
+                yield (linha, coluna)
+            return
+        for linha_anel in (linha - anel, linha + anel):
+            if linha_minima <= linha_anel <= linha_maxima:
+                for coluna_anel in range(max(coluna - anel, coluna_minima),
+                                         min(coluna + anel,
+                                             coluna_maxima) + 1):
+                    yield (linha_anel, coluna_anel)
+        for coluna_anel in (coluna - anel, coluna + anel):
+            if coluna_minima <= coluna_anel <= coluna_maxima:
+                for linha_anel in range(max(linha - anel + 1, linha_minima),
+                                        min(linha + anel - 1,
+                                            linha_maxima) + 1):
+                    yield (linha_anel, coluna_anel)
+
+    def registrar_alteracoes(self, sessao, contexto):
+        '''
+        Registra, na sessão, as feiras livres criadas, alteradas e \
+        removidas e os endereços alterados pelo flush.
+
+        Parâmetros
+        ==========
+        sessao [Session] -- sessão.
+        contexto [UOWTransaction] -- unidade de trabalho do flush.
+        '''
+        alteradas, removidas, enderecos = sessao.info.setdefault(
+            self, (set(), set(), set()))
+        for instancia in list(sessao.new) + list(sessao.dirty):
+            if isinstance(instancia, FeiraLivre):
+                alteradas.add(instancia.id)
+            elif isinstance(instancia, Endereco):
+                enderecos.add(instancia.id)
+        for instancia in sessao.deleted:
+            if isinstance(instancia, FeiraLivre):
+                removidas.add(instancia.id)
+
+    def confirmar(self, sessao):
+        '''
+        Aplica ao índice as alterações da transação após o commit.
+        Feiras removidas saem do índice; a localização das criadas e \
+        alteradas, e das que estão em endereços alterados, é lida na \
+        próxima busca.
+
+        Parâmetros
+        ==========
+        sessao [Session] -- sessão.
+        '''
+        alteracoes = sessao.info.pop(self, None)
+        if alteracoes is None:
+            return
+        alteradas, removidas, enderecos = alteracoes
+        with self.trava:
+            if not self.construido:
+                return
+            for identificador in removidas:
+                self.remover(identificador)
+                self.pendentes.discard(identificador)
+            self.pendentes.update(alteradas - removidas)
+            self.enderecos_pendentes.update(enderecos)
+
+    def descartar(self, sessao, transacao):
+        '''
+        Descarta as alterações registradas quando a transação termina \
+        sem commit.
+
+        Parâmetros
+        ==========
+        sessao [Session] -- sessão.
+        transacao [SessionTransaction] -- transação encerrada.
+        '''
+        if transacao.parent is None:
+            sessao.info.pop(self, None)
+
+
+indice_espacial = IndiceEspacial()
@@ -4,3 +4,8 @@
 class ViolacaoIndiceUnico(Exception):
     ''' Lançada quando existe violação de índice único. '''
     pass
+
+
+class CoordenadaInvalida(Exception):
+    ''' Lançada quando uma coordenada está fora do território esperado. '''
+    pass
@@ -0,0 +1,840 @@
+''' Módulo responsável pela importação em lote das feiras livres. '''
+
+import hashlib
+import json
+from src.basedados import iniciar_transacao_escrita
+from src.excecoes import CoordenadaInvalida, ViolacaoIndiceUnico
+from src.modelos import FeiraLivre, Endereco, Logradouro, Bairro
+from src.modelos import Regiao8, Regiao5, Distrito, Subprefeitura
+from src.modelos import HashImportacao
+from sqlalchemy import Integer, Float, bindparam, delete, func, select
+from sqlalchemy.orm import scoped_session
+
+# O arquivo csv armazena as coordenadas em graus multiplicados por 10^6
+ESCALA_COORDENADAS = 10 ** 6
+# Limites (em graus) do território do Município de São Paulo
+LIMITES_LATITUDE = (-24.01, -23.35)
+LIMITES_LONGITUDE = (-46.83, -46.36)
+
+
+def converter_valor(coluna, valor):
+    '''
+    Converte o valor para o tipo da coluna da mesma forma que o SQLite \
+    faz ao armazená-lo (afinidade de tipo).
+    Valores que não podem ser convertidos são mantidos.
+
+    Parâmetros
+    ==========
+    coluna [Column] -- coluna onde o valor será armazenado.
+    valor [object] -- valor a ser convertido.
+
+    Retorno
+    =======
+    object -- valor convertido.
+    '''
+    if valor is None:
+        return None
+    try:
+        if isinstance(coluna.type, Integer):
+            return int(valor)
+        if isinstance(coluna.type, Float):
+            return float(valor)
+    except (TypeError, ValueError):
+        pass
+    return valor
+
+
+def converter_coordenada(valor, limites, nome):
+    '''
+    Converte uma coordenada do arquivo csv, armazenada como inteiro em \
+    graus multiplicados por ESCALA_COORDENADAS, para graus decimais.
+    Valores que já contêm parte decimal são considerados em graus.
+
+    Parâmetros
+    ==========
+    valor [str] -- coordenada lida do arquivo csv.
+    limites [Tuple(float, float)] -- valores mínimo e máximo, em graus.
+    nome [str] -- nome da coordenada, usado na mensagem de erro.
+
+    Retorno
+    =======
+    float -- coordenada em graus ou None se o valor está vazio.
+
+    Exceções/Erros
+    ==============
+    CoordenadaInvalida -- se o valor não é numérico ou está fora dos limites.
+    '''
+    if valor is None or valor.strip() == '':
+        return None
+    try:
+        graus = float(valor)
+    except ValueError:
+        graus = None
+    if graus is not None and '.' not in valor:
+        graus = graus / ESCALA_COORDENADAS
+    if graus is None or not limites[0] <= graus <= limites[1]:
+        raise CoordenadaInvalida('{0} {1} fora do território do Município '
+                                 'de São Paulo.'.format(nome, valor))
+    return graus
+
+
+def converter_localizacao(linha):
+    '''
+    Converte a latitude e a longitude de uma linha do arquivo csv para \
+    graus decimais.
+
+    Parâmetros
+    ==========
+    linha [Dict] -- linha do arquivo csv.
+
+    Retorno
+    =======
+    Tuple(float, float) -- latitude e longitude, em graus.
+
+    Exceções/Erros
+    ==============
+    CoordenadaInvalida
+    '''
+    return (converter_coordenada(linha['LAT'], LIMITES_LATITUDE, 'Latitude'),
+            converter_coordenada(linha['LONG'], LIMITES_LONGITUDE,
+                                 'Longitude'))
+
+
+def converter_linha_csv(linha):
+    '''
+    Converte uma linha do arquivo csv para o json de feira livre da API.
+
+    Parâmetros
+    ==========
+    linha [Dict] -- linha do arquivo csv.
+
+    Retorno
+    =======
+    Dict -- json contendo as informações da feira livre.
+
+    Exceções/Erros
+    ==============
+    CoordenadaInvalida
+    '''
+    latitude, longitude = converter_localizacao(linha)
+    return {'cod_subpref': linha['CODSUBPREF'],
+            'subprefeitura': linha['SUBPREFE'],
+            'cod_distrito': linha['CODDIST'],
+            'distrito': linha['DISTRITO'],
+            'regiao5': linha['REGIAO5'],
+            'regiao8': linha['REGIAO8'],
+            'bairro': linha['BAIRRO'],
+            'logradouro': linha['LOGRADOURO'],
+            'numero': linha['NUMERO'],
+            'referencia': linha['REFERENCIA'],
+            'latitude': latitude,
+            'longitude': longitude,
+            'setor_censitario': linha['SETCENS'],
+            'area_ponderacao': linha['AREAP'],
+            'identificador': linha['ID'],
+            'nome': linha['NOME_FEIRA'],
+            'registro': linha['REGISTRO']}
+
+
+class TabelaEmMemoria:
+    '''
+    Mantém em memória as linhas de uma tabela para que possam ser \
+    buscadas, criadas ou alteradas sem consultar a base de dados.
+
+    Atributos
+    ==========
+    modelo [Modelo] -- modelo da tabela.
+    colunas [List] -- colunas da tabela, exceto o id.
+    indices [List] -- colunas de cada índice de chave única.
+    linhas [Dict] -- id das linhas indexado pelos valores de todas as colunas.
+    linhas_id [Dict] -- linhas indexadas pelo id.
+    linhas_indice [List] -- para cada índice de chave única, as linhas \
+    indexadas pelos valores das colunas do índice.
+    novas_linhas [List] -- linhas que ainda não foram gravadas.
+    linhas_alteradas [Dict] -- linhas existentes alteradas que ainda não \
+    foram gravadas, indexadas pelo id.
+    historico [List] -- id, linha anterior e alteração anterior ainda não \
+    gravada de cada alteração, para que possam ser desfeitas.
+    proximo_id [int] -- id a ser atribuído à próxima linha criada.
+    primeiro_novo_id [int] -- id a partir do qual as linhas ainda não \
+    existem na base de dados.
+    '''
+    def __init__(self, sessao, modelo, filtro=None):
+        '''
+        Construtor.
+        Carrega as linhas já existentes na base de dados, reservando a \
+        escrita antes (ver iniciar_transacao_escrita): os ids das novas \
+        linhas partem do maior id lido, e outra transação que gravasse \
+        linhas até a gravação desta atribuiria os mesmos ids.
+
+        Parâmetros
+        ==========
+        sessao [Session] -- sessão.
+        modelo [Modelo] -- modelo da tabela.
+        filtro [ColumnElement] -- filtro das linhas a serem carregadas ou \
+        None para carregar todas as linhas. Deve incluir todas as linhas \
+        que podem conflitar com as linhas buscadas ou criadas. \
+        (default=None)
+        '''
+        self.modelo = modelo
+        self.colunas = [c for c in modelo.__table__.columns if c.name != 'id']
+        self.indices = modelo.recuperar_indices_chave_unica()
+        self.linhas = dict()
+        self.linhas_id = dict()
+        self.linhas_indice = [dict() for i in self.indices]
+        self.novas_linhas = list()
+        self.linhas_alteradas = dict()
+        self.historico = list()
+        self.proximo_id = 1
+        if isinstance(sessao, scoped_session):
+            sessao = sessao()
+        iniciar_transacao_escrita(sessao)
+        consulta = modelo.__table__.select()
+        if filtro is not None:
+            consulta = consulta.where(filtro)
+            maximo = sessao.execute(select(func.max(modelo.__table__.c.id)))
+            self.proximo_id = (maximo.scalar() or 0) + 1
+        for linha in sessao.execute(consulta).mappings():
+            self.registrar(dict(linha))
+            self.proximo_id = max(self.proximo_id, linha['id'] + 1)
+        self.primeiro_novo_id = self.proximo_id
+
+    def registrar(self, linha):
+        '''
+        Indexa a linha pelos valores de suas colunas e de seus índices.
+
+        Parâmetros
+        ==========
+        linha [Dict] -- valores das colunas da linha, incluindo o id.
+        '''
+        chave = tuple(linha[c.name] for c in self.colunas)
+        self.linhas[chave] = linha['id']
+        self.linhas_id[linha['id']] = linha
+        for indice, linhas in zip(self.indices, self.linhas_indice):
+            linhas.setdefault(tuple(linha[c] for c in indice), linha['id'])
+
+    def remover_registro(self, linha):
+        '''
+        Remove a linha dos índices em memória.
+
+        Parâmetros
+        ==========
+        linha [Dict] -- valores das colunas da linha, incluindo o id.
+        '''
+        chave = tuple(linha[c.name] for c in self.colunas)
+        if self.linhas.get(chave) == linha['id']:
+            del self.linhas[chave]
+        self.linhas_id.pop(linha['id'], None)
+        for indice, linhas in zip(self.indices, self.linhas_indice):
+            chave_indice = tuple(linha[c] for c in indice)
+            if linhas.get(chave_indice) == linha['id']:
+                del linhas[chave_indice]
+
+    def converter_linha(self, kwargs):
+        '''
+        Converte as informações da linha para os tipos das colunas.
+
+        Parâmetros
+        ==========
+        kwargs [Dict] -- informações da linha.
+
+        Retorno
+        =======
+        Dict -- valores de todas as colunas da linha, exceto o id.
+        '''
+        return {c.name: converter_valor(c, kwargs.get(c.name))
+                for c in self.colunas}
+
+    def verificar_indices(self, linha, identificador=None):
+        '''
+        Verifica se a linha viola algum índice de chave única.
+
+        Parâmetros
+        ==========
+        linha [Dict] -- valores das colunas da linha.
+        identificador [int] -- id da linha, que não conflita consigo mesma, \
+        ou None para uma nova linha. (default=None)
+
+        Exceções/Erros
+        ==============
+        ViolacaoIndiceUnico
+        '''
+        for indice, linhas in zip(self.indices, self.linhas_indice):
+            existente = linhas.get(tuple(linha[c] for c in indice))
+            if existente is not None and existente != identificador:
+                raise ViolacaoIndiceUnico('Um(a) novo(a) {0} deve conter '
+                                          'valores diferentes em {1}.'
+                                          .format(self.modelo.__table__.name,
+                                                  ', '.join(indice)))
+
+    def buscar_ou_criar(self, **kwargs):
+        '''
+        Recupera o id da linha dadas suas informações.
+        Caso não seja encontrada, cria a linha em memória.
+        Equivale a buscar_ou_criar, sem acesso à base de dados.
+
+        Parâmetros
+        ==========
+        kwargs -- informações pelas qual a linha será procurada ou criada.
+
+        Retorno
+        =======
+        int -- id da linha encontrada ou criada.
+
+        Exceções/Erros
+        ==============
+        ViolacaoIndiceUnico
+        '''
+        linha = self.converter_linha(kwargs)
+        chave = tuple(linha[c.name] for c in self.colunas)
+        if chave in self.linhas:
+            return self.linhas[chave]
+        self.verificar_indices(linha)
+        linha['id'] = self.proximo_id
+        self.proximo_id += 1
+        self.registrar(linha)
+        self.novas_linhas.append(linha)
+        return linha['id']
+
+    def criar_ou_alterar(self, **kwargs):
+        '''
+        Recupera o id da linha já existente na base de dados com os mesmos \
+        valores em um índice de chave única, alterando em memória as \
+        demais colunas; caso não exista, busca ou cria a linha como \
+        buscar_ou_criar.
+
+        Parâmetros
+        ==========
+        kwargs -- informações da linha.
+
+        Retorno
+        =======
+        int -- id da linha alterada, encontrada ou criada.
+
+        Exceções/Erros
+        ==============
+        ViolacaoIndiceUnico
+        '''
+        linha = self.converter_linha(kwargs)
+        for indice, linhas in zip(self.indices, self.linhas_indice):
+            identificador = linhas.get(tuple(linha[c] for c in indice))
+            if identificador is not None and \
+                    identificador < self.primeiro_novo_id:
+                self.alterar(identificador, **kwargs)
+                return identificador
+        return self.buscar_ou_criar(**kwargs)
+
+    def buscar_id(self, **kwargs):
+        '''
+        Recupera o id da linha pelas colunas de um índice de chave única.
+
+        Parâmetros
+        ==========
+        kwargs -- valores de todas as colunas de um índice de chave única.
+
+        Retorno
+        =======
+        int -- id da linha ou None se não existir.
+        '''
+        for indice, linhas in zip(self.indices, self.linhas_indice):
+            if set(indice) == set(kwargs.keys()):
+                return linhas.get(tuple(kwargs[c] for c in indice))
+        return None
+
+    def alterar(self, id_linha, **kwargs):
+        '''
+        Altera, em memória, uma linha já existente na base de dados.
+
+        Parâmetros
+        ==========
+        id_linha [int] -- id da linha.
+        kwargs -- novas informações da linha.
+
+        Retorno
+        =======
+        bool -- True se a linha foi alterada ou False se as informações \
+        são iguais às existentes.
+
+        Exceções/Erros
+        ==============
+        ViolacaoIndiceUnico
+        '''
+        linha = self.converter_linha(kwargs)
+        antiga = self.linhas_id[id_linha]
+        if all(antiga[c] == v for c, v in linha.items()):
+            return False
+        self.verificar_indices(linha, id_linha)
+        linha['id'] = id_linha
+        self.historico.append((id_linha, antiga,
+                               self.linhas_alteradas.get(id_linha)))
+        self.remover_registro(antiga)
+        self.registrar(linha)
+        self.linhas_alteradas[id_linha] = linha
+        return True
+
+    def marcar(self):
+        '''
+        Marca o estado atual das novas linhas e das linhas alteradas, para \
+        que possa ser restaurado por desfazer.
+
+        Retorno
+        =======
+        Tuple(int, int) -- marca do estado atual.
+        '''
+        return len(self.novas_linhas), len(self.historico)
+
+    def desfazer(self, marca):
+        '''
+        Desfaz as alterações e descarta as linhas criadas após a marca.
+
+        Parâmetros
+        ==========
+        marca [Tuple(int, int)] -- marca retornada por marcar.
+        '''
+        novas, alteracoes = marca
+        while len(self.historico) > alteracoes:
+            id_linha, antiga, alterada = self.historico.pop()
+            self.remover_registro(self.linhas_id[id_linha])
+            self.registrar(antiga)
+            if alterada is None:
+                del self.linhas_alteradas[id_linha]
+            else:
+                self.linhas_alteradas[id_linha] = alterada
+        descartadas = self.novas_linhas[novas:]
+        if len(descartadas) == 0:
+            return
+        for linha in descartadas:
+            self.remover_registro(linha)
+        del self.novas_linhas[novas:]
+        self.proximo_id = descartadas[0]['id']
+
+    def gravar(self, sessao):
+        '''
+        Insere as novas linhas e atualiza as linhas alteradas na base de \
+        dados, cada operação em uma única instrução (executemany).
+
+        Parâmetros
+        ==========
+        sessao [Session] -- sessão.
+        '''
+        tabela = self.modelo.__table__
+        if len(self.novas_linhas) > 0:
+            sessao.execute(tabela.insert(), self.novas_linhas)
+        if len(self.linhas_alteradas) > 0:
+            sessao.execute(tabela.update()
+                                 .where(tabela.c.id == bindparam('id_linha')),
+                           [dict(((c.name, linha[c.name])
+                                  for c in self.colunas),
+                                 id_linha=linha['id'])
+                            for linha in self.linhas_alteradas.values()])
+        self.novas_linhas = list()
+        self.linhas_alteradas = dict()
+        self.historico = list()
+        self.primeiro_novo_id = self.proximo_id
+
+
+def resolver_endereco(tabelas, json, alterar=False):
+    '''
+    Resolve, em memória, o endereço da feira livre e as entidades das \
+    quais ele depende (subprefeitura, distrito, regiões, bairro e \
+    logradouro).
+    Se alterar, um endereço já existente com a mesma chave única \
+    (logradouro, número, bairro, regiões e coordenadas) tem as demais \
+    colunas (referência, setor censitário e área de ponderação) \
+    alteradas; caso contrário, qualquer diferença cria um novo endereço.
+
+    Parâmetros
+    ==========
+    tabelas [Dict] -- TabelaEmMemoria de cada modelo.
+    json [Dict] -- json contendo as informações da feira livre.
+    alterar [bool] -- informa se os endereços existentes devem ser \
+    alterados. (default=False)
+
+    Retorno
+    =======
+    int -- id do endereço.
+
+    Exceções/Erros
+    ==============
+    ViolacaoIndiceUnico
+    '''
+    subprefeitura_id = tabelas[Subprefeitura] \
+        .buscar_ou_criar(codigo=json['cod_subpref'],
+                         nome=json['subprefeitura'])
+    distrito_id = tabelas[Distrito] \
+        .buscar_ou_criar(codigo=json['cod_distrito'],
+                         nome=json['distrito'],
+                         subprefeitura_id=subprefeitura_id)
+    regiao5_id = tabelas[Regiao5].buscar_ou_criar(nome=json['regiao5'])
+    regiao8_id = tabelas[Regiao8].buscar_ou_criar(nome=json['regiao8'])
+    bairro_id = tabelas[Bairro] \
+        .buscar_ou_criar(nome=json['bairro'],
+                         distrito_id=distrito_id)
+    logradouro_id = tabelas[Logradouro] \
+        .buscar_ou_criar(nome=json['logradouro'])
+    enderecos = tabelas[Endereco]
+    resolver = enderecos.criar_ou_alterar if alterar \
+        else enderecos.buscar_ou_criar
+    return resolver(logradouro_id=logradouro_id,
+                    numero=json['numero'],
+                    referencia=json['referencia'],
+                    bairro_id=bairro_id,
+                    regiao5_id=regiao5_id,
+                    regiao8_id=regiao8_id,
+                    latitude=json['latitude'],
+                    longitude=json['longitude'],
+                    setor_censitario=json['setor_censitario'],
+                    area_ponderacao=json['area_ponderacao'])
+
+
+class ImportadorLote:
+    '''
+    Importa feiras livres resolvendo subprefeituras, distritos, regiões, \
+    bairros, logradouros e endereços em memória.
+    As linhas são gravadas apenas em gravar, tabela a tabela, em uma \
+    única transação.
+
+    Atributos
+    ==========
+    sessao [Session] -- sessão.
+    tabelas [Dict] -- TabelaEmMemoria de cada modelo.
+    '''
+    MODELOS = (Subprefeitura, Distrito, Regiao5, Regiao8, Bairro, Logradouro,
+               Endereco, FeiraLivre)
+
+    def __init__(self, sessao):
+        '''
+        Construtor.
+
+        Parâmetros
+        ==========
+        sessao [Session] -- sessão.
+        '''
+        self.sessao = sessao
+        self.tabelas = {m: TabelaEmMemoria(sessao, m) for m in self.MODELOS}
+
+    def adicionar(self, linha):
+        '''
+        Adiciona uma linha do arquivo csv.
+
+        Parâmetros
+        ==========
+        linha [Dict] -- linha do arquivo csv.
+
+        Retorno
+        =======
+        int -- id da feira livre.
+
+        Exceções/Erros
+        ==============
+        ViolacaoIndiceUnico
+        CoordenadaInvalida
+        '''
+        return self.adicionar_json(converter_linha_csv(linha))
+
+    def adicionar_json(self, json):
+        '''
+        Adiciona uma feira livre já convertida por converter_linha_csv.
+
+        Parâmetros
+        ==========
+        json [Dict] -- json contendo as informações da feira livre.
+
+        Retorno
+        =======
+        int -- id da feira livre.
+
+        Exceções/Erros
+        ==============
+        ViolacaoIndiceUnico
+        '''
+        endereco_id = resolver_endereco(self.tabelas, json)
+        return self.tabelas[FeiraLivre] \
+            .buscar_ou_criar(identificador=json['identificador'],
+                             nome=json['nome'],
+                             registro=json['registro'],
+                             endereco_id=endereco_id)
+
+    def gravar(self, commit=True):
+        '''
+        Grava as novas linhas de todas as tabelas e faz commit na sessão.
+        Sem commit, as linhas gravadas deixam a memória e a importação \
+        pode continuar na mesma transação.
+        Em caso de erro, desfaz a transação.
+
+        Parâmetros
+        ==========
+        commit [bool] -- informa se deve ser feito commit. (default=True)
+        '''
+        try:
+            for modelo in self.MODELOS:
+                self.tabelas[modelo].gravar(self.sessao)
+            if commit:
+                self.sessao.commit()
+        except Exception as e:
+            self.sessao.rollback()
+            raise e
+
+
+class AtualizadorLote:
+    '''
+    Insere ou atualiza, pelo registro, um lote de feiras livres recebidas \
+    pela API.
+    Subprefeituras, distritos, regiões, bairros e logradouros são \
+    carregados de uma só vez; endereços e feiras livres, apenas os que \
+    podem conflitar com o lote. As feiras livres são resolvidas em \
+    memória e gravadas apenas em gravar, tabela a tabela, em uma única \
+    transação.
+
+    Atributos
+    ==========
+    sessao [Session] -- sessão.
+    tabelas [Dict] -- TabelaEmMemoria de cada modelo.
+    registros [Set] -- registros das feiras livres já adicionadas ao lote.
+    removidos [Set] -- registros das feiras livres a serem removidas.
+    '''
+    MODELOS = ImportadorLote.MODELOS
+
+    def __init__(self, sessao, itens):
+        '''
+        Construtor.
+
+        Parâmetros
+        ==========
+        sessao [Session] -- sessão.
+        itens [List(Dict)] -- json das feiras livres do lote.
+        '''
+        self.sessao = sessao
+        self.registros = set()
+        self.removidos = set()
+        logradouros = {i['logradouro'] for i in itens}
+        filtros = {Endereco: Endereco.logradouro_id.in_(
+                       select(Logradouro.id)
+                       .where(Logradouro.nome.in_(logradouros))),
+                   FeiraLivre: FeiraLivre.registro.in_(
+                       {i['registro'] for i in itens})}
+        self.tabelas = {m: TabelaEmMemoria(sessao, m, filtros.get(m))
+                        for m in self.MODELOS}
+
+    def adicionar(self, json):
+        '''
+        Adiciona uma feira livre ao lote, criando-a ou alterando a feira \
+        livre de mesmo registro.
+        Se houver violação de índice único, nenhuma linha da feira livre \
+        é mantida.
+
+        Parâmetros
+        ==========
+        json [Dict] -- json contendo as informações da feira livre.
+
+        Retorno
+        =======
+        str -- 'criada', 'alterada' ou 'inalterada'.
+
+        Exceções/Erros
+        ==============
+        ViolacaoIndiceUnico
+        '''
+        if json['registro'] in self.registros:
+            raise ViolacaoIndiceUnico('Feira livre com registro {0} '
+                                      'repetida no lote.'
+                                      .format(json['registro']))
+        marcas = {m: self.tabelas[m].marcar() for m in self.MODELOS}
+        try:
+            situacao = self.resolver(json)
+        except ViolacaoIndiceUnico as erro:
+            for modelo, marca in marcas.items():
+                self.tabelas[modelo].desfazer(marca)
+            raise erro
+        self.registros.add(json['registro'])
+        return situacao
+
+    def resolver(self, json):
+        '''
+        Resolve, em memória, as entidades da feira livre.
+
+        Parâmetros
+        ==========
+        json [Dict] -- json contendo as informações da feira livre.
+
+        Retorno
+        =======
+        str -- 'criada', 'alterada' ou 'inalterada'.
+
+        Exceções/Erros
+        ==============
+        ViolacaoIndiceUnico
+        '''
+        enderecos = self.tabelas[Endereco]
+        alteracoes = len(enderecos.historico)
+        endereco_id = resolver_endereco(self.tabelas, json, alterar=True)
+        endereco_alterado = len(enderecos.historico) > alteracoes
+        feiras_livres = self.tabelas[FeiraLivre]
+        dados = {'identificador': json['identificador'],
+                 'nome': json['nome'],
+                 'registro': json['registro'],
+                 'endereco_id': endereco_id}
+        identificador = feiras_livres.buscar_id(registro=json['registro'])
+        if identificador is None:
+            feiras_livres.buscar_ou_criar(**dados)
+            return 'criada'
+        if feiras_livres.alterar(identificador, **dados) or \
+                endereco_alterado:
+            return 'alterada'
+        return 'inalterada'
+
+    def remover(self, registro):
+        '''
+        Marca a feira livre de registro informado para ser removida.
+
+        Parâmetros
+        ==========
+        registro [str] -- registro da feira livre.
+        '''
+        self.removidos.add(registro)
+
+    def gravar(self, commit=True):
+        '''
+        Grava as novas linhas e as alterações de todas as tabelas, remove \
+        as feiras livres marcadas e faz commit na sessão.
+        Em caso de erro, desfaz a transação.
+
+        Parâmetros
+        ==========
+        commit [bool] -- informa se deve ser feito commit. (default=True)
+        '''
+        try:
+            for modelo in self.MODELOS:
+                self.tabelas[modelo].gravar(self.sessao)
+            if len(self.removidos) > 0:
+                self.sessao.execute(delete(FeiraLivre.__table__)
+                                    .where(FeiraLivre.registro
+                                           .in_(self.removidos)))
+            if commit:
+                self.sessao.commit()
+        except Exception as e:
+            self.sessao.rollback()
+            raise e
+
+
+def calcular_hash_linha(linha):
+    '''
+    Calcula o hash do conteúdo de uma linha do arquivo csv, independente \
+    da ordem das colunas.
+
+    Parâmetros
+    ==========
+    linha [Dict] -- linha do arquivo csv.
+
+    Retorno
+    =======
+    str -- hash (sha1) da linha.
+    '''
+    conteudo = json.dumps(linha, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(conteudo.encode('utf-8')).hexdigest()
+
+
+class SincronizadorCsv:
+    '''
+    Sincroniza a base de dados com o arquivo csv de forma incremental, \
+    pelo REGISTRO das feiras livres.
+    O hash de cada linha é comparado com o hash gravado na sincronização \
+    anterior (HashImportacao); apenas as feiras livres novas, alteradas \
+    ou ausentes do arquivo são inseridas, alteradas ou removidas, em uma \
+    única transação.
+    Feiras livres que não foram importadas por sincronização não são \
+    removidas.
+
+    Atributos
+    ==========
+    sessao [Session] -- sessão.
+    hashes [TabelaEmMemoria] -- hashes gravados na sincronização anterior.
+    resumo [Dict] -- quantidade de feiras livres em cada situação.
+    erros [List(str)] -- mensagens das linhas que não foram sincronizadas.
+    '''
+    def __init__(self, sessao):
+        '''
+        Construtor.
+
+        Parâmetros
+        ==========
+        sessao [Session] -- sessão.
+        '''
+        self.sessao = sessao
+        self.hashes = TabelaEmMemoria(sessao, HashImportacao)
+        self.resumo = dict.fromkeys(('criada', 'alterada', 'inalterada',
+                                     'removida', 'erro'), 0)
+        self.erros = list()
+
+    def sincronizar(self, linhas):
+        '''
+        Sincroniza a base de dados com as linhas do arquivo csv e faz \
+        commit na sessão.
+
+        Parâmetros
+        ==========
+        linhas [Iterable(Dict)] -- linhas do arquivo csv.
+
+        Retorno
+        =======
+        Dict -- quantidade de feiras livres em cada situação.
+        '''
+        gravados = {linha['registro']: linha['hash']
+                    for linha in self.hashes.linhas_id.values()}
+        alteradas = list()
+        encontrados = set()
+        for numero, linha in enumerate(linhas, 2):
+            registro = linha['REGISTRO']
+            encontrados.add(registro)
+            hash_linha = calcular_hash_linha(linha)
+            if gravados.get(registro) == hash_linha:
+                self.resumo['inalterada'] += 1
+                continue
+            try:
+                alteradas.append((numero, converter_linha_csv(linha),
+                                  hash_linha))
+            except CoordenadaInvalida as erro:
+                self.registrar_erro(numero, erro)
+        atualizador = AtualizadorLote(self.sessao,
+                                      [i for _, i, _ in alteradas])
+        for numero, item, hash_linha in alteradas:
+            try:
+                self.resumo[atualizador.adicionar(item)] += 1
+            except ViolacaoIndiceUnico as erro:
+                self.registrar_erro(numero, erro)
+                continue
+            identificador = self.hashes.buscar_id(registro=item['registro'])
+            if identificador is None:
+                self.hashes.buscar_ou_criar(registro=item['registro'],
+                                            hash=hash_linha)
+            else:
+                self.hashes.alterar(identificador, registro=item['registro'],
+                                    hash=hash_linha)
+        removidos = set(gravados.keys()).difference(encontrados)
+        for registro in removidos:
+            atualizador.remover(registro)
+        self.resumo['removida'] = len(removidos)
+        try:
+            atualizador.gravar(commit=False)
+            self.hashes.gravar(self.sessao)
+            if len(removidos) > 0:
+                self.sessao.execute(delete(HashImportacao.__table__)
+                                    .where(HashImportacao.registro
+                                           .in_(removidos)))
+            self.sessao.commit()
+        except Exception as e:
+            self.sessao.rollback()
+            raise e
+        return self.resumo
+
+    def registrar_erro(self, numero, erro):
+        '''
+        Registra uma linha do arquivo csv que não foi sincronizada.
+
+        Parâmetros
+        ==========
+        numero [int] -- número da linha no arquivo csv.
+        erro [Exception] -- erro encontrado.
+        '''
+        self.resumo['erro'] += 1
+        self.erros.append('Linha {0}: {1}'.format(numero, erro))
@@ -0,0 +1,143 @@
+''' Módulo responsável pela instrumentação das instruções SQL executadas \
+em cada requisição. '''
+
+import threading
+import time
+from flask import g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class InstrumentacaoSql:
+    '''
+    Conta e mede as instruções SQL executadas em cada requisição, por \
+    meio dos eventos de execução do SQLAlchemy.
+    Cada resposta informa os totais da requisição no cabeçalho \
+    Server-Timing, que também são registrados no log de requisições e \
+    nas métricas, e as instruções com duração a partir de \
+    SQL_LENTO_LIMITE_MS são registradas no log da aplicação.
+
+    Atributos
+    ==========
+    app [Flask] -- aplicação.
+    limite_lento [float] -- duração, em milissegundos, a partir da qual \
+    uma instrução é registrada no log ou None para não registrar.
+    instrucoes_lentas [int] -- quantidade de instruções registradas no log.
+    '''
+    CONTROLE_TRANSACAO = ('BEGIN', 'SAVEPOINT', 'RELEASE', 'ROLLBACK')
+
+    def __init__(self, app=None):
+        '''
+        Construtor.
+
+        Parâmetros
+        ==========
+        app [Flask] -- aplicação. (default=None)
+        '''
+        self.app = None
+        self.limite_lento = None
+        self.instrucoes_lentas = 0
+        self.trava = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        '''
+        Registra os eventos de execução do SQLAlchemy e os hooks de \
+        início e fim de requisição na aplicação.
+        Nada é registrado se INSTRUMENTACAO_SQL é False.
+
+        Parâmetros
+        ==========
+        app [Flask] -- aplicação.
+        '''
+        self.app = app
+        if not app.config.get('INSTRUMENTACAO_SQL', True):
+            return
+        self.limite_lento = app.config.get('SQL_LENTO_LIMITE_MS')
+        event.listen(Engine, 'before_cursor_execute', self.iniciar_instrucao)
+        event.listen(Engine, 'after_cursor_execute', self.finalizar_instrucao)
+        app.before_request(self.iniciar)
+        app.after_request(self.informar)
+
+    def iniciar_instrucao(self, conexao, cursor, instrucao, parametros,
+                          contexto, executemany):
+        '''
+        Marca o início da execução de uma instrução.
+
+        Parâmetros
+        ==========
+        conexao [Connection] -- conexão.
+        cursor -- cursor do driver.
+        instrucao [str] -- instrução SQL.
+        parametros -- parâmetros da instrução.
+        contexto [ExecutionContext] -- contexto de execução.
+        executemany [bool] -- se a instrução é executada para vários \
+        conjuntos de parâmetros.
+        '''
+        conexao.info['inicio_instrucao'] = time.perf_counter()
+
+    def finalizar_instrucao(self, conexao, cursor, instrucao, parametros,
+                            contexto, executemany):
+        '''
+        Contabiliza a instrução executada na requisição e a registra no \
+        log se sua duração atinge o limite.
+        Apenas instruções executadas durante requisições são \
+        contabilizadas, exceto as de controle de transação.
+
+        Parâmetros
+        ==========
+        conexao [Connection] -- conexão.
+        cursor -- cursor do driver.
+        instrucao [str] -- instrução SQL.
+        parametros -- parâmetros da instrução.
+        contexto [ExecutionContext] -- contexto de execução.
+        executemany [bool] -- se a instrução é executada para vários \
+        conjuntos de parâmetros.
+        '''
+        duracao = time.perf_counter() - conexao.info.pop('inicio_instrucao',
+                                                        time.perf_counter())
+        if not has_request_context() or \
+                instrucao.startswith(self.CONTROLE_TRANSACAO):
+            return
+        g.instrucoes_sql = g.get('instrucoes_sql', 0) + 1
+        g.tempo_sql = g.get('tempo_sql', 0.0) + duracao
+        if self.limite_lento is not None and \
+                duracao * 1000 >= self.limite_lento:
+            with self.trava:
+                self.instrucoes_lentas += 1
+            self.app.logger.warning('SQL lento (%.3f ms): %s',
+                                    duracao * 1000, instrucao,
+                                    extra={'sql': instrucao,
+                                           'latencia_ms': round(duracao *
+                                                                1000, 3)})
+
+    def iniciar(self):
+        ''' Zera os totais da requisição. '''
+        g.inicio_instrumentacao = time.perf_counter()
+        g.instrucoes_sql = 0
+        g.tempo_sql = 0.0
+
+    def informar(self, resposta):
+        '''
+        Informa os totais da requisição no cabeçalho Server-Timing.
+        Instruções executadas durante o envio de respostas em partes não \
+        são incluídas.
+
+        Parâmetros
+        ==========
+        resposta [Response] -- resposta da requisição.
+
+        Retorno
+        =======
+        Response -- a mesma resposta.
+        '''
+        inicio = g.get('inicio_instrumentacao', time.perf_counter())
+        resposta.headers['Server-Timing'] = \
+            'sql;dur={0:.3f}, sql-instrucoes;desc="{1}", app;dur={2:.3f}' \
+            .format(g.get('tempo_sql', 0.0) * 1000, g.get('instrucoes_sql', 0),
+                    (time.perf_counter() - inicio) * 1000)
+        return resposta
+
+
+instrumentacao_sql = InstrumentacaoSql()
@@ -0,0 +1,154 @@
+''' Módulo responsável pelo log das requisições da aplicação. '''
+
+import atexit
+import json
+import logging
+import queue
+import random
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from flask import g, request
+
+
+class FormatadorEstruturado(logging.Formatter):
+    '''
+    Formata os registros de log de requisições como uma linha json.
+    A formatação é feita pela thread que escreve o log, fora da requisição.
+    '''
+    CAMPOS = ('metodo', 'caminho', 'parametros', 'endereco_remoto', 'status',
+              'latencia_ms', 'tamanho', 'instrucoes_sql', 'sql_ms', 'sql',
+              'corpo')
+
+    def format(self, registro):
+        '''
+        Formata o registro de log.
+
+        Parâmetros
+        ==========
+        registro [LogRecord] -- registro de log.
+
+        Retorno
+        =======
+        str -- registro formatado como json.
+        '''
+        dados = {'data': self.formatTime(registro),
+                 'nivel': registro.levelname}
+        for campo in self.CAMPOS:
+            if hasattr(registro, campo):
+                dados[campo] = getattr(registro, campo)
+        if not hasattr(registro, 'metodo'):
+            dados['mensagem'] = registro.getMessage()
+        return json.dumps(dados, ensure_ascii=False)
+
+
+class LogRequisicoes:
+    '''
+    Registra cada requisição atendida pela aplicação (método, caminho, \
+    status, latência, tamanho, instruções SQL e, por amostragem, o corpo \
+    da resposta).
+    Os registros são enfileirados na thread da requisição e escritos \
+    por uma thread em segundo plano (QueueHandler/QueueListener).
+
+    Atributos
+    ==========
+    app [Flask] -- aplicação.
+    amostragem_corpo [float] -- fração das respostas de sucesso cujo \
+    corpo é registrado. Respostas de erro têm o corpo sempre registrado.
+    listener [QueueListener] -- thread que escreve os registros.
+    '''
+    def __init__(self, app=None):
+        '''
+        Construtor.
+
+        Parâmetros
+        ==========
+        app [Flask] -- aplicação. (default=None)
+        '''
+        self.app = None
+        self.amostragem_corpo = 0.0
+        self.listener = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        '''
+        Registra os hooks de início e fim de requisição na aplicação.
+
+        Parâmetros
+        ==========
+        app [Flask] -- aplicação.
+        '''
+        self.app = app
+        self.amostragem_corpo = app.config.get('LOG_AMOSTRAGEM_CORPO', 0.0)
+        app.before_request(self.iniciar)
+        app.after_request(self.registrar)
+
+    def iniciar_escrita(self):
+        '''
+        Direciona o log da aplicação para o arquivo LOG_ARQUIVO, com \
+        rotação a cada LOG_TAMANHO_MAXIMO bytes, por meio de uma fila \
+        consumida em segundo plano.
+        '''
+        configuracao = self.app.config
+        arquivo = RotatingFileHandler(
+            configuracao.get('LOG_ARQUIVO', 'log.txt'),
+            maxBytes=configuracao.get('LOG_TAMANHO_MAXIMO', 10 * 1024 * 1024),
+            backupCount=configuracao.get('LOG_QUANTIDADE_ARQUIVOS', 5),
+            encoding='utf-8')
+        arquivo.setFormatter(FormatadorEstruturado())
+        fila = queue.Queue(-1)
+        handler = QueueHandler(fila)
+        handler.setLevel(logging.INFO)
+        self.app.logger.addHandler(handler)
+        self.app.logger.setLevel(logging.INFO)
+        self.listener = QueueListener(fila, arquivo,
+                                      respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.parar_escrita)
+
+    def parar_escrita(self):
+        ''' Escreve os registros pendentes e encerra a thread de escrita. '''
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def iniciar(self):
+        ''' Marca o início do atendimento da requisição. '''
+        g.inicio_requisicao = time.perf_counter()
+
+    def registrar(self, resposta):
+        '''
+        Registra a requisição atendida.
+
+        Parâmetros
+        ==========
+        resposta [Response] -- resposta da requisição.
+
+        Retorno
+        =======
+        Response -- a mesma resposta.
+        '''
+        nivel = logging.ERROR if resposta.status_code >= 400 else logging.INFO
+        logger = self.app.logger
+        if not logger.isEnabledFor(nivel):
+            return resposta
+        inicio = g.get('inicio_requisicao', time.perf_counter())
+        extra = {'metodo': request.method,
+                 'caminho': request.path,
+                 'parametros': request.query_string.decode('utf-8',
+                                                           'replace'),
+                 'endereco_remoto': request.remote_addr,
+                 'status': resposta.status_code,
+                 'latencia_ms': round((time.perf_counter() - inicio) * 1000,
+                                      3),
+                 'tamanho': resposta.content_length}
+        if 'instrucoes_sql' in g:
+            extra['instrucoes_sql'] = g.instrucoes_sql
+            extra['sql_ms'] = round(g.tempo_sql * 1000, 3)
+        if not resposta.is_streamed and \
+                (nivel == logging.ERROR or
+                 random.random() < self.amostragem_corpo):
+            extra['corpo'] = resposta.get_data(as_text=True)
+        logger.log(nivel, '%s %s - %s', request.method, request.path,
+                   resposta.status_code, extra=extra)
+        return resposta
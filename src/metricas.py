@@ -0,0 +1,472 @@
+''' Módulo responsável pelas métricas da aplicação no formato do \
+Prometheus. '''
+
+import atexit
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+from flask import g, request
+
+INTERVALOS_DURACAO = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                      0.5, 1, 2.5, 5, 10)
+INTERVALOS_TAMANHO = (100, 1000, 10000, 100000, 1000000, 10000000)
+METRICAS = {
+    'feiraslivresapi_requisicoes_total':
+        ('counter', 'Quantidade de requisições atendidas.', None),
+    'feiraslivresapi_requisicao_duracao_segundos':
+        ('histogram', 'Duração do atendimento das requisições.',
+         INTERVALOS_DURACAO),
+    'feiraslivresapi_resposta_tamanho_bytes':
+        ('histogram', 'Tamanho do corpo das respostas (exceto as enviadas '
+                      'em partes).', INTERVALOS_TAMANHO),
+    'feiraslivresapi_sql_duracao_segundos':
+        ('histogram', 'Tempo das instruções SQL de cada requisição.',
+         INTERVALOS_DURACAO),
+    'feiraslivresapi_sql_instrucoes_total':
+        ('counter', 'Quantidade de instruções SQL executadas.', None),
+    'feiraslivresapi_sql_instrucoes_lentas_total':
+        ('counter', 'Quantidade de instruções SQL a partir de '
+                    'SQL_LENTO_LIMITE_MS.', None),
+    'feiraslivresapi_cache_consultas_total':
+        ('counter', 'Quantidade de consultas aos caches.', None),
+    'feiraslivresapi_cache_taxa_acerto':
+        ('gauge', 'Fração das consultas aos caches encontradas no cache.',
+         None)}
+
+
+def criar_fragmento():
+    '''
+    Cria um conjunto vazio de amostras.
+
+    Retorno
+    =======
+    Dict -- contadores, indexados por (nome, rótulos), e histogramas, \
+    indexados por (nome, rótulos), com a quantidade de cada intervalo, \
+    a do intervalo +Inf e a soma das observações.
+    '''
+    return {'contadores': dict(), 'histogramas': dict()}
+
+
+def somar_fragmento(destino, origem):
+    '''
+    Soma as amostras de um conjunto a outro.
+
+    Parâmetros
+    ==========
+    destino [Dict] -- conjunto que recebe as amostras.
+    origem [Dict] -- conjunto somado.
+    '''
+    contadores = destino['contadores']
+    for chave, valor in list(origem['contadores'].items()):
+        contadores[chave] = contadores.get(chave, 0) + valor
+    histogramas = destino['histogramas']
+    for chave, valores in list(origem['histogramas'].items()):
+        atual = histogramas.get(chave)
+        if atual is None:
+            histogramas[chave] = list(valores)
+        else:
+            for i, valor in enumerate(valores):
+                atual[i] += valor
+
+
+def serializar_fragmento(fragmento):
+    '''
+    Converte um conjunto de amostras em json.
+
+    Parâmetros
+    ==========
+    fragmento [Dict] -- conjunto de amostras.
+
+    Retorno
+    =======
+    str -- json do conjunto.
+    '''
+    return json.dumps({tipo: [[nome, list(rotulos), valor]
+                              for (nome, rotulos), valor in amostras.items()]
+                       for tipo, amostras in fragmento.items()})
+
+
+def desserializar_fragmento(texto):
+    '''
+    Converte o json gerado por serializar_fragmento em um conjunto de \
+    amostras.
+
+    Parâmetros
+    ==========
+    texto [str] -- json do conjunto.
+
+    Retorno
+    =======
+    Dict -- conjunto de amostras.
+    '''
+    return {tipo: {(nome, tuple(tuple(i) for i in rotulos)): valor
+                   for nome, rotulos, valor in amostras}
+            for tipo, amostras in json.loads(texto).items()}
+
+
+def formatar_rotulos(rotulos):
+    '''
+    Formata os rótulos de uma amostra no formato do Prometheus.
+
+    Parâmetros
+    ==========
+    rotulos [Tuple(Tuple(str, str))] -- nome e valor de cada rótulo.
+
+    Retorno
+    =======
+    str -- rótulos formatados, ex.: {metodo="GET",rota="/feiras"}.
+    '''
+    if len(rotulos) == 0:
+        return ''
+    return '{' + ','.join('{0}="{1}"'.format(
+        nome, str(valor).replace('\\', '\\\\').replace('"', '\\"')
+                        .replace('\n', '\\n'))
+        for nome, valor in rotulos) + '}'
+
+
+def formatar_numero(valor):
+    '''
+    Formata um valor de amostra no formato do Prometheus.
+
+    Parâmetros
+    ==========
+    valor [float] -- valor.
+
+    Retorno
+    =======
+    str -- valor formatado.
+    '''
+    if valor == int(valor):
+        return str(int(valor))
+    return repr(float(valor))
+
+
+class RegistroMetricas:
+    '''
+    Registra as métricas das requisições: quantidade por rota, método e \
+    status, histogramas de duração, de tamanho da resposta e de tempo \
+    SQL, quantidade de instruções SQL e consultas aos caches.
+    Cada thread acumula suas amostras em um conjunto próprio, sem trava; \
+    a trava é usada apenas ao criar o conjunto de uma thread e ao \
+    consolidar os conjuntos. Os conjuntos de threads encerradas são \
+    incorporados à base a cada METRICAS_INTERVALO_GRAVACAO segundos.
+    Com METRICAS_DIRETORIO, cada processo grava suas amostras no \
+    diretório no mesmo intervalo e ao terminar; GET /metrics soma as \
+    amostras de todos os processos.
+
+    Atributos
+    ==========
+    app [Flask] -- aplicação.
+    diretorio [str] -- diretório das amostras dos processos ou None.
+    intervalo [float] -- intervalo, em segundos, entre consolidações.
+    base [Dict] -- amostras consolidadas.
+    fragmentos [List(Tuple(Thread, Dict))] -- amostras de cada thread.
+    coletores [List(Callable)] -- funções que retornam as amostras de \
+    contadores mantidos por outros componentes.
+    '''
+    def __init__(self, app=None):
+        '''
+        Construtor.
+
+        Parâmetros
+        ==========
+        app [Flask] -- aplicação. (default=None)
+        '''
+        self.app = None
+        self.diretorio = None
+        self.intervalo = 5
+        self.base = criar_fragmento()
+        self.fragmentos = list()
+        self.coletores = list()
+        self.locais = threading.local()
+        self.trava = threading.Lock()
+        self.proxima_consolidacao = time.monotonic()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        '''
+        Registra os hooks de início e fim de requisição na aplicação.
+        Nada é registrado se METRICAS é False.
+
+        Parâmetros
+        ==========
+        app [Flask] -- aplicação.
+        '''
+        self.app = app
+        if not app.config.get('METRICAS', True):
+            return
+        self.diretorio = app.config.get('METRICAS_DIRETORIO')
+        self.intervalo = app.config.get('METRICAS_INTERVALO_GRAVACAO',
+                                        self.intervalo)
+        if self.diretorio is not None:
+            os.makedirs(self.diretorio, exist_ok=True)
+            atexit.register(self.consolidar)
+        app.before_request(self.iniciar)
+        app.after_request(self.observar_resposta)
+        app.teardown_request(self.registrar)
+
+    def registrar_coletor(self, coletor):
+        '''
+        Registra uma função que retorna as amostras de contadores \
+        mantidos por outro componente.
+
+        Parâmetros
+        ==========
+        coletor [Callable] -- função que retorna uma lista de \
+        Tuple(str, Tuple, float): nome, rótulos e valor de cada amostra.
+        '''
+        self.coletores.append(coletor)
+
+    def registrar_cache(self, nome, cache):
+        '''
+        Registra os acertos e falhas de um cache.
+
+        Parâmetros
+        ==========
+        nome [str] -- nome do cache nas métricas.
+        cache [CacheDimensoes|CacheRespostas] -- cache, com os atributos \
+        acertos e falhas.
+        '''
+        metrica = 'feiraslivresapi_cache_consultas_total'
+        self.registrar_coletor(lambda: [
+            (metrica, (('cache', nome), ('resultado', 'acerto')),
+             cache.acertos),
+            (metrica, (('cache', nome), ('resultado', 'falha')),
+             cache.falhas)])
+
+    def obter_fragmento(self):
+        '''
+        Recupera o conjunto de amostras da thread atual, criando-o na \
+        primeira requisição da thread.
+
+        Retorno
+        =======
+        Dict -- conjunto de amostras.
+        '''
+        fragmento = getattr(self.locais, 'fragmento', None)
+        if fragmento is None:
+            fragmento = criar_fragmento()
+            self.locais.fragmento = fragmento
+            with self.trava:
+                self.fragmentos.append((threading.current_thread(),
+                                        fragmento))
+        return fragmento
+
+    def incrementar(self, nome, rotulos, valor=1):
+        '''
+        Incrementa um contador na thread atual.
+
+        Parâmetros
+        ==========
+        nome [str] -- nome da métrica.
+        rotulos [Tuple(Tuple(str, str))] -- rótulos da amostra.
+        valor [float] -- incremento. (default=1)
+        '''
+        contadores = self.obter_fragmento()['contadores']
+        chave = (nome, rotulos)
+        contadores[chave] = contadores.get(chave, 0) + valor
+
+    def observar(self, nome, rotulos, valor):
+        '''
+        Registra uma observação em um histograma na thread atual.
+
+        Parâmetros
+        ==========
+        nome [str] -- nome da métrica.
+        rotulos [Tuple(Tuple(str, str))] -- rótulos da amostra.
+        valor [float] -- valor observado.
+        '''
+        intervalos = METRICAS[nome][2]
+        histogramas = self.obter_fragmento()['histogramas']
+        chave = (nome, rotulos)
+        valores = histogramas.get(chave)
+        if valores is None:
+            valores = [0] * (len(intervalos) + 2)
+            histogramas[chave] = valores
+        valores[bisect.bisect_left(intervalos, valor)] += 1
+        valores[-1] += valor
+
+    def iniciar(self):
+        ''' Marca o início do atendimento da requisição. '''
+        g.inicio_metricas = time.perf_counter()
+
+    def observar_resposta(self, resposta):
+        '''
+        Guarda o status e o tamanho da resposta da requisição.
+
+        Parâmetros
+        ==========
+        resposta [Response] -- resposta da requisição.
+
+        Retorno
+        =======
+        Response -- a mesma resposta.
+        '''
+        g.status_metricas = resposta.status_code
+        g.tamanho_metricas = None if resposta.is_streamed \
+            else resposta.content_length
+        return resposta
+
+    def registrar(self, erro=None):
+        '''
+        Registra as métricas da requisição ao final do atendimento, \
+        inclusive do envio de respostas em partes.
+
+        Parâmetros
+        ==========
+        erro [Exception] -- erro não tratado da requisição ou None. \
+        (default=None)
+        '''
+        if 'inicio_metricas' not in g:
+            return
+        duracao = time.perf_counter() - g.pop('inicio_metricas')
+        regra = request.url_rule.rule if request.url_rule is not None \
+            else 'desconhecida'
+        rotulos = (('metodo', request.method), ('rota', regra))
+        status = g.pop('status_metricas', 500)
+        tamanho = g.pop('tamanho_metricas', None)
+        self.incrementar('feiraslivresapi_requisicoes_total',
+                         rotulos + (('status', str(status)),))
+        self.observar('feiraslivresapi_requisicao_duracao_segundos', rotulos,
+                      duracao)
+        if tamanho is not None:
+            self.observar('feiraslivresapi_resposta_tamanho_bytes', rotulos,
+                          tamanho)
+        if 'instrucoes_sql' in g:
+            self.incrementar('feiraslivresapi_sql_instrucoes_total', rotulos,
+                             g.instrucoes_sql)
+            self.observar('feiraslivresapi_sql_duracao_segundos', rotulos,
+                          g.tempo_sql)
+        if time.monotonic() >= self.proxima_consolidacao:
+            self.consolidar()
+
+    def consolidar(self):
+        '''
+        Incorpora à base as amostras das threads encerradas e, com \
+        METRICAS_DIRETORIO, grava as amostras do processo no diretório.
+
+        Retorno
+        =======
+        Dict -- amostras do processo.
+        '''
+        with self.trava:
+            self.proxima_consolidacao = time.monotonic() + self.intervalo
+            ativos = list()
+            for thread, fragmento in self.fragmentos:
+                if thread.is_alive():
+                    ativos.append((thread, fragmento))
+                else:
+                    somar_fragmento(self.base, fragmento)
+            self.fragmentos = ativos
+            total = criar_fragmento()
+            somar_fragmento(total, self.base)
+            for _, fragmento in ativos:
+                somar_fragmento(total, fragmento)
+        for coletor in self.coletores:
+            for nome, rotulos, valor in coletor():
+                chave = (nome, rotulos)
+                total['contadores'][chave] = \
+                    total['contadores'].get(chave, 0) + valor
+        if self.diretorio is not None:
+            caminho = self.caminho_processo()
+            temporario = '{0}.{1}'.format(caminho, threading.get_ident())
+            with open(temporario, 'w') as arquivo:
+                arquivo.write(serializar_fragmento(total))
+            os.replace(temporario, caminho)
+        return total
+
+    def caminho_processo(self, pid=None):
+        '''
+        Recupera o caminho do arquivo de amostras de um processo.
+
+        Parâmetros
+        ==========
+        pid [int] -- id do processo ou None para o processo atual. \
+        (default=None)
+
+        Retorno
+        =======
+        str -- caminho do arquivo.
+        '''
+        return os.path.join(self.diretorio, 'metricas-{0}.json'
+                            .format(pid or os.getpid()))
+
+    def agregar(self):
+        '''
+        Soma as amostras do processo às dos demais processos gravadas em \
+        METRICAS_DIRETORIO.
+
+        Retorno
+        =======
+        Dict -- amostras de todos os processos.
+        '''
+        total = self.consolidar()
+        if self.diretorio is None:
+            return total
+        proprio = self.caminho_processo()
+        for caminho in glob.glob(os.path.join(self.diretorio,
+                                              'metricas-*.json')):
+            if caminho == proprio:
+                continue
+            try:
+                with open(caminho, 'r') as arquivo:
+                    somar_fragmento(total,
+                                    desserializar_fragmento(arquivo.read()))
+            except (OSError, ValueError):
+                continue
+        return total
+
+    def exportar(self):
+        '''
+        Exporta as métricas de todos os processos no formato texto do \
+        Prometheus.
+
+        Retorno
+        =======
+        str -- métricas.
+        '''
+        total = self.agregar()
+        amostras = dict()
+        for (nome, rotulos), valor in sorted(total['contadores'].items()):
+            amostras.setdefault(nome, list()).append((nome, rotulos, valor))
+        consultas = dict()
+        for _, rotulos, valor in amostras.get(
+                'feiraslivresapi_cache_consultas_total', list()):
+            rotulos = dict(rotulos)
+            consultas.setdefault(rotulos['cache'], dict())[
+                rotulos['resultado']] = valor
+        for cache, valores in sorted(consultas.items()):
+            quantidade = sum(valores.values())
+            if quantidade > 0:
+                amostras.setdefault('feiraslivresapi_cache_taxa_acerto',
+                                    list()).append(
+                    ('feiraslivresapi_cache_taxa_acerto', (('cache', cache),),
+                     valores.get('acerto', 0) / quantidade))
+        for (nome, rotulos), valores in sorted(total['histogramas'].items()):
+            limites = [formatar_numero(i) for i in METRICAS[nome][2]]
+            acumulado = 0
+            for limite, quantidade in zip(limites + ['+Inf'], valores):
+                acumulado += quantidade
+                amostras.setdefault(nome, list()).append(
+                    (nome + '_bucket', rotulos + (('le', limite),),
+                     acumulado))
+            amostras[nome].append((nome + '_sum', rotulos, valores[-1]))
+            amostras[nome].append((nome + '_count', rotulos, acumulado))
+        linhas = list()
+        for nome, (tipo, descricao, _) in METRICAS.items():
+            if nome not in amostras:
+                continue
+            linhas.append('# HELP {0} {1}'.format(nome, descricao))
+            linhas.append('# TYPE {0} {1}'.format(nome, tipo))
+            for amostra, rotulos, valor in amostras[nome]:
+                linhas.append('{0}{1} {2}'.format(amostra,
+                                                  formatar_rotulos(rotulos),
+                                                  formatar_numero(valor)))
+        return '\n'.join(linhas) + '\n'
+
+
+metricas = RegistroMetricas()
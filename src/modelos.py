@@ -1,11 +1,14 @@
 ''' Módulo responsável por definir os modelos que representam a base de \
 dados. '''
 
+import re
 from src.basedados import bd
 from src.excecoes import ViolacaoIndiceUnico
 from sqlalchemy import Column, Integer, String, Float
-from sqlalchemy import ForeignKey, UniqueConstraint
-from sqlalchemy.orm import relationship
+from sqlalchemy import ForeignKey, Index, UniqueConstraint
+from sqlalchemy import and_, or_, case, event, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import relationship, joinedload
 
 
 def converter_dict(elemento):
@@ -68,10 +71,80 @@ def buscar_ou_criar(sessao, modelo, commit=False, **kwargs):
         return instancia
 
 
+def criar_ou_buscar(sessao, modelo, **kwargs):
+    '''
+    Cria um elemento dadas suas informações, deixando a cargo da base de \
+    dados a verificação dos índices de chave única.
+    Caso a criação viole um índice de chave única, recupera o elemento \
+    existente com as mesmas informações.
+    A criação é feita em um SAVEPOINT, de modo que a falha não desfaz o \
+    restante da transação.
+    Se alguma coluna de índice de chave única não possuir valor, utiliza \
+    buscar_ou_criar, pois a base de dados não verifica índices com \
+    valores nulos.
+
+    Parâmetros
+    ==========
+    sessao [Session] -- sessão.
+    modelo [Modelo] -- modelo.
+    kwargs -- informações pelas qual a entidade será \
+    criada ou procurada.
+
+    Retorno
+    =======
+    instância do modelo que foi criada ou encontrada.
+
+    Exceções/Erros
+    ==============
+    ViolacaoIndiceUnico
+    '''
+    for indice in modelo.recuperar_indices_chave_unica():
+        if any(kwargs.get(coluna) is None for coluna in indice):
+            return buscar_ou_criar(sessao, modelo, **kwargs)
+    instancia = modelo(**kwargs)
+    try:
+        with sessao.begin_nested():
+            sessao.add(instancia)
+    except IntegrityError as erro:
+        mensagem = str(erro.orig)
+        if 'UNIQUE' not in mensagem:
+            raise erro
+        instancia = sessao.query(modelo).filter_by(**kwargs).first()
+        if instancia is not None:
+            return instancia
+        entidade, colunas = identificar_entidade_colunas(mensagem)
+        raise ViolacaoIndiceUnico('Um(a) novo(a) {0} deve conter valores '
+                                  'diferentes em {1}.'
+                                  .format(modelo.__table__.name,
+                                          ', '.join(colunas)))
+    return instancia
+
+
+def identificar_entidade_colunas(mensagem):
+    '''
+    Identifica qual a entidade (e suas colunas) que gerou um erro de \
+    índice único.
+
+    Parâmetros
+    ==========
+    mensagem [str] -- mensagem de erro de índice único.
+
+    Retorno
+    =======
+    Tuple(str, Tuple) -- contém a entidade e as colunas respectivamente.
+    '''
+    resultado = re.findall('[^.]*:? ([^.]*).([a-z0-9A-Z_][a-z0-9A-Z_]*),?', mensagem)
+    colunas = list()
+    for entidade, coluna in resultado:
+        colunas.append(coluna)
+    return (entidade, tuple(colunas))
+
+
 def verificar_violacao_indice_unico(sessao, modelo, **kwargs):
     '''
     Verifica se existe violação da restrição de índice único e quais \
     as colunas que estão relacionadas com essa violação.
+    Todos os índices são verificados em uma única consulta.
 
     Parâmetros
     ==========
@@ -86,53 +159,109 @@ def verificar_violacao_indice_unico(sessao, modelo, **kwargs):
     os nomes das colunas cujos valores violaram a restrição de índice.
     '''
     indices = modelo.recuperar_indices_chave_unica()
-    dados_indice = dict()
-    for i in indices:
-        if isinstance(i, list):
-            for indice in i:
-                if indice in kwargs:
-                    dados_indice[indice] = kwargs[indice]
-                else:
-                    dados_indice[indice] = None
-        else:
-            if i in kwargs:
-                dados_indice[i] = kwargs[i]
-            else:
-                dados_indice[i] = None
-        instancia = sessao.query(modelo).filter_by(**dados_indice).first()
-        if instancia is not None and isinstance(i, list):
-            return True, i
-        if instancia is not None:
-            return True, [i]
+    if len(indices) == 0:
+        return False, []
+    condicoes = [and_(*[getattr(modelo, coluna) == kwargs.get(coluna)
+                        for coluna in indice])
+                 for indice in indices]
+    violacoes = sessao.query(*[func.max(case((condicao, 1), else_=0))
+                               for condicao in condicoes]) \
+                      .select_from(modelo) \
+                      .filter(or_(*condicoes)) \
+                      .one()
+    for indice, violacao in zip(indices, violacoes):
+        if violacao:
+            return True, list(indice)
     return False, []
 
 
 class Modelo(bd.Model):
-    ''' Classe abstrata que deve ser estendida pelos modelos da aplicação. '''
+    '''
+    Classe abstrata que deve ser estendida pelos modelos da aplicação.
+
+    Atributos
+    ==========
+    indices_chave_unica [Tuple(Tuple(str))] -- colunas de cada índice \
+    de chave única, calculadas uma única vez quando o mapeamento \
+    do modelo é configurado.
+    '''
     __abstract__ = True
 
+    @property
+    def dict(self):
+        '''
+        Retorna a representação do objeto como um dict.
+
+        Retorno
+        =======
+        Dict -- representação do objeto como um dict.
+        '''
+        return self.criar_dict(converter_dict)
+
+    def criar_dict(self, converter):
+        '''
+        Retorna a representação do objeto como um dict, convertendo as \
+        entidades relacionadas com converter.
+        Deve ser implementado pelos modelos.
+
+        Parâmetros
+        ==========
+        converter [Callable] -- função que converte as entidades \
+        relacionadas em dict.
+
+        Retorno
+        =======
+        Dict -- representação do objeto como um dict.
+        '''
+        raise NotImplementedError
+
     @classmethod
-    def recuperar_indices_chave_unica(cls):
+    def calcular_indices_chave_unica(cls):
         '''
-        Recupera as colunas que pertencem a um índice de chave única.
+        Calcula as colunas que pertencem a um índice de chave única.
 
         Retorno
         =======
-        List [str, tuple(str)] -- nomes das colunas que pertencem a um \
-        índice de chave única.
+        Tuple(Tuple(str)) -- nomes das colunas de cada índice de chave única.
         '''
         indices_chave_unica = list()
         for coluna in cls.__table__.columns:
             if coluna.unique:
-                indices_chave_unica.append(coluna.name)
+                indices_chave_unica.append((coluna.name,))
         if hasattr(cls, '__table_args__'):
             for arg in cls.__table_args__:
                 if type(arg) is UniqueConstraint:
-                    varias_colunas = list()
-                    for coluna in arg.columns:
-                        varias_colunas.append(coluna.name)
-                    indices_chave_unica.append(varias_colunas)
-        return indices_chave_unica
+                    indices_chave_unica.append(tuple(coluna.name
+                                                     for coluna
+                                                     in arg.columns))
+        return tuple(indices_chave_unica)
+
+    @classmethod
+    def recuperar_indices_chave_unica(cls):
+        '''
+        Recupera as colunas que pertencem a um índice de chave única.
+
+        Retorno
+        =======
+        Tuple(Tuple(str)) -- nomes das colunas de cada índice de chave única.
+        '''
+        if 'indices_chave_unica' not in cls.__dict__:
+            cls.indices_chave_unica = cls.calcular_indices_chave_unica()
+        return cls.indices_chave_unica
+
+
+@event.listens_for(Modelo, 'mapper_configured', propagate=True)
+def registrar_indices_chave_unica(mapper, modelo):
+    '''
+    Calcula os índices de chave única do modelo quando seu mapeamento \
+    é configurado.
+
+    Parâmetros
+    ==========
+    mapper [Mapper] -- mapeamento do modelo.
+    modelo [Modelo] -- modelo.
+    '''
+    modelo.indices_chave_unica = modelo.calcular_indices_chave_unica()
 
 
 class Subprefeitura(Modelo):
@@ -150,11 +279,15 @@ class Subprefeitura(Modelo):
     codigo = Column(String(5), unique=True)
     nome = Column(String(80))
 
-    @property
-    def dict(self):
+    def criar_dict(self, converter):
         '''
         Retorna a representação do objeto como um dict.
 
+        Parâmetros
+        ==========
+        converter [Callable] -- função que converte as entidades \
+        relacionadas em dict.
+
         Retorno
         =======
         Dict -- representação do objeto como um dict.
@@ -180,20 +313,24 @@ class Distrito(Modelo):
     codigo = Column(String(5), unique=True)
     nome = Column(String(80))
     subprefeitura_id = Column(Integer, ForeignKey('Subprefeitura.id'))
-    subprefeitura = relationship('Subprefeitura', lazy='subquery')
+    subprefeitura = relationship('Subprefeitura')
 
-    @property
-    def dict(self):
+    def criar_dict(self, converter):
         '''
         Retorna a representação do objeto como um dict.
 
+        Parâmetros
+        ==========
+        converter [Callable] -- função que converte as entidades \
+        relacionadas em dict.
+
         Retorno
         =======
         Dict -- representação do objeto como um dict.
         '''
         return {'codigo': self.codigo,
                 'nome': self.nome,
-                'subprefeitura': converter_dict(self.subprefeitura)}
+                'subprefeitura': converter(self.subprefeitura)}
 
 
 class Regiao5(Modelo):
@@ -209,11 +346,15 @@ class Regiao5(Modelo):
     id = Column(Integer, primary_key=True)
     nome = Column(String(80), unique=True)
 
-    @property
-    def dict(self):
+    def criar_dict(self, converter):
         '''
         Retorna a representação do objeto como um dict.
 
+        Parâmetros
+        ==========
+        converter [Callable] -- função que converte as entidades \
+        relacionadas em dict.
+
         Retorno
         =======
         Dict -- representação do objeto como um dict.
@@ -234,11 +375,15 @@ class Regiao8(Modelo):
     id = Column(Integer, primary_key=True)
     nome = Column(String(80), unique=True)
 
-    @property
-    def dict(self):
+    def criar_dict(self, converter):
         '''
         Retorna a representação do objeto como um dict.
 
+        Parâmetros
+        ==========
+        converter [Callable] -- função que converte as entidades \
+        relacionadas em dict.
+
         Retorno
         =======
         Dict -- representação do objeto como um dict.
@@ -261,20 +406,24 @@ class Bairro(Modelo):
     id = Column(Integer, primary_key=True)
     nome = Column(String(80))
     distrito_id = Column(Integer, ForeignKey('Distrito.id'))
-    distrito = relationship('Distrito', lazy='subquery')
+    distrito = relationship('Distrito')
     __table_args__ = (UniqueConstraint('nome', 'distrito_id', name='bairro_UK'),)
 
-    @property
-    def dict(self):
+    def criar_dict(self, converter):
         '''
         Retorna a representação do objeto como um dict.
 
+        Parâmetros
+        ==========
+        converter [Callable] -- função que converte as entidades \
+        relacionadas em dict.
+
         Retorno
         =======
         Dict -- representação do objeto como um dict.
         '''
         return {'nome': self.nome,
-                'distrito': converter_dict(self.distrito)}
+                'distrito': converter(self.distrito)}
 
 
 class Logradouro(Modelo):
@@ -290,11 +439,15 @@ class Logradouro(Modelo):
     id = Column(Integer, primary_key=True)
     nome = Column(String(80), unique=True)
 
-    @property
-    def dict(self):
+    def criar_dict(self, converter):
         '''
         Retorna a representação do objeto como um dict.
 
+        Parâmetros
+        ==========
+        converter [Callable] -- função que converte as entidades \
+        relacionadas em dict.
+
         Retorno
         =======
         Dict -- representação do objeto como um dict.
@@ -330,15 +483,15 @@ class Endereco(Modelo):
     __tablename__ = 'Endereco'
     id = Column(Integer, primary_key=True)
     logradouro_id = Column(Integer, ForeignKey('Logradouro.id'))
-    logradouro = relationship('Logradouro', lazy='subquery')
+    logradouro = relationship('Logradouro')
     numero = Column(String(10))
     referencia = Column(String(255))
     bairro_id = Column(Integer, ForeignKey('Bairro.id'))
-    bairro = relationship('Bairro', lazy='subquery')
+    bairro = relationship('Bairro')
     regiao5_id = Column(Integer, ForeignKey('Regiao5.id'))
-    regiao5 = relationship('Regiao5', lazy='subquery')
+    regiao5 = relationship('Regiao5')
     regiao8_id = Column(Integer, ForeignKey('Regiao8.id'))
-    regiao8 = relationship('Regiao8', lazy='subquery')
+    regiao8 = relationship('Regiao8')
     latitude = Column(Float)
     longitude = Column(Float)
     setor_censitario = Column(String(50))
@@ -346,23 +499,29 @@ class Endereco(Modelo):
     __table_args__ = (UniqueConstraint('logradouro_id', 'bairro_id',
                                        'regiao5_id', 'regiao8_id',
                                        'numero', 'latitude', 'longitude',
-                                       name='endereco_UK'),)
+                                       name='endereco_UK'),
+                      Index('endereco_localizacao_IX',
+                            'latitude', 'longitude'))
 
-    @property
-    def dict(self):
+    def criar_dict(self, converter):
         '''
         Retorna a representação do objeto como um dict.
 
+        Parâmetros
+        ==========
+        converter [Callable] -- função que converte as entidades \
+        relacionadas em dict.
+
         Retorno
         =======
         Dict -- representação do objeto como um dict.
         '''
-        return {'logradouro': converter_dict(self.logradouro),
+        return {'logradouro': converter(self.logradouro),
                 'numero': self.numero,
                 'referencia': self.referencia,
-                'bairro': converter_dict(self.bairro),
-                'regiao5': converter_dict(self.regiao5),
-                'regiao8': converter_dict(self.regiao8),
+                'bairro': converter(self.bairro),
+                'regiao5': converter(self.regiao5),
+                'regiao8': converter(self.regiao8),
                 'latitude': self.latitude,
                 'longitude': self.longitude,
                 'setor_censitario': self.setor_censitario,
@@ -388,13 +547,19 @@ class FeiraLivre(Modelo):
     identificador = Column(Integer)
     nome = Column(String(80))
     registro = Column(String(50), unique=True)
-    endereco_id = Column(Integer, ForeignKey('Endereco.id'))
-    endereco = relationship('Endereco', lazy='subquery')
+    endereco_id = Column(Integer, ForeignKey('Endereco.id'), index=True)
+    endereco = relationship('Endereco')
 
-    @property
-    def dict(self):
+    def criar_dict(self, converter):
         '''
         Retorna a representação do objeto como um dict.
+        As entidades relacionadas devem ter sido carregadas com \
+        carregamento_feira_livre para evitar consultas adicionais.
+
+        Parâmetros
+        ==========
+        converter [Callable] -- função que converte as entidades \
+        relacionadas em dict.
 
         Retorno
         =======
@@ -403,4 +568,57 @@ class FeiraLivre(Modelo):
         return {'identificador': self.identificador,
                 'nome': self.nome,
                 'registro': self.registro,
-                'endereco': converter_dict(self.endereco)}
+                'endereco': converter(self.endereco)}
+
+
+class HashImportacao(Modelo):
+    '''
+    Representa o conteúdo, na última importação incremental, da linha do \
+    arquivo csv de uma feira livre.
+
+    Atributos
+    ==========
+    id [int] -- id do hash.
+    registro [str] -- registro da feira livre.
+    hash [str] -- hash (sha1) do conteúdo da linha do arquivo csv.
+    '''
+    __tablename__ = 'HashImportacao'
+    id = Column(Integer, primary_key=True)
+    registro = Column(String(50), unique=True)
+    hash = Column(String(40))
+
+    def criar_dict(self, converter):
+        '''
+        Retorna a representação do objeto como um dict.
+
+        Parâmetros
+        ==========
+        converter [Callable] -- função que converte as entidades \
+        relacionadas em dict.
+
+        Retorno
+        =======
+        Dict -- representação do objeto como um dict.
+        '''
+        return {'registro': self.registro,
+                'hash': self.hash}
+
+
+def carregamento_feira_livre():
+    '''
+    Retorna as opções de carregamento que trazem, junto com a feira livre \
+    e na mesma consulta, todas as entidades utilizadas por FeiraLivre.dict \
+    (endereço, logradouro, regiões, bairro, distrito e subprefeitura).
+    Deve ser utilizado por toda consulta cujo resultado será serializado.
+
+    Retorno
+    =======
+    List -- opções de carregamento para Query.options.
+    '''
+    endereco = joinedload(FeiraLivre.endereco)
+    return [endereco.joinedload(Endereco.logradouro),
+            endereco.joinedload(Endereco.regiao5),
+            endereco.joinedload(Endereco.regiao8),
+            endereco.joinedload(Endereco.bairro)
+                    .joinedload(Bairro.distrito)
+                    .joinedload(Distrito.subprefeitura)]
@@ -0,0 +1,199 @@
+''' Módulo responsável pela importação paralela do arquivo csv. '''
+
+import csv
+import io
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from src.excecoes import CoordenadaInvalida
+from src.importacao import ImportadorLote, converter_linha_csv
+
+FIM = None
+
+
+def ler_blocos(arquivo, tamanho_bloco):
+    '''
+    Lê o arquivo csv em blocos de linhas, sem interpretá-las.
+    Registros com quebras de linha entre aspas não são divididos entre \
+    blocos.
+
+    Parâmetros
+    ==========
+    arquivo [TextIO] -- arquivo csv, posicionado após o cabeçalho.
+    tamanho_bloco [int] -- quantidade mínima de linhas de cada bloco.
+
+    Retorno
+    =======
+    Generator(Tuple(int, str)) -- número da primeira linha do bloco no \
+    arquivo e texto do bloco.
+    '''
+    numero = 2
+    linhas = list()
+    entre_aspas = False
+    for linha in arquivo:
+        linhas.append(linha)
+        if linha.count('"') % 2 == 1:
+            entre_aspas = not entre_aspas
+        if len(linhas) >= tamanho_bloco and not entre_aspas:
+            yield numero, ''.join(linhas)
+            numero += len(linhas)
+            linhas = list()
+    if len(linhas) > 0:
+        yield numero, ''.join(linhas)
+
+
+def normalizar_bloco(cabecalho, numero, texto):
+    '''
+    Interpreta e normaliza um bloco de linhas do arquivo csv.
+    Executada pelos processos do pool.
+
+    Parâmetros
+    ==========
+    cabecalho [List(str)] -- nomes das colunas do arquivo csv.
+    numero [int] -- número da primeira linha do bloco no arquivo.
+    texto [str] -- texto do bloco.
+
+    Retorno
+    =======
+    List(Dict) -- json de cada feira livre do bloco (converter_linha_csv).
+
+    Exceções/Erros
+    ==============
+    CoordenadaInvalida -- com o número da linha inválida.
+    '''
+    leitor = csv.DictReader(io.StringIO(texto), fieldnames=cabecalho)
+    feiras_livres = list()
+    for linha in leitor:
+        try:
+            feiras_livres.append(converter_linha_csv(linha))
+        except CoordenadaInvalida as erro:
+            raise CoordenadaInvalida('Linha {0}: {1}'
+                                     .format(numero + leitor.line_num - 1,
+                                             erro))
+    return feiras_livres
+
+
+class ImportadorParalelo:
+    '''
+    Importa o arquivo csv em três estágios: a leitura em blocos, a \
+    interpretação e normalização dos blocos em um pool de processos e \
+    a gravação por um único escritor, que recebe os blocos, na ordem do \
+    arquivo, por uma fila limitada.
+    O escritor utiliza um ImportadorLote e grava cada bloco na mesma \
+    transação, com commit apenas ao final, mantendo um único escritor \
+    na base de dados.
+
+    Atributos
+    ==========
+    sessao [Session] -- sessão.
+    processos [int] -- quantidade de processos do pool.
+    tamanho_bloco [int] -- quantidade de linhas de cada bloco.
+    tamanho_fila [int] -- quantidade máxima de blocos normalizados \
+    aguardando o escritor.
+    '''
+    def __init__(self, sessao, processos=None, tamanho_bloco=5000,
+                 tamanho_fila=4):
+        '''
+        Construtor.
+
+        Parâmetros
+        ==========
+        sessao [Session] -- sessão.
+        processos [int] -- quantidade de processos do pool ou None para \
+        a quantidade de processadores. (default=None)
+        tamanho_bloco [int] -- quantidade de linhas de cada bloco. \
+        (default=5000)
+        tamanho_fila [int] -- quantidade máxima de blocos normalizados \
+        aguardando o escritor. (default=4)
+        '''
+        self.sessao = sessao
+        self.processos = processos or os.cpu_count() or 1
+        self.tamanho_bloco = tamanho_bloco
+        self.tamanho_fila = tamanho_fila
+
+    def importar(self, caminho_arquivo_csv):
+        '''
+        Importa o arquivo csv e faz commit na sessão.
+        Em caso de erro, desfaz a transação.
+
+        Parâmetros
+        ==========
+        caminho_arquivo_csv [str] -- caminho para o arquivo csv.
+
+        Retorno
+        =======
+        int -- quantidade de feiras livres importadas.
+
+        Exceções/Erros
+        ==============
+        ViolacaoIndiceUnico
+        CoordenadaInvalida
+        '''
+        fila = queue.Queue(self.tamanho_fila)
+        cancelado = threading.Event()
+        leitor = threading.Thread(target=self.distribuir,
+                                  args=(caminho_arquivo_csv, fila,
+                                        cancelado),
+                                  daemon=True)
+        leitor.start()
+        importador = ImportadorLote(self.sessao)
+        quantidade = 0
+        try:
+            while True:
+                bloco = fila.get()
+                if bloco is FIM:
+                    break
+                if isinstance(bloco, Exception):
+                    raise bloco
+                for feira_livre in bloco:
+                    importador.adicionar_json(feira_livre)
+                quantidade += len(bloco)
+                importador.gravar(commit=False)
+            importador.gravar()
+        except Exception as e:
+            self.sessao.rollback()
+            cancelado.set()
+            # Libera o leitor, que pode estar bloqueado na fila cheia
+            while leitor.is_alive():
+                try:
+                    fila.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            raise e
+        leitor.join()
+        return quantidade
+
+    def distribuir(self, caminho_arquivo_csv, fila, cancelado):
+        '''
+        Lê o arquivo em blocos, distribui os blocos entre os processos do \
+        pool e enfileira os blocos normalizados na ordem do arquivo.
+        Mantém no máximo dois blocos por processo em normalização.
+        Executada em uma thread separada do escritor.
+
+        Parâmetros
+        ==========
+        caminho_arquivo_csv [str] -- caminho para o arquivo csv.
+        fila [Queue] -- fila de blocos normalizados.
+        cancelado [Event] -- sinaliza que o escritor foi interrompido.
+        '''
+        try:
+            with open(caminho_arquivo_csv, 'r') as arquivo, \
+                    ProcessPoolExecutor(self.processos) as pool:
+                cabecalho = next(csv.reader(arquivo))
+                pendentes = deque()
+                for numero, texto in ler_blocos(arquivo, self.tamanho_bloco):
+                    if cancelado.is_set():
+                        break
+                    pendentes.append(pool.submit(normalizar_bloco,
+                                                 cabecalho, numero, texto))
+                    if len(pendentes) >= 2 * self.processos:
+                        fila.put(pendentes.popleft().result())
+                while len(pendentes) > 0 and not cancelado.is_set():
+                    fila.put(pendentes.popleft().result())
+                for pendente in pendentes:
+                    pendente.cancel()
+            fila.put(FIM)
+        except Exception as e:
+            fila.put(e)
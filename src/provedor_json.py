@@ -0,0 +1,236 @@
+''' Módulo responsável pela codificação json das respostas da aplicação. '''
+
+import json
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+def listar_codificadores_disponiveis():
+    '''
+    Lista os codificadores json cujas bibliotecas estão instaladas, do \
+    mais para o menos rápido.
+    json (biblioteca padrão) está sempre disponível; orjson e ujson \
+    dependem dos pacotes opcionais de mesmo nome.
+
+    Retorno
+    =======
+    List(str) -- nomes dos codificadores disponíveis.
+    '''
+    disponiveis = list()
+    if orjson is not None:
+        disponiveis.append('orjson')
+    if ujson is not None:
+        disponiveis.append('ujson')
+    disponiveis.append('json')
+    return disponiveis
+
+
+def converter_chave(chave):
+    '''
+    Converte a chave do dict em str, como json.dumps.
+
+    Parâmetros
+    ==========
+    chave -- chave do dict.
+
+    Retorno
+    =======
+    str -- chave convertida.
+    '''
+    if isinstance(chave, str):
+        return chave
+    if chave is True:
+        return 'true'
+    if chave is False:
+        return 'false'
+    if chave is None:
+        return 'null'
+    return repr(chave)
+
+
+def ordenar_chaves(obj):
+    '''
+    Recria os dicts do objeto com as chaves em str, na ordem de \
+    json.dumps com sort_keys: as chaves são ordenadas pelo valor original, \
+    de forma que ids numéricos ficam em ordem numérica, e não textual.
+
+    Parâmetros
+    ==========
+    obj -- objeto a ser codificado.
+
+    Retorno
+    =======
+    objeto com os dicts ordenados e chaves em str.
+    '''
+    if isinstance(obj, dict):
+        return {converter_chave(chave): ordenar_chaves(valor)
+                for chave, valor in sorted(obj.items(),
+                                           key=lambda item: item[0])}
+    if isinstance(obj, (list, tuple)):
+        return [ordenar_chaves(i) for i in obj]
+    return obj
+
+
+class ProvedorJson(DefaultJSONProvider):
+    '''
+    Provedor json da aplicação, que codifica as respostas com orjson ou \
+    ujson, quando instalados, ou com a biblioteca padrão.
+    As chaves continuam ordenadas e as respostas compactas, como no \
+    provedor padrão do Flask; chaves não str, como os ids das tabelas do \
+    formato normalizado, são ordenadas pelo valor, como em json.dumps.
+    orjson não escapa caracteres não ASCII: as mensagens em português \
+    são enviadas em UTF-8, sem sequências \\uXXXX, o que produz o mesmo \
+    conteúdo após a decodificação.
+    Chamadas com indentação (modo debug) usam sempre a biblioteca padrão.
+
+    Atributos
+    ==========
+    codificador [str] -- nome do codificador utilizado (orjson, ujson \
+    ou json).
+    '''
+    def __init__(self, app):
+        '''
+        Construtor.
+
+        Parâmetros
+        ==========
+        app [Flask] -- aplicação.
+
+        Exceções/Erros
+        ==============
+        ValueError -- se o codificador JSON_CODIFICADOR não está \
+        disponível.
+        '''
+        super().__init__(app)
+        self.codificador = self.escolher_codificador(
+            app.config.get('JSON_CODIFICADOR', 'auto'))
+
+    @staticmethod
+    def escolher_codificador(nome):
+        '''
+        Escolhe o codificador json.
+
+        Parâmetros
+        ==========
+        nome [str] -- nome do codificador ou 'auto' para o mais rápido \
+        disponível.
+
+        Retorno
+        =======
+        str -- nome do codificador.
+
+        Exceções/Erros
+        ==============
+        ValueError -- se o codificador não está disponível.
+        '''
+        disponiveis = listar_codificadores_disponiveis()
+        if nome == 'auto':
+            return disponiveis[0]
+        if nome not in disponiveis:
+            raise ValueError('Codificador json {0} indisponível. '
+                             'Disponíveis: {1}.'
+                             .format(nome, ', '.join(disponiveis)))
+        return nome
+
+    def codificar(self, obj):
+        '''
+        Codifica o objeto como json compacto.
+
+        Parâmetros
+        ==========
+        obj -- objeto a ser codificado.
+
+        Retorno
+        =======
+        bytes -- json do objeto, em UTF-8.
+        '''
+        if self.codificador == 'orjson':
+            if not self.sort_keys:
+                return orjson.dumps(obj, default=self.default,
+                                    option=orjson.OPT_NON_STR_KEYS)
+            try:
+                return orjson.dumps(obj, default=self.default,
+                                    option=orjson.OPT_SORT_KEYS)
+            except TypeError:
+                # OPT_SORT_KEYS ordenaria chaves não str como texto
+                # ({"10":..,"2":..}); são ordenadas antes pelo valor
+                return orjson.dumps(ordenar_chaves(obj), default=self.default)
+        if self.codificador == 'ujson':
+            return ujson.dumps(obj, default=self.default,
+                               ensure_ascii=self.ensure_ascii,
+                               sort_keys=self.sort_keys,
+                               escape_forward_slashes=False).encode('utf-8')
+        return json.dumps(obj, default=self.default,
+                          ensure_ascii=self.ensure_ascii,
+                          sort_keys=self.sort_keys,
+                          separators=(',', ':')).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        '''
+        Codifica o objeto como json.
+        Apenas chamadas sem argumentos além de separators usam o \
+        codificador escolhido, produzindo json compacto.
+
+        Parâmetros
+        ==========
+        obj -- objeto a ser codificado.
+        kwargs -- argumentos de json.dumps.
+
+        Retorno
+        =======
+        str -- json do objeto.
+        '''
+        if self.codificador == 'json' or set(kwargs) - {'separators'}:
+            return super().dumps(obj, **kwargs)
+        return self.codificar(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        '''
+        Decodifica o json.
+
+        Parâmetros
+        ==========
+        s [str|bytes] -- json.
+        kwargs -- argumentos de json.loads.
+
+        Retorno
+        =======
+        objeto decodificado.
+        '''
+        if self.codificador == 'orjson' and not kwargs:
+            return orjson.loads(s)
+        if self.codificador == 'ujson' and not kwargs:
+            return ujson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        '''
+        Cria a resposta json, codificando o objeto diretamente em bytes.
+        Em modo debug (ou com compact False), a resposta é indentada \
+        pelo provedor padrão.
+
+        Parâmetros
+        ==========
+        args -- valor a ser codificado ou valores a serem codificados \
+        como lista.
+        kwargs -- valores a serem codificados como dict.
+
+        Retorno
+        =======
+        Response -- resposta json.
+        '''
+        if (self.compact is None and self._app.debug) or \
+                self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.codificar(obj) + b'\n',
+                                        mimetype=self.mimetype)
@@ -0,0 +1,99 @@
+''' Módulo responsável pela serialização das feiras livres nas respostas \
+da busca. '''
+
+from src.modelos import Logradouro, Bairro, Distrito, Subprefeitura
+from src.modelos import Regiao5, Regiao8
+
+
+class Serializador:
+    '''
+    Converte feiras livres em dict, calculando o dict de cada entidade \
+    uma única vez, mesmo que seja referenciada por várias feiras livres.
+    Deve ser utilizado durante uma única requisição, pois as entidades \
+    são identificadas pelo modelo e id.
+
+    Atributos
+    ==========
+    memoria [Dict] -- dict de cada entidade já convertida, indexado por \
+    (modelo, id).
+    tabelas [Dict] -- dict de cada entidade de dimensão referenciada no \
+    formato normalizado, indexado pelo id, para cada tabela.
+    '''
+    TABELAS = {Logradouro: 'logradouros',
+               Bairro: 'bairros',
+               Distrito: 'distritos',
+               Subprefeitura: 'subprefeituras',
+               Regiao5: 'regioes5',
+               Regiao8: 'regioes8'}
+
+    def __init__(self):
+        ''' Construtor. '''
+        self.memoria = dict()
+        self.tabelas = {i: dict() for i in self.TABELAS.values()}
+
+    def converter(self, elemento):
+        '''
+        Retorna a representação do elemento como Dict, com as entidades \
+        relacionadas aninhadas.
+        Se o elemento for None, retorna None.
+
+        Parâmetros
+        ==========
+        elemento [Modelo] -- entidade.
+
+        Retorno
+        =======
+        Dict -- representação do elemento como Dict ou None.
+        '''
+        if elemento is None:
+            return None
+        chave = (type(elemento), elemento.id)
+        convertido = self.memoria.get(chave)
+        if convertido is None:
+            convertido = elemento.criar_dict(self.converter)
+            self.memoria[chave] = convertido
+        return convertido
+
+    def referenciar(self, elemento):
+        '''
+        Retorna o id do elemento, caso seja uma entidade de dimensão, \
+        adicionando sua representação normalizada à tabela do modelo. \
+        Demais elementos são convertidos em Dict normalizado.
+        Se o elemento for None, retorna None.
+
+        Parâmetros
+        ==========
+        elemento [Modelo] -- entidade.
+
+        Retorno
+        =======
+        int|Dict -- id ou representação normalizada do elemento ou None.
+        '''
+        if elemento is None:
+            return None
+        nome_tabela = self.TABELAS.get(type(elemento))
+        if nome_tabela is None:
+            return elemento.criar_dict(self.referenciar)
+        tabela = self.tabelas[nome_tabela]
+        if elemento.id not in tabela:
+            tabela[elemento.id] = elemento.criar_dict(self.referenciar)
+        return elemento.id
+
+    def normalizar(self, feiras_livres):
+        '''
+        Converte as feiras livres no formato normalizado: cada feira \
+        livre referencia pelo id as entidades de dimensão, listadas uma \
+        única vez em suas tabelas.
+
+        Parâmetros
+        ==========
+        feiras_livres [List(FeiraLivre)] -- feiras livres carregadas com \
+        carregamento_feira_livre.
+
+        Retorno
+        =======
+        Dict -- feiras livres e tabelas das entidades de dimensão.
+        '''
+        conteudo = {'feiras': [self.referenciar(i) for i in feiras_livres]}
+        conteudo.update(self.tabelas)
+        return conteudo
@@ -1,9 +1,58 @@
 ''' Módulo responsável por definir alguns helpers para os testes. '''
 
+from sqlalchemy import event
 from src.modelos import FeiraLivre, Endereco, Logradouro, Bairro
 from src.modelos import Regiao8, Regiao5, Distrito, Subprefeitura
 
 
+class ContadorConsultas:
+    '''
+    Conta as instruções SQL executadas pelo engine enquanto o contexto \
+    estiver ativo, desconsiderando as instruções de controle de transação \
+    (BEGIN, SAVEPOINT, RELEASE e ROLLBACK).
+
+    Atributos
+    ==========
+    engine [Engine] -- engine cujas instruções devem ser contadas.
+    instrucoes [List] -- instruções SQL executadas.
+    '''
+    def __init__(self, engine):
+        '''
+        Construtor.
+
+        Parâmetros
+        ==========
+        engine [Engine] -- engine cujas instruções devem ser contadas.
+        '''
+        self.engine = engine
+        self.instrucoes = list()
+
+    CONTROLE_TRANSACAO = ('BEGIN', 'SAVEPOINT', 'RELEASE', 'ROLLBACK')
+
+    def registrar(self, conexao, cursor, instrucao, *args):
+        ''' Registra a instrução executada. '''
+        if not instrucao.startswith(self.CONTROLE_TRANSACAO):
+            self.instrucoes.append(instrucao)
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self.registrar)
+        return self
+
+    def __exit__(self, *args):
+        event.remove(self.engine, 'before_cursor_execute', self.registrar)
+
+    @property
+    def quantidade(self):
+        '''
+        Retorna a quantidade de instruções executadas.
+
+        Retorno
+        =======
+        int -- quantidade de instruções executadas.
+        '''
+        return len(self.instrucoes)
+
+
 class FeiraLivreBuilder:
     '''
     Constrói uma FeiraLivre para auxiliar os testes.
@@ -10,7 +10,10 @@ import logging
 from copy import copy
 from app import app
 from app import verificar_campos_obrigatorios, identificar_entidade_colunas
+from app import codificar_cursor, decodificar_cursor
 from src.basedados import bd
+from src.cache import cache_fragmentos
+from sqlalchemy import event
 from test.helpers import *
 
 logger = logging.getLogger('app')
@@ -575,6 +578,442 @@ class TestBuscar(unittest.TestCase):
         self.assertEqual(json.loads(valor_atual.data), valor_esperado)
 
 
+class TestBuscarCache(unittest.TestCase):
+    ''' Mantém os testes relacionados ao cache das respostas da busca. '''
+    REGISTRO1, REGISTRO2 = '123', '456'
+    REGIAO1 = 'regiao1'
+
+    def setUp(self):
+        app.config.from_object('config.TestingConfig')
+        self.app = app.test_client()
+        self.contexto = app.app_context()
+        self.contexto.push()
+        bd.create_all()
+
+    def tearDown(self):
+        bd.session.remove()
+        bd.drop_all()
+        self.contexto.pop()
+
+    def test_etag(self):
+        '''
+        Dada uma busca já realizada
+        Quando repito a busca informando o ETag recebido
+        Então devo receber o código 304, sem corpo.
+        '''
+        # Arrange
+        FeiraLivreBuilder(bd).with_regiao5(self.REGIAO1).build()
+        resposta = self.app.get('/feiras?regiao5=' + self.REGIAO1)
+        # Act
+        valor_atual = self.app.get('/feiras?regiao5=' + self.REGIAO1,
+                                   headers={'If-None-Match':
+                                            resposta.headers['ETag']})
+        # Assert
+        self.assertEqual(valor_atual.status_code, 304)
+        self.assertEqual(valor_atual.data, b'')
+
+    def test_sem_consultas(self):
+        '''
+        Dada uma busca já realizada
+        Quando repito a busca
+        Então devo receber o mesmo resultado sem executar instruções SQL.
+        '''
+        # Arrange
+        FeiraLivreBuilder(bd).with_regiao5(self.REGIAO1).build()
+        resposta = self.app.get('/feiras?regiao5=' + self.REGIAO1)
+        # Act
+        with ContadorConsultas(bd.engine) as contador:
+            valor_atual = self.app.get('/feiras?regiao5=' + self.REGIAO1)
+        # Assert
+        self.assertEqual(valor_atual.data, resposta.data)
+        self.assertEqual(contador.quantidade, 0)
+
+    def test_invalidacao_apos_remocao(self):
+        '''
+        Dada uma busca já realizada que contém a feira livre de \
+        registro '123'
+        Quando removo a feira e repito a busca
+        Então devo receber um JSON contendo uma lista vazia de feiras.
+        '''
+        # Arrange
+        FeiraLivreBuilder(bd).with_registro(self.REGISTRO1) \
+                             .with_regiao5(self.REGIAO1) \
+                             .build()
+        self.app.get('/feiras?regiao5=' + self.REGIAO1)
+        # Act
+        self.app.delete('/feira?registro=' + self.REGISTRO1)
+        valor_atual = self.app.get('/feiras?regiao5=' + self.REGIAO1)
+        # Assert
+        self.assertEqual(json.loads(valor_atual.data), {'feiras': []})
+
+    def test_commit_durante_busca(self):
+        '''
+        Dada uma feira livre ainda não serializada
+        Quando outra transação confirma uma alteração logo após a \
+        consulta dos ids da busca
+        Então o json da feira livre, lido da versão anterior, não deve \
+        ser armazenado no cache de fragmentos.
+        '''
+        # Arrange
+        feira_livre = FeiraLivreBuilder(bd).with_regiao5(self.REGIAO1) \
+                                           .build()
+        consultas = list()
+
+        def confirmar_alteracao(conexao, cursor, instrucao, *args):
+            if instrucao.startswith('SELECT') and not consultas:
+                consultas.append(instrucao)
+                cache_fragmentos.invalidar(())
+        event.listen(bd.engine, 'before_cursor_execute', confirmar_alteracao)
+        # Act
+        try:
+            self.app.get('/feiras?regiao5=' + self.REGIAO1)
+        finally:
+            event.remove(bd.engine, 'before_cursor_execute',
+                         confirmar_alteracao)
+        # Assert
+        self.assertEqual(cache_fragmentos.buscar([feira_livre.id]), {})
+
+
+class TestCursor(unittest.TestCase):
+    ''' Mantém os testes unitários relacionados às funções \
+    codificar_cursor e decodificar_cursor. '''
+
+    def test_codificar_decodificar(self):
+        '''
+        Dado o id 123
+        Quando o codifico como cursor e decodifico o cursor
+        Então devo receber o id 123.
+        '''
+        # Arrange
+        valor_esperado = 123
+        # Act
+        valor_atual = decodificar_cursor(codificar_cursor(123))
+        # Assert
+        self.assertEqual(valor_atual, valor_esperado)
+
+    def test_cursor_invalido(self):
+        '''
+        Dado um cursor que não foi gerado por codificar_cursor
+        Quando o decodifico
+        Então deve lançar exceção ValueError.
+        '''
+        # Arrange
+        # Act
+        # Assert
+        self.assertRaises(ValueError, decodificar_cursor, 'abc')
+
+    def test_cursor_fora_do_intervalo(self):
+        '''
+        Dados cursores com os ids 2^63 e -1, fora do intervalo dos \
+        inteiros do SQLite
+        Quando os decodifico
+        Então deve lançar exceção ValueError.
+        '''
+        # Arrange
+        # Act
+        # Assert
+        self.assertRaises(ValueError, decodificar_cursor,
+                          codificar_cursor(2 ** 63))
+        self.assertRaises(ValueError, decodificar_cursor,
+                          codificar_cursor(-1))
+
+
+class TestBuscarPaginada(unittest.TestCase):
+    ''' Mantém os testes relacionados à busca paginada de feiras. '''
+    REGISTRO1, REGISTRO2, REGISTRO3 = '123', '456', '789'
+
+    def setUp(self):
+        app.config.from_object('config.TestingConfig')
+        app.config['BUSCA_LIMITE_MAXIMO'] = 2
+        self.app = app.test_client()
+        self.contexto = app.app_context()
+        self.contexto.push()
+        bd.create_all()
+        self.feiras_livres = [FeiraLivreBuilder(bd).with_registro(registro)
+                                                   .build()
+                              for registro in (self.REGISTRO1,
+                                               self.REGISTRO2,
+                                               self.REGISTRO3)]
+
+    def tearDown(self):
+        bd.session.remove()
+        bd.drop_all()
+        self.contexto.pop()
+        app.config.from_object('config.TestingConfig')
+
+    def test_primeira_pagina(self):
+        '''
+        Dadas três feiras livres
+        Quando busco com limite=2
+        Então devo receber um JSON contendo as duas primeiras feiras livres \
+        e o cursor da próxima página.
+        '''
+        # Arrange
+        valor_esperado = {'feiras': [self.feiras_livres[0].dict,
+                                     self.feiras_livres[1].dict],
+                          'proximo': codificar_cursor(
+                              self.feiras_livres[1].id)}
+        # Act
+        valor_atual = self.app.get('/feiras?limite=2')
+        # Assert
+        self.assertEqual(json.loads(valor_atual.data), valor_esperado)
+
+    def test_ultima_pagina(self):
+        '''
+        Dadas três feiras livres
+        Quando busco com limite=2 a página após a segunda feira livre
+        Então devo receber um JSON contendo a terceira feira livre e \
+        nenhum cursor de próxima página.
+        '''
+        # Arrange
+        cursor = codificar_cursor(self.feiras_livres[1].id)
+        valor_esperado = {'feiras': [self.feiras_livres[2].dict],
+                          'proximo': None}
+        # Act
+        valor_atual = self.app.get('/feiras?limite=2&cursor=' + cursor)
+        # Assert
+        self.assertEqual(json.loads(valor_atual.data), valor_esperado)
+
+    def test_limite_maior_que_maximo(self):
+        '''
+        Dadas três feiras livres e limite máximo 2
+        Quando busco com limite=10
+        Então devo receber um JSON contendo apenas duas feiras livres.
+        '''
+        # Arrange
+        # Act
+        valor_atual = self.app.get('/feiras?limite=10')
+        # Assert
+        self.assertEqual(len(json.loads(valor_atual.data)['feiras']), 2)
+
+    def test_limite_invalido(self):
+        '''
+        Dadas três feiras livres
+        Quando busco com limite=0
+        Então devo receber um JSON contendo a mensagem de erro.
+        '''
+        # Arrange
+        valor_esperado = {'mensagem': 'Limite 0 inválido.', 'erro': 400}
+        # Act
+        valor_atual = self.app.get('/feiras?limite=0')
+        # Assert
+        self.assertEqual(json.loads(valor_atual.data), valor_esperado)
+        self.assertEqual(valor_atual.status_code, 400)
+
+
+class TestBuscarArea(unittest.TestCase):
+    ''' Mantém os testes relacionados à busca de feiras por área. '''
+    REGISTRO1, REGISTRO2, REGISTRO3 = '123', '456', '789'
+
+    def setUp(self):
+        app.config.from_object('config.TestingConfig')
+        self.app = app.test_client()
+        self.contexto = app.app_context()
+        self.contexto.push()
+        bd.create_all()
+        self.feiras_livres = [
+            FeiraLivreBuilder(bd).with_registro(registro)
+                                 .with_numero(registro)
+                                 .with_regiao5(regiao5)
+                                 .with_latitude(latitude)
+                                 .with_longitude(longitude)
+                                 .build()
+            for registro, regiao5, latitude, longitude in (
+                (self.REGISTRO1, 'Leste', -23.55, -46.55),
+                (self.REGISTRO2, 'Sul', -23.56, -46.56),
+                (self.REGISTRO3, 'Leste', -23.70, -46.70))]
+
+    def tearDown(self):
+        bd.session.remove()
+        bd.drop_all()
+        self.contexto.pop()
+
+    def test_area(self):
+        '''
+        Dadas três feiras livres, duas delas dentro da área
+        Quando busco pelos limites da área
+        Então devo receber um JSON contendo as duas feiras livres da área.
+        '''
+        # Arrange
+        valor_esperado = [self.feiras_livres[0].dict,
+                          self.feiras_livres[1].dict]
+        # Act
+        resposta = self.app.get('/feiras?min_lat=-23.6&max_lat=-23.5'
+                                '&min_lon=-46.6&max_lon=-46.5')
+        valor_atual = sorted(json.loads(resposta.data)['feiras'],
+                             key=lambda i: i['registro'])
+        # Assert
+        self.assertEqual(valor_atual, valor_esperado)
+
+    def test_area_e_regiao(self):
+        '''
+        Dadas três feiras livres, duas delas na região 'Leste'
+        Quando busco pela região 'Leste' e pela latitude mínima -23.6
+        Então devo receber um JSON contendo apenas a feira livre que \
+        satisfaz os dois filtros.
+        '''
+        # Arrange
+        valor_esperado = {'feiras': [self.feiras_livres[0].dict]}
+        # Act
+        valor_atual = self.app.get('/feiras?regiao5=Leste&min_lat=-23.6')
+        # Assert
+        self.assertEqual(json.loads(valor_atual.data), valor_esperado)
+
+    def test_limites_invalidos(self):
+        '''
+        Dada uma busca com latitude não numérica, nan ou infinita ou \
+        latitude mínima maior que a máxima
+        Quando busco feiras livres
+        Então devo receber o erro 400.
+        '''
+        # Arrange
+        # Act
+        nao_numerico = self.app.get('/feiras?min_lat=abc')
+        nan = self.app.get('/feiras?min_lat=nan&max_lat=1&min_lon=0'
+                           '&max_lon=1')
+        infinito = self.app.get('/feiras?max_lon=inf')
+        invertido = self.app.get('/feiras?min_lat=-23.5&max_lat=-23.6')
+        # Assert
+        self.assertEqual(nao_numerico.status_code, 400)
+        self.assertEqual(nan.status_code, 400)
+        self.assertEqual(infinito.status_code, 400)
+        self.assertEqual(invertido.status_code, 400)
+
+
+class TestBuscarNormalizada(unittest.TestCase):
+    ''' Mantém os testes relacionados à busca de feiras no formato \
+    normalizado. '''
+    REGISTRO1, REGISTRO2 = '123', '456'
+    DISTRITO1 = 'distrito1'
+
+    def setUp(self):
+        app.config.from_object('config.TestingConfig')
+        self.app = app.test_client()
+        self.contexto = app.app_context()
+        self.contexto.push()
+        bd.create_all()
+        self.feiras_livres = [
+            FeiraLivreBuilder(bd).with_registro(registro)
+                                 .with_numero(registro)
+                                 .with_distrito(self.DISTRITO1)
+                                 .with_cod_distrito('1')
+                                 .with_bairro('bairro1')
+                                 .build()
+            for registro in (self.REGISTRO1, self.REGISTRO2)]
+
+    def tearDown(self):
+        bd.session.remove()
+        bd.drop_all()
+        self.contexto.pop()
+
+    def test_normalizado(self):
+        '''
+        Dadas duas feiras livres no mesmo bairro do distrito 'distrito1'
+        Quando busco pelo distrito no formato normalizado
+        Então devo receber as feiras livres referenciando o mesmo bairro, \
+        listado uma única vez.
+        '''
+        # Arrange
+        bairro = self.feiras_livres[0].endereco.bairro
+        distrito = bairro.distrito
+        valor_esperado = {str(bairro.id): {'nome': 'bairro1',
+                                           'distrito': distrito.id}}
+        # Act
+        resposta = self.app.get('/feiras?distrito=' + self.DISTRITO1 +
+                                '&formato=normalizado')
+        valor_atual = json.loads(resposta.data)
+        # Assert
+        self.assertEqual(valor_atual['bairros'], valor_esperado)
+        self.assertEqual(list(valor_atual['distritos']), [str(distrito.id)])
+        self.assertEqual([i['endereco']['bairro']
+                          for i in valor_atual['feiras']],
+                         [bairro.id, bairro.id])
+
+    def test_normalizado_paginado(self):
+        '''
+        Dadas duas feiras livres
+        Quando busco a primeira página, de tamanho 1, no formato normalizado
+        Então devo receber uma feira livre e o cursor da próxima página.
+        '''
+        # Arrange
+        valor_esperado = codificar_cursor(self.feiras_livres[0].id)
+        # Act
+        resposta = self.app.get('/feiras?distrito=' + self.DISTRITO1 +
+                                '&formato=normalizado&limite=1')
+        valor_atual = json.loads(resposta.data)
+        # Assert
+        self.assertEqual(len(valor_atual['feiras']), 1)
+        self.assertEqual(valor_atual['proximo'], valor_esperado)
+
+    def test_formato_invalido(self):
+        '''
+        Dada uma busca com formato desconhecido
+        Quando busco feiras livres
+        Então devo receber o erro 400.
+        '''
+        # Arrange
+        # Act
+        valor_atual = self.app.get('/feiras?distrito=' + self.DISTRITO1 +
+                                   '&formato=xml')
+        # Assert
+        self.assertEqual(valor_atual.status_code, 400)
+
+
+class TestBuscarStreaming(unittest.TestCase):
+    ''' Mantém os testes relacionados à busca de uma feira com resposta \
+    em streaming. '''
+    REGISTRO1, REGISTRO2, REGISTRO3 = '123', '456', '789'
+    REGIAO1, REGIAO2 = 'regiao1', 'regiao2'
+
+    def setUp(self):
+        app.config.from_object('config.TestingConfig')
+        app.config['BUSCA_STREAMING'] = True
+        app.config['BUSCA_TAMANHO_LOTE'] = 2
+        self.app = app.test_client()
+        self.contexto = app.app_context()
+        self.contexto.push()
+        bd.create_all()
+
+    def tearDown(self):
+        bd.session.remove()
+        bd.drop_all()
+        self.contexto.pop()
+        app.config.from_object('config.TestingConfig')
+
+    def test_varios_lotes(self):
+        '''
+        Dadas três feiras livres na região 'regiao1' e lotes de tamanho 2
+        Quando o busco por regiao5='regiao1'
+        Então devo receber um JSON contendo as três feiras livres na lista \
+        de feiras.
+        '''
+        # Arrange
+        feiras_livres = [FeiraLivreBuilder(bd).with_registro(registro)
+                                              .with_regiao5(self.REGIAO1)
+                                              .build()
+                         for registro in (self.REGISTRO1, self.REGISTRO2,
+                                          self.REGISTRO3)]
+        valor_esperado = {'feiras': [i.dict for i in feiras_livres]}
+        # Act
+        valor_atual = self.app.get('/feiras?regiao5=' + self.REGIAO1)
+        # Assert
+        self.assertEqual(json.loads(valor_atual.data), valor_esperado)
+
+    def test_regiao_diferente(self):
+        '''
+        Dada uma feira livre na região 'regiao1'
+        Quando o busco por regiao5='regiao2'
+        Então devo receber um JSON contendo uma lista vazia de feiras.
+        '''
+        # Arrange
+        FeiraLivreBuilder(bd).with_regiao5(self.REGIAO1).build()
+        valor_esperado = {'feiras': []}
+        # Act
+        valor_atual = self.app.get('/feiras?regiao5=' + self.REGIAO2)
+        # Assert
+        self.assertEqual(json.loads(valor_atual.data), valor_esperado)
+
+
 class TestRemover(unittest.TestCase):
     ''' Mantém os testes relacionados à remoção de uma feira. '''
     REGISTRO1, REGISTRO2 = '123', '456'
@@ -889,5 +1328,314 @@ class TestAlterar(unittest.TestCase):
         self.assertEqual(valor_atual.status_code, 404)
 
 
+class TestAdicionarLote(unittest.TestCase):
+    ''' Mantém os testes relacionados à inclusão de feiras em lote. '''
+    JSON = TestAdicionar.JSON
+
+    def setUp(self):
+        app.config.from_object('config.TestingConfig')
+        self.app = app.test_client()
+        self.contexto = app.app_context()
+        self.contexto.push()
+        bd.create_all()
+
+    def tearDown(self):
+        bd.session.remove()
+        bd.drop_all()
+        self.contexto.pop()
+
+    def test_criar_e_alterar(self):
+        '''
+        Dada uma feira livre de registro 'reg' já cadastrada
+        Quando adiciono um lote com a feira 'reg' renomeada, uma nova \
+        feira 'reg2' e uma feira sem registro
+        Então a feira 'reg' deve ser alterada, a feira 'reg2' criada e \
+        devo receber o erro da feira sem registro.
+        '''
+        # Arrange
+        self.app.post('/feira', data=json.dumps(self.JSON))
+        alterada = dict(self.JSON, nome='novo nome')
+        nova = dict(self.JSON, registro='reg2', numero='num2')
+        sem_registro = dict(self.JSON)
+        del sem_registro['registro']
+        # Act
+        resposta = self.app.post('/feiras/lote',
+                                 data=json.dumps([alterada, nova,
+                                                  sem_registro]))
+        conteudo = json.loads(resposta.data)
+        # Assert
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual([i['situacao'] for i in conteudo['resultados']],
+                         ['alterada', 'criada', 'erro'])
+        self.assertEqual(conteudo['resultados'][2]['mensagem'],
+                         'Campo(s) obrigatório(s) não encontrado(s): '
+                         'registro.')
+        self.assertEqual(FeiraLivre.query.filter_by(registro='reg').first()
+                         .nome, 'novo nome')
+        self.assertEqual(FeiraLivre.query.count(), 2)
+        self.assertEqual(Subprefeitura.query.count(), 1)
+
+    def test_alterar_referencia(self):
+        '''
+        Dada uma feira livre de registro 'reg' já cadastrada
+        Quando adiciono um lote com a feira 'reg' alterando apenas \
+        referencia, setor_censitario e area_ponderacao
+        Então a feira deve ser alterada, mantendo o mesmo endereço com os \
+        novos valores.
+        '''
+        # Arrange
+        self.app.post('/feira', data=json.dumps(self.JSON))
+        endereco_id = FeiraLivre.query.first().endereco_id
+        alterada = dict(self.JSON, referencia='nova referencia',
+                        setor_censitario='setor2', area_ponderacao='area2')
+        # Act
+        resposta = self.app.post('/feiras/lote', data=json.dumps([alterada]))
+        conteudo = json.loads(resposta.data)
+        bd.session.expire_all()
+        # Assert
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual([i['situacao'] for i in conteudo['resultados']],
+                         ['alterada'])
+        endereco = FeiraLivre.query.first().endereco
+        self.assertEqual(endereco.id, endereco_id)
+        self.assertEqual((endereco.referencia, endereco.setor_censitario,
+                          endereco.area_ponderacao),
+                         ('nova referencia', 'setor2', 'area2'))
+        self.assertEqual(Endereco.query.count(), 1)
+
+    def test_violacao_indice_unico(self):
+        '''
+        Dado um lote em que a segunda feira tem uma nova subprefeitura e \
+        um distrito de mesmo código e nome diferente do da primeira
+        Quando adiciono o lote
+        Então devo receber o erro da segunda feira e nenhuma entidade da \
+        segunda feira deve ser gravada.
+        '''
+        # Arrange
+        conflitante = dict(self.JSON, registro='reg2', cod_subpref='cods2',
+                           distrito='outro dist')
+        # Act
+        resposta = self.app.post('/feiras/lote',
+                                 data=json.dumps([self.JSON, conflitante]))
+        conteudo = json.loads(resposta.data)
+        # Assert
+        self.assertEqual(conteudo['resumo'], {'criada': 1, 'alterada': 0,
+                                              'inalterada': 0, 'erro': 1})
+        self.assertEqual(Subprefeitura.query.count(), 1)
+        self.assertEqual(FeiraLivre.query.count(), 1)
+
+    def test_valor_nao_escalar(self):
+        '''
+        Dado um lote em que a segunda feira tem uma lista como logradouro \
+        e um objeto como nome
+        Quando adiciono o lote
+        Então a primeira feira deve ser criada e devo receber o erro da \
+        segunda feira.
+        '''
+        # Arrange
+        invalida = dict(self.JSON, registro='reg2', logradouro=['rua'],
+                        nome={'nome': 'feira'})
+        # Act
+        resposta = self.app.post('/feiras/lote',
+                                 data=json.dumps([self.JSON, invalida]))
+        conteudo = json.loads(resposta.data)
+        # Assert
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual([i['situacao'] for i in conteudo['resultados']],
+                         ['criada', 'erro'])
+        self.assertEqual(conteudo['resultados'][1]['mensagem'],
+                         'Campo(s) com valor inválido (lista ou objeto '
+                         'json): logradouro, nome.')
+        self.assertEqual(FeiraLivre.query.count(), 1)
+
+    def test_ndjson(self):
+        '''
+        Dado um lote com uma feira json por linha, sendo a segunda igual \
+        à primeira
+        Quando adiciono o lote com Content-Type application/x-ndjson
+        Então a primeira feira deve ser criada e a segunda deve ser \
+        relatada como repetida.
+        '''
+        # Arrange
+        corpo = json.dumps(self.JSON) + '\n' + json.dumps(self.JSON) + '\n'
+        # Act
+        resposta = self.app.post('/feiras/lote', data=corpo,
+                                 content_type='application/x-ndjson')
+        conteudo = json.loads(resposta.data)
+        # Assert
+        self.assertEqual([i['situacao'] for i in conteudo['resultados']],
+                         ['criada', 'erro'])
+        self.assertEqual(FeiraLivre.query.count(), 1)
+
+    def test_corpo_invalido(self):
+        '''
+        Dado um corpo que não é uma lista json
+        Quando adiciono o lote
+        Então devo receber o erro 400.
+        '''
+        # Arrange
+        # Act
+        resposta = self.app.post('/feiras/lote', data=json.dumps(self.JSON))
+        # Assert
+        self.assertEqual(resposta.status_code, 400)
+
+
+class TestQuantidadeConsultas(unittest.TestCase):
+    ''' Mantém os testes relacionados à quantidade de instruções SQL \
+    executadas por requisição. '''
+    REGISTRO1, REGISTRO2, REGISTRO3 = '123', '456', '789'
+    REGIAO1 = 'regiao1'
+    JSON = {
+        'identificador': 1,
+        'latitude': -123,
+        'longitude': 456,
+        'setor_censitario': 'setor',
+        'area_ponderacao': 'area',
+        'cod_distrito': 'codd',
+        'distrito': 'dist',
+        'cod_subpref': 'cods',
+        'subprefeitura': 'subpref',
+        'regiao5': 'reg1',
+        'regiao8': 'reg2',
+        'nome': 'nome',
+        'registro': 'reg',
+        'logradouro': 'logradouro',
+        'numero': 'num',
+        'bairro': 'bairro',
+        'referencia': 'referencia'
+    }
+
+    def setUp(self):
+        app.config.from_object('config.TestingConfig')
+        self.app = app.test_client()
+        self.contexto = app.app_context()
+        self.contexto.push()
+        bd.create_all()
+        for registro in (self.REGISTRO1, self.REGISTRO2, self.REGISTRO3):
+            FeiraLivreBuilder(bd).with_registro(registro) \
+                                 .with_regiao5(self.REGIAO1) \
+                                 .build()
+        bd.session.remove()
+
+    def tearDown(self):
+        bd.session.remove()
+        bd.drop_all()
+        self.contexto.pop()
+
+    def test_buscar(self):
+        '''
+        Dadas três feiras livres na região 'regiao1'
+        Quando o busco por regiao5='regiao1'
+        Então devem ser executadas apenas duas instruções SQL (ids das \
+        feiras livres e carregamento das feiras livres ausentes do cache).
+        '''
+        # Arrange
+        # Act
+        with ContadorConsultas(bd.engine) as contador:
+            valor_atual = self.app.get('/feiras?regiao5=' + self.REGIAO1)
+        # Assert
+        self.assertEqual(len(json.loads(valor_atual.data)['feiras']), 3)
+        self.assertEqual(contador.quantidade, 2)
+
+    def test_buscar_fragmentos_armazenados(self):
+        '''
+        Dadas três feiras livres na região 'regiao1' já serializadas por \
+        uma busca anterior
+        Quando busco todas as feiras
+        Então deve ser executada apenas a instrução SQL dos ids.
+        '''
+        # Arrange
+        valor_esperado = self.app.get('/feiras?regiao5=' + self.REGIAO1) \
+                                 .get_json()['feiras']
+        # Act
+        with ContadorConsultas(bd.engine) as contador:
+            valor_atual = self.app.get('/feiras')
+        # Assert
+        self.assertEqual(valor_atual.get_json()['feiras'], valor_esperado)
+        self.assertEqual(contador.quantidade, 1)
+
+    def test_adicionar(self):
+        '''
+        Dado um json com todos os dados necessários para o cadastro \
+        de uma feira livre
+        Quando adiciono a feira
+        Então devem ser executadas no máximo 22 instruções SQL.
+        '''
+        # Arrange
+        dado = copy(self.JSON)
+        # Act
+        with ContadorConsultas(bd.engine) as contador:
+            valor_atual = self.app.post('/feira', data=json.dumps(dado))
+        # Assert
+        self.assertEqual(valor_atual.status_code, 200)
+        self.assertLessEqual(contador.quantidade, 22)
+
+    def test_adicionar_entidades_existentes(self):
+        '''
+        Dada uma feira livre cadastrada
+        Quando adiciono outra feira com a mesma subprefeitura, distrito, \
+        regiões, bairro e logradouro
+        Então devem ser executadas no máximo 4 instruções SQL.
+        '''
+        # Arrange
+        dado = copy(self.JSON)
+        self.app.post('/feira', data=json.dumps(dado))
+        dado['registro'] = 'outro'
+        dado['numero'] = 'outro'
+        # Act
+        with ContadorConsultas(bd.engine) as contador:
+            valor_atual = self.app.post('/feira', data=json.dumps(dado))
+        # Assert
+        self.assertEqual(valor_atual.status_code, 200)
+        self.assertLessEqual(contador.quantidade, 4)
+
+    def test_alterar(self):
+        '''
+        Dada uma feira livre com registro '123'
+        Quando altero a feira com um json com todos os dados necessários
+        Então devem ser executadas no máximo 22 instruções SQL.
+        '''
+        # Arrange
+        dado = copy(self.JSON)
+        dado['registro'] = self.REGISTRO1
+        # Act
+        with ContadorConsultas(bd.engine) as contador:
+            valor_atual = self.app.put('/feira', data=json.dumps(dado))
+        # Assert
+        self.assertEqual(valor_atual.status_code, 200)
+        self.assertLessEqual(contador.quantidade, 22)
+
+    def test_adicionar_lote(self):
+        '''
+        Dado um lote de 50 novas feiras livres
+        Quando adiciono o lote
+        Então a quantidade de instruções SQL não deve depender do tamanho \
+        do lote.
+        '''
+        # Arrange
+        lote = [dict(self.JSON, registro=str(i), numero=str(i))
+                for i in range(50)]
+        # Act
+        with ContadorConsultas(bd.engine) as contador:
+            self.app.post('/feiras/lote', data=json.dumps(lote))
+        # Assert
+        self.assertEqual(FeiraLivre.query.count(), 53)
+        self.assertLessEqual(contador.quantidade, 18)
+
+    def test_remover(self):
+        '''
+        Dada uma feira livre com registro '123'
+        Quando removo a feira com registro '123'
+        Então devem ser executadas apenas duas instruções SQL.
+        '''
+        # Arrange
+        # Act
+        with ContadorConsultas(bd.engine) as contador:
+            valor_atual = self.app.delete('/feira?registro=' + self.REGISTRO1)
+        # Assert
+        self.assertEqual(valor_atual.status_code, 200)
+        self.assertEqual(contador.quantidade, 2)
+
+
 if __name__ == '__main__':
     unittest.main()
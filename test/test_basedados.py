@@ -0,0 +1,85 @@
+''' Módulo responsável por manter/executar os testes da configuração da \
+base de dados. '''
+
+import unittest
+import logging
+from app import app
+from sqlalchemy import event, text
+from src.basedados import bd, iniciar_transacao_escrita
+from src.modelos import Regiao5
+
+logger = logging.getLogger('app')
+logger.setLevel(logging.CRITICAL)
+
+
+class TestConfigurarSqlite(unittest.TestCase):
+    ''' Mantém os testes relacionados ao perfil de produção do SQLite. '''
+
+    def setUp(self):
+        app.config.from_object('config.TestingConfig')
+        self.contexto = app.app_context()
+        self.contexto.push()
+        bd.create_all()
+
+    def tearDown(self):
+        bd.session.remove()
+        bd.drop_all()
+        self.contexto.pop()
+
+    def test_pragmas(self):
+        '''
+        Dada a configuração de produção
+        Quando consulto os PRAGMAs da conexão
+        Então devo receber o journal_mode WAL e o synchronous NORMAL.
+        '''
+        # Arrange
+        # Act
+        journal_mode = bd.session.execute(text('PRAGMA journal_mode')) \
+                                 .scalar()
+        synchronous = bd.session.execute(text('PRAGMA synchronous')).scalar()
+        # Assert
+        self.assertEqual(journal_mode, 'wal')
+        self.assertEqual(synchronous, 1)
+
+    def test_transacao_escrita(self):
+        '''
+        Dada uma sessão sem transação
+        Quando inicio uma transação de escrita
+        Então a transação deve ser iniciada com BEGIN IMMEDIATE.
+        '''
+        # Arrange
+        instrucoes = list()
+
+        def registrar(conexao, cursor, instrucao, *args):
+            instrucoes.append(instrucao)
+        event.listen(bd.engine, 'before_cursor_execute', registrar)
+        # Act
+        try:
+            iniciar_transacao_escrita(bd.session())
+        finally:
+            event.remove(bd.engine, 'before_cursor_execute', registrar)
+        # Assert
+        self.assertEqual(instrucoes, ['BEGIN IMMEDIATE'])
+
+    def test_leitura_durante_escrita(self):
+        '''
+        Dada uma transação de escrita com uma região inserida e ainda \
+        não confirmada
+        Quando outra conexão lê as regiões
+        Então a leitura não deve ser bloqueada e não deve ver a região.
+        '''
+        # Arrange
+        iniciar_transacao_escrita(bd.session())
+        bd.session.add(Regiao5(nome='regiao1'))
+        bd.session.flush()
+        # Act
+        with bd.engine.connect() as conexao:
+            valor_atual = conexao.execute(text('SELECT COUNT(*) FROM '
+                                               '"Regiao5"')).scalar()
+        # Assert
+        self.assertEqual(valor_atual, 0)
+        bd.session.rollback()
+
+
+if __name__ == '__main__':
+    unittest.main()
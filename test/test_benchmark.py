@@ -0,0 +1,183 @@
+''' Módulo responsável por manter/executar os testes do benchmark. '''
+
+import unittest
+import csv
+import os
+import tempfile
+from unittest import mock
+from benchmark import ARQUIVO_SEMENTE, gerar_linhas, calcular_percentil
+from benchmark import comparar, configurar_base_dados
+from src.importacao import converter_localizacao
+
+
+class TestGerarLinhas(unittest.TestCase):
+    ''' Mantém os testes unitários relacionados à função gerar_linhas. '''
+
+    def test_gerar_cabecalho(self):
+        '''
+        Dadas linhas sintéticas
+        Quando comparo suas colunas com o arquivo DEINFO
+        Então devo receber as mesmas colunas.
+        '''
+        # Arrange
+        with open(ARQUIVO_SEMENTE, 'r') as arquivo:
+            cabecalho = next(csv.reader(arquivo))
+        # Act
+        linha = next(gerar_linhas(1))
+        # Assert
+        self.assertEqual(sorted(cabecalho), sorted(linha))
+
+    def test_gerar_linhas_importaveis(self):
+        '''
+        Dadas 1000 linhas sintéticas
+        Quando verifico registros, localizações, bairros e logradouros
+        Então devo receber registros únicos, localizações no Município e \
+        menos bairros e logradouros do que linhas.
+        '''
+        # Arrange
+        linhas = list(gerar_linhas(1000))
+        # Act
+        registros = {i['REGISTRO'] for i in linhas}
+        localizacoes = [converter_localizacao(i) for i in linhas]
+        bairros = {i['BAIRRO'] for i in linhas}
+        logradouros = {i['LOGRADOURO'] for i in linhas}
+        # Assert
+        self.assertEqual(1000, len(registros))
+        self.assertNotIn((None, None), localizacoes)
+        self.assertLess(len(bairros), 1000)
+        self.assertLess(len(logradouros), 1000)
+
+    def test_gerar_deterministico(self):
+        '''
+        Dada a mesma semente
+        Quando gero as linhas duas vezes
+        Então devo receber as mesmas linhas.
+        '''
+        # Arrange
+        # Act
+        primeiras = list(gerar_linhas(100, semente=7))
+        segundas = list(gerar_linhas(100, semente=7))
+        # Assert
+        self.assertEqual(primeiras, segundas)
+
+
+class TestCalcularPercentil(unittest.TestCase):
+    ''' Mantém os testes unitários relacionados à função \
+    calcular_percentil. '''
+
+    def test_calcular_percentil(self):
+        '''
+        Dados os valores de 1 a 100
+        Quando calculo os percentis 50 e 99
+        Então devo receber 50 e 99.
+        '''
+        # Arrange
+        valores = list(range(1, 101))
+        # Act
+        p50 = calcular_percentil(valores, 50)
+        p99 = calcular_percentil(valores, 99)
+        # Assert
+        self.assertEqual(50, p50)
+        self.assertEqual(99, p99)
+
+    def test_calcular_percentil_vazio(self):
+        '''
+        Dada uma lista vazia
+        Quando calculo o percentil 50
+        Então devo receber None.
+        '''
+        # Arrange
+        # Act
+        p50 = calcular_percentil([], 50)
+        # Assert
+        self.assertIsNone(p50)
+
+
+class TestComparar(unittest.TestCase):
+    ''' Mantém os testes unitários relacionados à função comparar. '''
+
+    @staticmethod
+    def criar_resultado(linhas_por_segundo, p99_ms):
+        return {'resultados': [{
+            'linhas': 1000,
+            'importacao': {'lote': {'linhas_por_segundo':
+                                    linhas_por_segundo}},
+            'busca': {'bairro': {'p99_ms': p99_ms}},
+            'escrita': {}}]}
+
+    def test_comparar_sem_regressao(self):
+        '''
+        Dados dois resultados com variação dentro da tolerância
+        Quando comparo os resultados
+        Então não devo receber regressões.
+        '''
+        # Arrange
+        anterior = self.criar_resultado(1000, 10)
+        atual = self.criar_resultado(950, 10.5)
+        # Act
+        regressoes = comparar(anterior, atual, 0.1)
+        # Assert
+        self.assertEqual([], regressoes)
+
+    def test_comparar_com_regressao(self):
+        '''
+        Dados dois resultados com importação mais lenta e busca com p99 \
+        maior, além da tolerância
+        Quando comparo os resultados
+        Então devo receber as duas regressões.
+        '''
+        # Arrange
+        anterior = self.criar_resultado(1000, 10)
+        atual = self.criar_resultado(800, 20)
+        # Act
+        regressoes = comparar(anterior, atual, 0.1)
+        # Assert
+        self.assertEqual(2, len(regressoes))
+        self.assertIn('importação lote', regressoes[0])
+        self.assertIn('busca bairro', regressoes[1])
+
+    def test_comparar_codificador_mais_lento(self):
+        '''
+        Dados dois resultados em que o codificador json perdeu vazão além \
+        da tolerância
+        Quando comparo os resultados
+        Então devo receber a regressão do codificador.
+        '''
+        # Arrange
+        anterior = self.criar_resultado(1000, 10)
+        anterior['resultados'][0]['codificadores'] = {
+            'json': {'mb_por_segundo': 50}}
+        atual = self.criar_resultado(1000, 10)
+        atual['resultados'][0]['codificadores'] = {
+            'json': {'mb_por_segundo': 40}}
+        # Act
+        regressoes = comparar(anterior, atual, 0.1)
+        # Assert
+        self.assertEqual(1, len(regressoes))
+        self.assertIn('codificador json', regressoes[0])
+
+
+class TestConfigurarBaseDados(unittest.TestCase):
+    ''' Mantém os testes relacionados à função configurar_base_dados. '''
+
+    def test_diretorio_inexistente(self):
+        '''
+        Dado um diretório que ainda não existe
+        Quando configuro a base de dados do benchmark nesse diretório
+        Então o diretório e o arquivo de configuração devem ser criados.
+        '''
+        # Arrange
+        with tempfile.TemporaryDirectory() as temporario:
+            diretorio = os.path.join(temporario, 'novo', 'benchmark')
+            # Act
+            with mock.patch.dict(os.environ):
+                configurar_base_dados(diretorio)
+                caminho = os.environ['FEIRASLIVRESAPI_CONFIG']
+            # Assert
+            self.assertTrue(os.path.isfile(caminho))
+            self.assertEqual(os.path.dirname(caminho), diretorio)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+''' Módulo responsável por manter/executar os testes da busca por nome. '''
+
+import unittest
+import json
+import logging
+from app import app
+from src.basedados import bd
+from src.busca import configurar_indice_nome, criar_termos_busca
+from src.modelos import FeiraLivre
+from test.helpers import FeiraLivreBuilder
+
+logger = logging.getLogger('app')
+logger.setLevel(logging.CRITICAL)
+
+
+class TestCriarTermosBusca(unittest.TestCase):
+    ''' Mantém os testes unitários relacionados à função criar_termos_busca. '''
+
+    def test_varias_palavras(self):
+        '''
+        Dado o nome 'praça santa'
+        Quando crio os termos da busca
+        Então devo receber uma consulta de prefixo para cada palavra.
+        '''
+        # Arrange
+        valor_esperado = '"praça"* "santa"*'
+        # Act
+        valor_atual = criar_termos_busca('praça santa')
+        # Assert
+        self.assertEqual(valor_atual, valor_esperado)
+
+    def test_sem_palavras(self):
+        '''
+        Dado um nome sem palavras
+        Quando crio os termos da busca
+        Então devo receber None.
+        '''
+        # Arrange
+        # Act
+        valor_atual = criar_termos_busca(' "*" ')
+        # Assert
+        self.assertIsNone(valor_atual)
+
+
+class TestBuscarNomeIndexado(unittest.TestCase):
+    ''' Mantém os testes relacionados à busca por nome indexada. '''
+    REGISTRO1, REGISTRO2 = '123', '456'
+    NOME1, NOME2 = 'PRACA SANTA HELENA', 'VILA FORMOSA'
+
+    def setUp(self):
+        app.config.from_object('config.TestingConfig')
+        self.app = app.test_client()
+        self.contexto = app.app_context()
+        self.contexto.push()
+        bd.create_all()
+
+    def tearDown(self):
+        bd.session.remove()
+        bd.drop_all()
+        self.contexto.pop()
+
+    def buscar_nomes(self, nome):
+        '''
+        Busca as feiras livres por nome.
+
+        Parâmetros
+        ==========
+        nome [str] -- nome buscado.
+
+        Retorno
+        =======
+        List -- nomes das feiras livres encontradas.
+        '''
+        resposta = self.app.get('/feiras?nome=' + nome)
+        return [i['nome'] for i in json.loads(resposta.data)['feiras']]
+
+    def test_acentos_e_prefixo(self):
+        '''
+        Dada uma feira livre de nome 'PRACA SANTA HELENA'
+        Quando o busco por nome='praça hel'
+        Então devo receber a feira livre na lista de feiras.
+        '''
+        # Arrange
+        FeiraLivreBuilder(bd).with_registro(self.REGISTRO1) \
+                             .with_nome(self.NOME1) \
+                             .build()
+        FeiraLivreBuilder(bd).with_registro(self.REGISTRO2) \
+                             .with_nome(self.NOME2) \
+                             .build()
+        # Act
+        valor_atual = self.buscar_nomes('praça hel')
+        # Assert
+        self.assertEqual(valor_atual, [self.NOME1])
+
+    def test_alteracao_nome(self):
+        '''
+        Dada uma feira livre de nome 'PRACA SANTA HELENA' renomeada para \
+        'VILA FORMOSA'
+        Quando o busco por nome='santa' e por nome='formosa'
+        Então devo receber a feira livre apenas na busca por 'formosa'.
+        '''
+        # Arrange
+        feira_livre = FeiraLivreBuilder(bd).with_nome(self.NOME1).build()
+        feira_livre.nome = self.NOME2
+        bd.session.commit()
+        # Act
+        antigo = self.buscar_nomes('santa')
+        novo = self.buscar_nomes('formosa')
+        # Assert
+        self.assertEqual(antigo, [])
+        self.assertEqual(novo, [self.NOME2])
+
+    def test_remocao(self):
+        '''
+        Dada uma feira livre de nome 'PRACA SANTA HELENA' removida
+        Quando o busco por nome='santa'
+        Então devo receber uma lista vazia de feiras.
+        '''
+        # Arrange
+        feira_livre = FeiraLivreBuilder(bd).with_nome(self.NOME1).build()
+        bd.session.delete(feira_livre)
+        bd.session.commit()
+        # Act
+        valor_atual = self.buscar_nomes('santa')
+        # Assert
+        self.assertEqual(valor_atual, [])
+        self.assertEqual(FeiraLivre.query.count(), 0)
+
+    def test_base_anterior_ao_indice(self):
+        '''
+        Dada uma base de dados com a feira livre 'PRACA SANTA HELENA' \
+        criada antes do índice de busca por nome
+        Quando a aplicação é inicializada e insiro a feira 'VILA FORMOSA'
+        Então devo receber cada feira livre na busca pelo seu nome.
+        '''
+        # Arrange
+        FeiraLivreBuilder(bd).with_registro(self.REGISTRO1) \
+                             .with_nome(self.NOME1) \
+                             .build()
+        bd.session.remove()
+        with bd.engine.begin() as conexao:
+            for gatilho in ('insercao', 'remocao', 'alteracao'):
+                conexao.exec_driver_sql('DROP TRIGGER "FeiraLivreBusca_{0}"'
+                                        .format(gatilho))
+            conexao.exec_driver_sql('DROP TABLE "FeiraLivreBusca"')
+        # Act
+        configurar_indice_nome(app)
+        FeiraLivreBuilder(bd).with_registro(self.REGISTRO2) \
+                             .with_nome(self.NOME2) \
+                             .build()
+        # Assert
+        self.assertEqual(self.buscar_nomes('santa'), [self.NOME1])
+        self.assertEqual(self.buscar_nomes('formosa'), [self.NOME2])
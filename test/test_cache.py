@@ -0,0 +1,322 @@
+''' Módulo responsável por manter/executar os testes dos caches. '''
+
+import unittest
+import logging
+from app import app
+from src.basedados import bd
+from src.cache import cache_dimensoes, CacheFragmentos, CacheRespostas
+from src.excecoes import ViolacaoIndiceUnico
+from src.modelos import Subprefeitura, Distrito, Regiao5, FeiraLivre
+from src.modelos import carregamento_feira_livre
+from test.helpers import ContadorConsultas, FeiraLivreBuilder
+
+logger = logging.getLogger('app')
+logger.setLevel(logging.CRITICAL)
+
+
+class TestCacheDimensoes(unittest.TestCase):
+    ''' Mantém os testes relacionados à classe CacheDimensoes. '''
+
+    def setUp(self):
+        app.config.from_object('config.TestingConfig')
+        self.contexto = app.app_context()
+        self.contexto.push()
+        bd.create_all()
+        self.cache = cache_dimensoes
+        self.cache.tamanho = 2
+
+    def tearDown(self):
+        bd.session.remove()
+        bd.drop_all()
+        self.contexto.pop()
+        self.cache.init_app(app)
+
+    def test_buscar_apos_commit(self):
+        '''
+        Dada uma subprefeitura criada pelo cache e confirmada com commit
+        Quando se procura novamente pela subprefeitura
+        Então deve receber o mesmo id sem executar instruções SQL.
+        '''
+        # Arrange
+        id_esperado = self.cache.buscar_ou_criar(bd.session, Subprefeitura,
+                                                 codigo='1', nome='sub')
+        bd.session.commit()
+        # Act
+        with ContadorConsultas(bd.engine) as contador:
+            valor_atual = self.cache.buscar_ou_criar(bd.session,
+                                                     Subprefeitura,
+                                                     codigo='1', nome='sub')
+        # Assert
+        self.assertEqual(valor_atual, id_esperado)
+        self.assertEqual(contador.quantidade, 0)
+
+    def test_rollback(self):
+        '''
+        Dada uma subprefeitura criada pelo cache em uma transação desfeita \
+        com rollback
+        Quando se procura novamente pela subprefeitura
+        Então a subprefeitura não deve estar no cache e deve ser criada \
+        novamente.
+        '''
+        # Arrange
+        self.cache.buscar_ou_criar(bd.session, Subprefeitura,
+                                   codigo='1', nome='sub')
+        bd.session.rollback()
+        # Act
+        valor_atual = self.cache.buscar_ou_criar(bd.session, Subprefeitura,
+                                                 codigo='1', nome='sub')
+        bd.session.commit()
+        # Assert
+        self.assertEqual(len(self.cache.entradas), 1)
+        self.assertEqual(Subprefeitura.query.get(valor_atual).codigo, '1')
+
+    def test_tamanho_maximo(self):
+        '''
+        Dado um cache de tamanho 2
+        Quando são criadas três regiões
+        Então a região menos usada deve ser descartada do cache.
+        '''
+        # Arrange
+        for nome in ('r1', 'r2', 'r3'):
+            self.cache.buscar_ou_criar(bd.session, Regiao5, nome=nome)
+            bd.session.commit()
+        # Act
+        chaves = list(self.cache.entradas.keys())
+        # Assert
+        self.assertEqual(chaves, [('Regiao5', 'r2'), ('Regiao5', 'r3')])
+
+    def test_violacao_indice_unico(self):
+        '''
+        Dado um distrito de codigo='1' e nome='dist' no cache
+        Quando se procura pelo distrito de codigo='1' e nome='novo dist'
+        Então deve lançar exceção ViolacaoIndiceUnico
+        '''
+        # Arrange
+        self.cache.buscar_ou_criar(bd.session, Distrito,
+                                   codigo='1', nome='dist')
+        bd.session.commit()
+        # Act
+        # Assert
+        self.assertRaises(ViolacaoIndiceUnico, self.cache.buscar_ou_criar,
+                          bd.session, Distrito, codigo='1', nome='novo dist')
+
+
+class TestCacheRespostas(unittest.TestCase):
+    ''' Mantém os testes relacionados à classe CacheRespostas. '''
+    CHAVE = ('regiao1', None, None, None, None, None)
+
+    def setUp(self):
+        app.config.from_object('config.TestingConfig')
+        self.contexto = app.app_context()
+        self.contexto.push()
+        bd.create_all()
+        self.cache = CacheRespostas(tamanho=2, ttl=60)
+
+    def tearDown(self):
+        bd.session.remove()
+        bd.drop_all()
+        self.contexto.pop()
+
+    def test_buscar(self):
+        '''
+        Dada uma resposta armazenada
+        Quando busco pela chave da resposta
+        Então devo receber o corpo e o ETag da resposta.
+        '''
+        # Arrange
+        etag = self.cache.armazenar(self.CHAVE, self.cache.geracao, b'{}')
+        valor_esperado = (b'{}', etag)
+        # Act
+        valor_atual = self.cache.buscar(self.CHAVE)
+        # Assert
+        self.assertEqual(valor_atual, valor_esperado)
+
+    def test_geracao_alterada(self):
+        '''
+        Dada uma resposta gerada antes do commit de uma alteração
+        Quando armazeno a resposta
+        Então a resposta não deve ser armazenada.
+        '''
+        # Arrange
+        geracao = self.cache.geracao
+        bd.session.add(Regiao5(nome='regiao1'))
+        bd.session.commit()
+        # Act
+        self.cache.armazenar(self.CHAVE, geracao, b'{}')
+        # Assert
+        self.assertIsNone(self.cache.buscar(self.CHAVE))
+
+    def test_commit_invalida(self):
+        '''
+        Dada uma resposta armazenada
+        Quando é feito o commit de uma alteração
+        Então a resposta deve ser descartada.
+        '''
+        # Arrange
+        self.cache.armazenar(self.CHAVE, self.cache.geracao, b'{}')
+        # Act
+        bd.session.add(Regiao5(nome='regiao1'))
+        bd.session.commit()
+        # Assert
+        self.assertIsNone(self.cache.buscar(self.CHAVE))
+
+    def test_rollback_nao_invalida(self):
+        '''
+        Dada uma resposta armazenada
+        Quando uma alteração é desfeita com rollback
+        Então a resposta deve continuar armazenada.
+        '''
+        # Arrange
+        self.cache.armazenar(self.CHAVE, self.cache.geracao, b'{}')
+        # Act
+        bd.session.add(Regiao5(nome='regiao1'))
+        bd.session.flush()
+        bd.session.rollback()
+        # Assert
+        self.assertIsNotNone(self.cache.buscar(self.CHAVE))
+
+    def test_ttl_expirado(self):
+        '''
+        Dado um cache com tempo de vida negativo
+        Quando armazeno e busco uma resposta
+        Então a resposta não deve ser encontrada.
+        '''
+        # Arrange
+        self.cache.ttl = -1
+        self.cache.armazenar(self.CHAVE, self.cache.geracao, b'{}')
+        # Act
+        valor_atual = self.cache.buscar(self.CHAVE)
+        # Assert
+        self.assertIsNone(valor_atual)
+
+
+class TestCacheFragmentos(unittest.TestCase):
+    ''' Mantém os testes relacionados à classe CacheFragmentos. '''
+
+    def setUp(self):
+        app.config.from_object('config.TestingConfig')
+        self.contexto = app.app_context()
+        self.contexto.push()
+        bd.create_all()
+        for registro in ('1', '2'):
+            FeiraLivreBuilder(bd).with_registro(registro) \
+                                 .with_bairro('bairro' + registro) \
+                                 .with_distrito('dist' + registro) \
+                                 .with_cod_distrito(registro).build()
+        self.cache = CacheFragmentos(tamanho=10)
+        feiras_livres = FeiraLivre.query \
+            .options(*carregamento_feira_livre()) \
+            .order_by(FeiraLivre.id).all()
+        self.ids = [i.id for i in feiras_livres]
+        self.feira_livre = feiras_livres[0]
+        self.cache.armazenar([(i, i.registro.encode()) for i in feiras_livres],
+                             self.cache.geracao)
+
+    def tearDown(self):
+        bd.session.remove()
+        bd.drop_all()
+        self.contexto.pop()
+
+    def test_buscar(self):
+        '''
+        Dadas duas feiras livres armazenadas
+        Quando busco pelos ids das feiras livres e por um id inexistente
+        Então devo receber o json das feiras livres armazenadas.
+        '''
+        # Arrange
+        valor_esperado = {self.ids[0]: b'1', self.ids[1]: b'2'}
+        # Act
+        valor_atual = self.cache.buscar(self.ids + [0])
+        # Assert
+        self.assertEqual(valor_atual, valor_esperado)
+
+    def test_ttl_expirado(self):
+        '''
+        Dado um cache com tempo de vida negativo
+        Quando armazeno e busco uma feira livre
+        Então a feira livre não deve ser encontrada e sua entrada deve \
+        ser removida.
+        '''
+        # Arrange
+        self.cache.ttl = -1
+        self.cache.armazenar([(self.feira_livre, b'1')], self.cache.geracao)
+        # Act
+        valor_atual = self.cache.buscar([self.feira_livre.id])
+        # Assert
+        self.assertEqual(valor_atual, {})
+        self.assertNotIn(self.feira_livre.id, self.cache.entradas)
+
+    def test_commit_dimensao_invalida_dependentes(self):
+        '''
+        Dadas duas feiras livres armazenadas, em distritos diferentes
+        Quando é feito o commit da alteração do distrito da primeira
+        Então apenas a primeira feira livre deve ser descartada.
+        '''
+        # Arrange
+        distrito = self.feira_livre.endereco.bairro.distrito
+        # Act
+        distrito.nome = 'novo dist'
+        bd.session.commit()
+        # Assert
+        self.assertEqual(self.cache.buscar(self.ids), {self.ids[1]: b'2'})
+
+    def test_commit_feira_livre_invalida(self):
+        '''
+        Dadas duas feiras livres armazenadas
+        Quando é feito o commit da remoção da primeira
+        Então apenas a primeira feira livre deve ser descartada.
+        '''
+        # Arrange
+        # Act
+        bd.session.delete(self.feira_livre)
+        bd.session.commit()
+        # Assert
+        self.assertEqual(self.cache.buscar(self.ids), {self.ids[1]: b'2'})
+
+    def test_rollback_nao_invalida(self):
+        '''
+        Dadas duas feiras livres armazenadas
+        Quando a alteração de uma delas é desfeita com rollback
+        Então as feiras livres devem continuar armazenadas.
+        '''
+        # Arrange
+        # Act
+        self.feira_livre.nome = 'novo nome'
+        bd.session.flush()
+        bd.session.rollback()
+        # Assert
+        self.assertEqual(len(self.cache.buscar(self.ids)), 2)
+
+    def test_geracao_alterada(self):
+        '''
+        Dada uma feira livre serializada antes do commit de uma alteração
+        Quando armazeno a feira livre
+        Então a feira livre não deve ser armazenada.
+        '''
+        # Arrange
+        self.cache.limpar()
+        geracao = self.cache.geracao
+        self.feira_livre.nome = 'novo nome'
+        bd.session.commit()
+        # Act
+        self.cache.armazenar([(self.feira_livre, b'1')], geracao)
+        # Assert
+        self.assertEqual(self.cache.buscar(self.ids), {})
+
+    def test_tamanho_maximo(self):
+        '''
+        Dado um cache com tamanho máximo 1
+        Quando armazeno duas feiras livres
+        Então apenas a última deve continuar armazenada, com suas \
+        dependências.
+        '''
+        # Arrange
+        self.cache.tamanho = 1
+        self.cache.limpar()
+        feiras_livres = FeiraLivre.query.order_by(FeiraLivre.id).all()
+        # Act
+        self.cache.armazenar([(i, i.registro.encode()) for i in feiras_livres],
+                             self.cache.geracao)
+        # Assert
+        self.assertEqual(self.cache.buscar(self.ids), {self.ids[1]: b'2'})
+        self.assertNotIn(('FeiraLivre', self.ids[0]), self.cache.dependentes)
@@ -0,0 +1,154 @@
+''' Módulo responsável por manter/executar os testes do teste de carga. '''
+
+import unittest
+import logging
+from app import app
+from src.basedados import bd
+from src.modelos import FeiraLivre
+from carga import interpretar_mix, listar_combinacoes, Histograma
+from carga import ClienteTeste, executar
+from test.helpers import FeiraLivreBuilder
+
+logger = logging.getLogger('app')
+logger.setLevel(logging.CRITICAL)
+
+
+class TestInterpretarMix(unittest.TestCase):
+    ''' Mantém os testes unitários relacionados à função interpretar_mix. '''
+
+    def test_interpretar(self):
+        '''
+        Dado um mix com buscar=70, adicionar=30 e remover=0
+        Quando interpreto o mix
+        Então devo receber os pesos de buscar e adicionar.
+        '''
+        # Arrange
+        mix = 'buscar=70,adicionar=30,remover=0'
+        valor_esperado = {'buscar': 70, 'adicionar': 30}
+        # Act
+        valor_atual = interpretar_mix(mix)
+        # Assert
+        self.assertEqual(valor_atual, valor_esperado)
+
+    def test_operacao_invalida(self):
+        '''
+        Dado um mix com uma operação inexistente
+        Quando interpreto o mix
+        Então devo receber um ValueError.
+        '''
+        # Arrange
+        mix = 'buscar=70,listar=30'
+        # Act
+        # Assert
+        with self.assertRaises(ValueError):
+            interpretar_mix(mix)
+
+
+class TestListarCombinacoes(unittest.TestCase):
+    ''' Mantém os testes unitários relacionados à função \
+    listar_combinacoes. '''
+
+    def test_todas(self):
+        '''
+        Dadas nenhuma combinação informada
+        Quando listo as combinações
+        Então devo receber as 32 combinações dos 5 filtros.
+        '''
+        # Arrange
+        # Act
+        valor_atual = listar_combinacoes()
+        # Assert
+        self.assertEqual(len(valor_atual), 32)
+        self.assertIn((), valor_atual)
+        self.assertIn(('regiao5', 'distrito', 'bairro', 'nome', 'area'),
+                      valor_atual)
+
+    def test_informadas(self):
+        '''
+        Dadas as combinações 'nome+bairro' e 'area'
+        Quando listo as combinações
+        Então devo receber os filtros de cada combinação na ordem padrão.
+        '''
+        # Arrange
+        combinacoes = ['nome+bairro', 'area']
+        valor_esperado = [('bairro', 'nome'), ('area',)]
+        # Act
+        valor_atual = listar_combinacoes(combinacoes)
+        # Assert
+        self.assertEqual(valor_atual, valor_esperado)
+
+
+class TestHistograma(unittest.TestCase):
+    ''' Mantém os testes unitários relacionados à classe Histograma. '''
+
+    def test_resumir(self):
+        '''
+        Dadas requisições de 0,5 ms, 3 ms e 3 ms, esta com erro 500
+        Quando resumo o histograma em 1 segundo
+        Então devo receber 3 requisições, 1 erro e os intervalos \
+        preenchidos.
+        '''
+        # Arrange
+        histograma = Histograma()
+        histograma.registrar(0.0005, 200)
+        histograma.registrar(0.003, 404)
+        histograma.registrar(0.003, 500)
+        # Act
+        resumo = histograma.resumir(1)
+        # Assert
+        self.assertEqual(resumo['requisicoes'], 3)
+        self.assertEqual(resumo['erros'], 1)
+        self.assertEqual(resumo['p50_ms'], 3)
+        self.assertEqual(resumo['histograma_ms']['<=1'], 1)
+        self.assertEqual(resumo['histograma_ms']['<=5'], 2)
+        self.assertEqual(resumo['histograma_ms']['>5000'], 0)
+
+
+class TestExecutar(unittest.TestCase):
+    ''' Mantém os testes de integração relacionados à função executar. '''
+
+    def setUp(self):
+        app.config.from_object('config.TestingConfig')
+        # As requisições são feitas em outras threads, cada uma com seu \
+        # contexto; nenhum contexto é mantido durante o teste
+        with app.app_context():
+            bd.create_all()
+            for registro in ('1', '2', '3'):
+                FeiraLivreBuilder(bd).with_registro(registro) \
+                                     .with_numero(registro) \
+                                     .with_latitude(-23.55) \
+                                     .with_longitude(-46.63) \
+                                     .build()
+            bd.session.remove()
+
+    def tearDown(self):
+        with app.app_context():
+            bd.session.remove()
+            bd.drop_all()
+
+    def test_executar(self):
+        '''
+        Dadas 3 feiras livres cadastradas
+        Quando executo 60 requisições de buscas e escritas
+        Então devo receber 60 requisições sem erros e nenhuma feira livre \
+        criada deve permanecer.
+        '''
+        # Arrange
+        mix = 'buscar=1,proximas=1,adicionar=1,alterar=1,remover=1'
+        # Act
+        resultado = executar(lambda: ClienteTeste(app), 60, mix=mix,
+                             combinacoes=['bairro', 'distrito+nome+area'])
+        # Assert
+        endpoints = resultado['endpoints']
+        self.assertEqual(sum(i['requisicoes'] for i in endpoints.values()),
+                         60)
+        self.assertEqual(sum(i['erros'] for i in endpoints.values()), 0)
+        self.assertIn('POST /feira', endpoints)
+        self.assertIn('GET /feiras [distrito+nome+area]', endpoints)
+        with app.app_context():
+            self.assertEqual(FeiraLivre.query.count(), 3)
+            bd.session.remove()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+''' Módulo responsável por manter/executar os testes da compressão das \
+respostas. '''
+
+import unittest
+import gzip
+import json
+import logging
+from app import app
+from src.basedados import bd
+from src.compressao import compressao
+from test.helpers import FeiraLivreBuilder
+from werkzeug.datastructures import Accept
+
+logger = logging.getLogger('app')
+logger.setLevel(logging.CRITICAL)
+
+
+class TestNegociar(unittest.TestCase):
+    ''' Mantém os testes unitários relacionados à negociação da codificação. '''
+
+    def test_maior_qualidade(self):
+        '''
+        Dado um cliente que aceita gzip com qualidade 0.5
+        Quando negocio a codificação
+        Então devo receber gzip.
+        '''
+        # Arrange
+        aceitas = Accept([('gzip', 0.5), ('identity', 1)])
+        # Act
+        valor_atual = compressao.negociar(aceitas)
+        # Assert
+        self.assertEqual(valor_atual, 'gzip')
+
+    def test_nao_aceita(self):
+        '''
+        Dado um cliente que recusa gzip (qualidade 0)
+        Quando negocio a codificação
+        Então não devo receber codificação.
+        '''
+        # Arrange
+        aceitas = Accept([('gzip', 0)])
+        # Act
+        valor_atual = compressao.negociar(aceitas)
+        # Assert
+        self.assertIsNone(valor_atual)
+
+
+class TestComprimir(unittest.TestCase):
+    ''' Mantém os testes relacionados à compressão das respostas da busca. '''
+    REGIAO1 = 'regiao1'
+
+    def setUp(self):
+        app.config.from_object('config.TestingConfig')
+        self.app = app.test_client()
+        self.contexto = app.app_context()
+        self.contexto.push()
+        bd.create_all()
+        FeiraLivreBuilder(bd).with_registro('1') \
+                             .with_regiao5(self.REGIAO1).build()
+        self.tamanho_minimo = compressao.tamanho_minimo
+        compressao.tamanho_minimo = 0
+        compressao.limpar()
+
+    def tearDown(self):
+        bd.session.remove()
+        bd.drop_all()
+        self.contexto.pop()
+        compressao.tamanho_minimo = self.tamanho_minimo
+
+    def test_gzip(self):
+        '''
+        Dado um cliente que aceita gzip
+        Quando busco feiras livres
+        Então devo receber o json comprimido com gzip e ETag fraco.
+        '''
+        # Arrange
+        valor_esperado = self.app.get('/feiras?regiao5=' + self.REGIAO1) \
+                                 .get_json()
+        # Act
+        resposta = self.app.get('/feiras?regiao5=' + self.REGIAO1,
+                                headers={'Accept-Encoding': 'gzip'})
+        # Assert
+        self.assertEqual(resposta.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', resposta.headers['Vary'])
+        self.assertTrue(resposta.headers['ETag'].startswith('W/'))
+        self.assertEqual(json.loads(gzip.decompress(resposta.data)),
+                         valor_esperado)
+
+    def test_corpo_comprimido_armazenado(self):
+        '''
+        Dada uma busca já respondida com gzip
+        Quando repito a busca
+        Então o corpo comprimido deve ser recuperado do cache.
+        '''
+        # Arrange
+        primeira = self.app.get('/feiras?regiao5=' + self.REGIAO1,
+                                headers={'Accept-Encoding': 'gzip'})
+        acertos = compressao.acertos
+        # Act
+        segunda = self.app.get('/feiras?regiao5=' + self.REGIAO1,
+                               headers={'Accept-Encoding': 'gzip'})
+        # Assert
+        self.assertEqual(compressao.acertos, acertos + 1)
+        self.assertEqual(segunda.data, primeira.data)
+
+    def test_etag_fraco_nao_modificado(self):
+        '''
+        Dada uma busca já respondida com gzip
+        Quando repito a busca com If-None-Match contendo o ETag fraco
+        Então devo receber o código 304.
+        '''
+        # Arrange
+        etag = self.app.get('/feiras?regiao5=' + self.REGIAO1,
+                            headers={'Accept-Encoding': 'gzip'}) \
+                       .headers['ETag']
+        # Act
+        resposta = self.app.get('/feiras?regiao5=' + self.REGIAO1,
+                                headers={'Accept-Encoding': 'gzip',
+                                         'If-None-Match': etag})
+        # Assert
+        self.assertEqual(resposta.status_code, 304)
+
+    def test_tamanho_minimo(self):
+        '''
+        Dada uma resposta menor que o tamanho mínimo
+        Quando busco feiras livres aceitando gzip
+        Então a resposta não deve ser comprimida.
+        '''
+        # Arrange
+        compressao.tamanho_minimo = 1024 * 1024
+        # Act
+        resposta = self.app.get('/feiras?regiao5=' + self.REGIAO1,
+                                headers={'Accept-Encoding': 'gzip'})
+        # Assert
+        self.assertNotIn('Content-Encoding', resposta.headers)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,277 @@
+''' Módulo responsável por manter/executar os testes do índice espacial. '''
+
+import unittest
+import json
+import logging
+from unittest import mock
+from sqlalchemy import update
+from app import app
+from src.basedados import bd
+from src.espacial import IndiceEspacial, calcular_distancia, \
+    indice_espacial
+from src.modelos import Endereco
+from test.helpers import FeiraLivreBuilder
+
+logger = logging.getLogger('app')
+logger.setLevel(logging.CRITICAL)
+
+
+class TestCalcularDistancia(unittest.TestCase):
+    ''' Mantém os testes unitários relacionados à função calcular_distancia. '''
+
+    def test_um_grau_latitude(self):
+        '''
+        Dados dois pontos separados por um grau de latitude
+        Quando calculo a distância entre eles
+        Então devo receber aproximadamente 111,2 km.
+        '''
+        # Arrange
+        # Act
+        valor_atual = calcular_distancia(-23.0, -46.0, -24.0, -46.0)
+        # Assert
+        self.assertAlmostEqual(valor_atual, 111195, delta=1)
+
+
+class TestIndiceEspacial(unittest.TestCase):
+    ''' Mantém os testes unitários relacionados à classe IndiceEspacial. '''
+    CENTRO = (-23.55, -46.63)
+
+    def setUp(self):
+        self.indice = IndiceEspacial(tamanho_celula=0.01)
+        # Pontos a aproximadamente 0, 1,1 km, 5,6 km e 111 km do centro
+        self.indice.inserir(1, -23.55, -46.63)
+        self.indice.inserir(2, -23.56, -46.63)
+        self.indice.inserir(3, -23.60, -46.63)
+        self.indice.inserir(4, -24.55, -46.63)
+
+    def buscar_ids(self, limite=None, raio=None):
+        '''
+        Busca os ids das feiras livres próximas ao centro.
+
+        Parâmetros
+        ==========
+        limite [int] -- quantidade máxima de feiras livres. (default=None)
+        raio [float] -- distância máxima, em metros. (default=None)
+
+        Retorno
+        =======
+        List(int) -- ids encontrados, do mais próximo ao mais distante.
+        '''
+        return [i for _, i in self.indice.buscar(*self.CENTRO, limite=limite,
+                                                 raio=raio)]
+
+    def test_mais_proximos(self):
+        '''
+        Dado um índice com quatro pontos
+        Quando busco os 3 pontos mais próximos do centro
+        Então devo receber os 3 pontos ordenados por distância.
+        '''
+        # Arrange
+        # Act
+        valor_atual = self.buscar_ids(limite=3)
+        # Assert
+        self.assertEqual(valor_atual, [1, 2, 3])
+
+    def test_raio(self):
+        '''
+        Dado um índice com quatro pontos
+        Quando busco os pontos a até 2 km do centro
+        Então devo receber apenas os 2 pontos dentro do raio.
+        '''
+        # Arrange
+        # Act
+        valor_atual = self.buscar_ids(raio=2000)
+        # Assert
+        self.assertEqual(valor_atual, [1, 2])
+
+    def test_ponto_distante(self):
+        '''
+        Dado um índice com quatro pontos
+        Quando busco os pontos mais próximos de um ponto a 100 km de todos
+        Então devo receber todos os pontos, do mais próximo ao mais distante.
+        '''
+        # Arrange
+        # Act
+        valor_atual = [i for _, i in self.indice.buscar(-25.5, -46.63)]
+        # Assert
+        self.assertEqual(valor_atual, [4, 3, 2, 1])
+
+    def test_mover_e_remover(self):
+        '''
+        Dado um índice em que o ponto 1 é movido para longe e o ponto 2 \
+        é removido
+        Quando busco os pontos a até 2 km do centro
+        Então devo receber uma lista vazia.
+        '''
+        # Arrange
+        self.indice.inserir(1, -30.0, -50.0)
+        self.indice.remover(2)
+        # Act
+        valor_atual = self.buscar_ids(raio=2000)
+        # Assert
+        self.assertEqual(valor_atual, [])
+
+    def test_ponto_fora_da_grade(self):
+        '''
+        Dado um índice com quatro pontos em torno de -23.5 de latitude
+        Quando busco o ponto mais próximo de (0, 0), a mais de 2000 anéis \
+        de células dos pontos
+        Então devo receber o ponto mais próximo examinando apenas os anéis \
+        que alcançam as células ocupadas.
+        '''
+        # Arrange
+        # Act
+        with mock.patch.object(IndiceEspacial, 'listar_celulas_anel',
+                               wraps=IndiceEspacial.listar_celulas_anel) \
+                as listar_celulas_anel:
+            valor_atual = self.indice.buscar(0, 0, limite=1)
+        # Assert
+        self.assertEqual([i for _, i in valor_atual], [1])
+        self.assertLess(listar_celulas_anel.call_count, 200)
+
+    def test_pontos_espalhados(self):
+        '''
+        Dado um índice com um ponto adicional em (0, 0), longe dos demais
+        Quando busco todos os pontos a partir de (-10, -20)
+        Então devo receber todos os pontos, do mais próximo ao mais distante.
+        '''
+        # Arrange
+        self.indice.inserir(5, 0.0, 0.0)
+        valor_esperado = sorted(
+            (calcular_distancia(-10, -20, *ponto), identificador)
+            for identificador, ponto in self.indice.pontos.items())
+        # Act
+        valor_atual = self.indice.buscar(-10, -20)
+        # Assert
+        self.assertEqual([i for _, i in valor_atual],
+                         [i for _, i in valor_esperado])
+
+
+class TestBuscarProximas(unittest.TestCase):
+    ''' Mantém os testes relacionados à busca de feiras livres próximas. '''
+
+    def setUp(self):
+        app.config.from_object('config.TestingConfig')
+        self.app = app.test_client()
+        self.contexto = app.app_context()
+        self.contexto.push()
+        bd.create_all()
+
+    def tearDown(self):
+        bd.session.remove()
+        bd.drop_all()
+        self.contexto.pop()
+
+    def criar_feira_livre(self, registro, latitude, longitude):
+        '''
+        Cria uma feira livre na localização informada.
+
+        Parâmetros
+        ==========
+        registro [str] -- registro da feira livre.
+        latitude [float] -- latitude da localização da feira livre.
+        longitude [float] -- longitude da localização da feira livre.
+
+        Retorno
+        =======
+        FeiraLivre -- feira livre criada.
+        '''
+        return FeiraLivreBuilder(bd).with_registro(registro) \
+                                    .with_numero(registro) \
+                                    .with_latitude(latitude) \
+                                    .with_longitude(longitude) \
+                                    .build()
+
+    def buscar_registros(self, parametros):
+        '''
+        Busca as feiras livres próximas.
+
+        Parâmetros
+        ==========
+        parametros [str] -- parâmetros da busca.
+
+        Retorno
+        =======
+        List -- registros das feiras livres encontradas.
+        '''
+        resposta = self.app.get('/feiras/proximas?' + parametros)
+        return [i['registro'] for i in json.loads(resposta.data)['feiras']]
+
+    def test_ordenadas_por_distancia(self):
+        '''
+        Dadas três feiras livres a distâncias diferentes do ponto
+        Quando busco as 2 feiras livres mais próximas do ponto
+        Então devo receber as 2 feiras livres mais próximas, em ordem, \
+        com suas distâncias.
+        '''
+        # Arrange
+        self.criar_feira_livre('3', -23.60, -46.63)
+        self.criar_feira_livre('1', -23.55, -46.63)
+        self.criar_feira_livre('2', -23.56, -46.63)
+        # Act
+        resposta = self.app.get('/feiras/proximas?lat=-23.55&lon=-46.63'
+                                '&limite=2')
+        feiras = json.loads(resposta.data)['feiras']
+        # Assert
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual([i['registro'] for i in feiras], ['1', '2'])
+        self.assertEqual(feiras[0]['distancia'], 0)
+        self.assertAlmostEqual(feiras[1]['distancia'], 1112, delta=1)
+
+    def test_alteracoes_apos_construcao(self):
+        '''
+        Dado um índice já construído
+        Quando uma feira livre é criada no raio, outra é movida para fora \
+        dele e outra é removida
+        Então a busca deve refletir as alterações.
+        '''
+        # Arrange
+        movida = self.criar_feira_livre('1', -23.55, -46.63)
+        removida = self.criar_feira_livre('2', -23.55, -46.63)
+        self.buscar_registros('lat=-23.55&lon=-46.63&raio=1000')
+        # Act
+        self.criar_feira_livre('3', -23.551, -46.63)
+        movida.endereco.latitude = -24.0
+        bd.session.add(movida)
+        bd.session.delete(removida)
+        bd.session.commit()
+        valor_atual = self.buscar_registros('lat=-23.55&lon=-46.63&raio=1000')
+        # Assert
+        self.assertEqual(valor_atual, ['3'])
+
+    def test_alteracoes_de_outro_processo(self):
+        '''
+        Dado um índice já construído
+        Quando uma feira livre é movida para fora do raio sem passar pela \
+        sessão, como por outro processo
+        Então a busca deve refletir a alteração após o ttl do índice.
+        '''
+        # Arrange
+        self.criar_feira_livre('1', -23.55, -46.63)
+        self.buscar_registros('lat=-23.55&lon=-46.63&raio=1000')
+        with bd.engine.begin() as conexao:
+            conexao.execute(update(Endereco).values(latitude=-24.0))
+        # Encerra a transação de leitura da sessão, como ao fim da requisição
+        bd.session.remove()
+        # Act
+        antes_ttl = self.buscar_registros('lat=-23.55&lon=-46.63&raio=1001')
+        with mock.patch.object(indice_espacial, 'ttl', 0):
+            apos_ttl = self.buscar_registros(
+                'lat=-23.55&lon=-46.63&raio=1002')
+        # Assert
+        self.assertEqual(antes_ttl, ['1'])
+        self.assertEqual(apos_ttl, [])
+
+    def test_parametros_invalidos(self):
+        '''
+        Dada uma busca sem longitude ou com latitude fora do intervalo
+        Quando busco as feiras livres próximas
+        Então devo receber o erro 400.
+        '''
+        # Arrange
+        # Act
+        sem_longitude = self.app.get('/feiras/proximas?lat=-23.55')
+        latitude_invalida = self.app.get('/feiras/proximas?lat=-123&lon=-46')
+        # Assert
+        self.assertEqual(sem_longitude.status_code, 400)
+        self.assertEqual(latitude_invalida.status_code, 400)
@@ -0,0 +1,427 @@
+''' Módulo responsável por manter/executar os testes da importação em lote. '''
+
+import unittest
+import csv
+import io
+import logging
+import os
+import tempfile
+from app import app
+from src.basedados import bd
+from src.excecoes import CoordenadaInvalida, ViolacaoIndiceUnico
+from src.importacao import TabelaEmMemoria, ImportadorLote
+from src.importacao import converter_localizacao, SincronizadorCsv
+from src.paralelo import ImportadorParalelo, ler_blocos
+from src.modelos import Subprefeitura, Distrito, Endereco, FeiraLivre
+from sqlalchemy import event
+
+logger = logging.getLogger('app')
+logger.setLevel(logging.CRITICAL)
+
+LINHA = {'ID': '1', 'LONG': '-46550164', 'LAT': '-23558733',
+         'SETCENS': '355030885000091', 'AREAP': '3550308005040',
+         'CODDIST': '87', 'DISTRITO': 'VILA FORMOSA', 'CODSUBPREF': '26',
+         'SUBPREFE': 'ARICANDUVA-FORMOSA-CARRAO', 'REGIAO5': 'Leste',
+         'REGIAO8': 'Leste 1', 'NOME_FEIRA': 'VILA FORMOSA',
+         'REGISTRO': '4041-0', 'LOGRADOURO': 'RUA MARAGOJIPE',
+         'NUMERO': 'S/N', 'BAIRRO': 'VL FORMOSA',
+         'REFERENCIA': 'TV RUA PRETORIA'}
+
+
+class TestConverterLocalizacao(unittest.TestCase):
+    ''' Mantém os testes unitários relacionados à função \
+    converter_localizacao. '''
+
+    def test_converter_escala(self):
+        '''
+        Dada uma linha com LAT='-23558733' e LONG='-46550164'
+        Quando converto a localização
+        Então devo receber a latitude e a longitude em graus.
+        '''
+        # Arrange
+        valor_esperado = (-23.558733, -46.550164)
+        # Act
+        valor_atual = converter_localizacao(LINHA)
+        # Assert
+        self.assertEqual(valor_atual, valor_esperado)
+
+    def test_vazia(self):
+        '''
+        Dada uma linha sem LAT e LONG
+        Quando converto a localização
+        Então devo receber None para ambas.
+        '''
+        # Arrange
+        linha = dict(LINHA, LAT='', LONG='')
+        # Act
+        valor_atual = converter_localizacao(linha)
+        # Assert
+        self.assertEqual(valor_atual, (None, None))
+
+    def test_fora_do_municipio(self):
+        '''
+        Dada uma linha com latitude e longitude trocadas
+        Quando converto a localização
+        Então deve lançar exceção CoordenadaInvalida.
+        '''
+        # Arrange
+        linha = dict(LINHA, LAT=LINHA['LONG'], LONG=LINHA['LAT'])
+        # Act
+        # Assert
+        self.assertRaises(CoordenadaInvalida, converter_localizacao, linha)
+
+
+class TestTabelaEmMemoria(unittest.TestCase):
+    ''' Mantém os testes unitários relacionados à classe TabelaEmMemoria. '''
+
+    def setUp(self):
+        app.config.from_object('config.TestingConfig')
+        self.contexto = app.app_context()
+        self.contexto.push()
+        bd.create_all()
+
+    def tearDown(self):
+        bd.session.remove()
+        bd.drop_all()
+        self.contexto.pop()
+
+    def test_criar(self):
+        '''
+        Dada uma tabela vazia
+        Quando se procura pelo elemento de codigo='123' duas vezes
+        Então deve receber o mesmo id e
+              deve existir apenas uma nova linha.
+        '''
+        # Arrange
+        tabela = TabelaEmMemoria(bd.session, Subprefeitura)
+        # Act
+        id1 = tabela.buscar_ou_criar(codigo='123', nome='sub')
+        id2 = tabela.buscar_ou_criar(codigo='123', nome='sub')
+        # Assert
+        self.assertEqual(id1, 1)
+        self.assertEqual(id2, 1)
+        self.assertEqual(len(tabela.novas_linhas), 1)
+
+    def test_buscar_existente(self):
+        '''
+        Dado um elemento de codigo='123' persistido
+        Quando se procura pelo elemento de codigo='123'
+        Então deve receber o id do elemento persistido e
+              não deve existir nova linha.
+        '''
+        # Arrange
+        bd.session.add(Subprefeitura(codigo='123', nome='sub'))
+        bd.session.commit()
+        tabela = TabelaEmMemoria(bd.session, Subprefeitura)
+        # Act
+        valor_atual = tabela.buscar_ou_criar(codigo='123', nome='sub')
+        # Assert
+        self.assertEqual(valor_atual, 1)
+        self.assertEqual(tabela.novas_linhas, [])
+        self.assertEqual(tabela.proximo_id, 2)
+
+    def test_criar_violacao_indice_unico(self):
+        '''
+        Dado um elemento de codigo='123' e nome='dist'
+        Quando se procura pelo elemento de codigo='123' e nome='novo dist'
+        Então deve lançar exceção ViolacaoIndiceUnico
+        '''
+        # Arrange
+        tabela = TabelaEmMemoria(bd.session, Distrito)
+        tabela.buscar_ou_criar(codigo='123', nome='dist')
+        # Act
+        # Assert
+        self.assertRaises(ViolacaoIndiceUnico, tabela.buscar_ou_criar,
+                          codigo='123', nome='novo dist')
+
+    def test_criar_ou_alterar_e_desfazer(self):
+        '''
+        Dado um elemento de codigo='123' e nome='sub' persistido
+        Quando crio ou altero o elemento de codigo='123' com nome='novo' \
+        e desfaço a alteração
+        Então deve receber o id do elemento persistido, alterado, e após \
+        desfazer a linha deve voltar ao nome 'sub' sem alterações.
+        '''
+        # Arrange
+        bd.session.add(Subprefeitura(codigo='123', nome='sub'))
+        bd.session.commit()
+        tabela = TabelaEmMemoria(bd.session, Subprefeitura)
+        marca = tabela.marcar()
+        # Act
+        identificador = tabela.criar_ou_alterar(codigo='123', nome='novo')
+        alteradas = dict(tabela.linhas_alteradas)
+        tabela.desfazer(marca)
+        # Assert
+        self.assertEqual(identificador, 1)
+        self.assertEqual(alteradas[1]['nome'], 'novo')
+        self.assertEqual(tabela.linhas_alteradas, {})
+        self.assertEqual(tabela.linhas_id[1]['nome'], 'sub')
+        self.assertEqual(tabela.buscar_id(codigo='123'), 1)
+
+    def test_reservar_escrita(self):
+        '''
+        Dada uma sessão sem transação
+        Quando carrego a tabela
+        Então a transação deve reservar a escrita (BEGIN IMMEDIATE) \
+        antes de ler o maior id.
+        '''
+        # Arrange
+        instrucoes = list()
+
+        def registrar(conexao, cursor, instrucao, *args):
+            instrucoes.append(instrucao)
+        event.listen(bd.engine, 'before_cursor_execute', registrar)
+        # Act
+        try:
+            TabelaEmMemoria(bd.session, Subprefeitura)
+        finally:
+            event.remove(bd.engine, 'before_cursor_execute', registrar)
+        # Assert
+        self.assertEqual(instrucoes[0], 'BEGIN IMMEDIATE')
+
+
+class TestImportadorLote(unittest.TestCase):
+    ''' Mantém os testes relacionados à classe ImportadorLote. '''
+
+    def setUp(self):
+        app.config.from_object('config.TestingConfig')
+        self.contexto = app.app_context()
+        self.contexto.push()
+        bd.create_all()
+
+    def tearDown(self):
+        bd.session.remove()
+        bd.drop_all()
+        self.contexto.pop()
+
+    def test_gravar(self):
+        '''
+        Dadas duas linhas do arquivo csv de feiras no mesmo endereço
+        Quando as importo em lote
+        Então devem ser persistidas duas feiras e um endereço.
+        '''
+        # Arrange
+        linha1 = dict(LINHA)
+        linha2 = dict(LINHA, ID='2', REGISTRO='4041-1')
+        importador = ImportadorLote(bd.session)
+        # Act
+        importador.adicionar(linha1)
+        importador.adicionar(linha2)
+        importador.gravar()
+        # Assert
+        self.assertEqual(FeiraLivre.query.count(), 2)
+        self.assertEqual(Endereco.query.count(), 1)
+        feira_livre = FeiraLivre.query.filter_by(registro='4041-1').first()
+        self.assertEqual(feira_livre.identificador, 2)
+        self.assertEqual(feira_livre.endereco.bairro.distrito.subprefeitura
+                         .nome, 'ARICANDUVA-FORMOSA-CARRAO')
+        self.assertEqual(feira_livre.endereco.latitude, -23.558733)
+
+    def test_violacao_indice_unico(self):
+        '''
+        Dadas duas linhas do arquivo csv com o mesmo registro e nomes \
+        diferentes
+        Quando as importo em lote
+        Então deve lançar exceção ViolacaoIndiceUnico e
+              nenhuma feira deve ser persistida.
+        '''
+        # Arrange
+        linha1 = dict(LINHA)
+        linha2 = dict(LINHA, NOME_FEIRA='OUTRA')
+        importador = ImportadorLote(bd.session)
+        importador.adicionar(linha1)
+        # Act
+        # Assert
+        self.assertRaises(ViolacaoIndiceUnico, importador.adicionar, linha2)
+        self.assertEqual(FeiraLivre.query.count(), 0)
+
+
+class TestSincronizadorCsv(unittest.TestCase):
+    ''' Mantém os testes relacionados à classe SincronizadorCsv. '''
+
+    def setUp(self):
+        app.config.from_object('config.TestingConfig')
+        self.contexto = app.app_context()
+        self.contexto.push()
+        bd.create_all()
+        self.linhas = [dict(LINHA),
+                       dict(LINHA, ID='2', REGISTRO='4041-1', NUMERO='10')]
+        SincronizadorCsv(bd.session).sincronizar(self.linhas)
+
+    def tearDown(self):
+        bd.session.remove()
+        bd.drop_all()
+        self.contexto.pop()
+
+    def test_sem_alteracoes(self):
+        '''
+        Dado um arquivo csv já sincronizado
+        Quando o sincronizo novamente
+        Então nenhuma feira deve ser criada, alterada ou removida.
+        '''
+        # Arrange
+        valor_esperado = {'criada': 0, 'alterada': 0, 'inalterada': 2,
+                          'removida': 0, 'erro': 0}
+        # Act
+        valor_atual = SincronizadorCsv(bd.session).sincronizar(self.linhas)
+        # Assert
+        self.assertEqual(valor_atual, valor_esperado)
+
+    def test_alteracao_e_remocao(self):
+        '''
+        Dado um arquivo csv já sincronizado
+        Quando o sincronizo com a primeira feira renomeada, sem a segunda \
+        feira e com uma nova feira
+        Então a primeira feira deve ser alterada, a segunda removida e a \
+        nova criada.
+        '''
+        # Arrange
+        linhas = [dict(LINHA, NOME_FEIRA='NOVO NOME'),
+                  dict(LINHA, ID='3', REGISTRO='4041-2', NUMERO='20')]
+        valor_esperado = {'criada': 1, 'alterada': 1, 'inalterada': 0,
+                          'removida': 1, 'erro': 0}
+        # Act
+        valor_atual = SincronizadorCsv(bd.session).sincronizar(linhas)
+        # Assert
+        self.assertEqual(valor_atual, valor_esperado)
+        self.assertEqual(sorted(i.registro for i in FeiraLivre.query),
+                         ['4041-0', '4041-2'])
+        self.assertEqual(FeiraLivre.query.filter_by(registro='4041-0')
+                         .first().nome, 'NOVO NOME')
+
+    def test_alteracao_referencia(self):
+        '''
+        Dado um arquivo csv já sincronizado
+        Quando o sincronizo com apenas a REFERENCIA e o SETCENS da \
+        primeira feira alterados
+        Então a primeira feira deve ser alterada, mantendo o mesmo \
+        endereço com a nova referência e o novo setor censitário.
+        '''
+        # Arrange
+        endereco_id = FeiraLivre.query.filter_by(registro='4041-0') \
+                                      .first().endereco_id
+        linhas = [dict(LINHA, REFERENCIA='', SETCENS='1'), self.linhas[1]]
+        valor_esperado = {'criada': 0, 'alterada': 1, 'inalterada': 1,
+                          'removida': 0, 'erro': 0}
+        # Act
+        valor_atual = SincronizadorCsv(bd.session).sincronizar(linhas)
+        bd.session.expire_all()
+        # Assert
+        self.assertEqual(valor_atual, valor_esperado)
+        endereco = FeiraLivre.query.filter_by(registro='4041-0').first() \
+                                   .endereco
+        self.assertEqual(endereco.id, endereco_id)
+        self.assertEqual(endereco.referencia, '')
+        self.assertEqual(endereco.setor_censitario, '1')
+        self.assertEqual(Endereco.query.count(), 2)
+
+    def test_coordenada_invalida(self):
+        '''
+        Dado um arquivo csv já sincronizado
+        Quando o sincronizo com a latitude da primeira feira inválida
+        Então devo receber o erro da linha e a feira não deve ser alterada \
+        nem removida.
+        '''
+        # Arrange
+        linhas = [dict(LINHA, LAT='0'), self.linhas[1]]
+        sincronizador = SincronizadorCsv(bd.session)
+        # Act
+        valor_atual = sincronizador.sincronizar(linhas)
+        # Assert
+        self.assertEqual(valor_atual['erro'], 1)
+        self.assertEqual(valor_atual['removida'], 0)
+        self.assertTrue(sincronizador.erros[0].startswith('Linha 2:'))
+        self.assertEqual(FeiraLivre.query.count(), 2)
+
+
+class TestLerBlocos(unittest.TestCase):
+    ''' Mantém os testes unitários relacionados à função ler_blocos. '''
+
+    def test_quebra_de_linha_entre_aspas(self):
+        '''
+        Dado um arquivo cujo segundo registro contém uma quebra de linha \
+        entre aspas
+        Quando o leio em blocos de uma linha
+        Então o segundo registro não deve ser dividido entre blocos.
+        '''
+        # Arrange
+        arquivo = io.StringIO('a,1\nb,"x\ny"\nc,3\n')
+        valor_esperado = [(2, 'a,1\n'), (3, 'b,"x\ny"\n'), (5, 'c,3\n')]
+        # Act
+        valor_atual = list(ler_blocos(arquivo, 1))
+        # Assert
+        self.assertEqual(valor_atual, valor_esperado)
+
+
+class TestImportadorParalelo(unittest.TestCase):
+    ''' Mantém os testes relacionados à classe ImportadorParalelo. '''
+
+    def setUp(self):
+        app.config.from_object('config.TestingConfig')
+        self.contexto = app.app_context()
+        self.contexto.push()
+        bd.create_all()
+
+    def tearDown(self):
+        bd.session.remove()
+        bd.drop_all()
+        self.contexto.pop()
+
+    def criar_arquivo(self, linhas):
+        '''
+        Cria um arquivo csv temporário.
+
+        Parâmetros
+        ==========
+        linhas [List(Dict)] -- linhas do arquivo csv.
+
+        Retorno
+        =======
+        str -- caminho para o arquivo csv.
+        '''
+        descritor, caminho = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(descritor, 'w', newline='') as arquivo:
+            escritor = csv.DictWriter(arquivo, fieldnames=list(LINHA.keys()))
+            escritor.writeheader()
+            escritor.writerows(linhas)
+        self.addCleanup(os.remove, caminho)
+        return caminho
+
+    def test_importar(self):
+        '''
+        Dado um arquivo csv com 10 feiras livres
+        Quando o importo com 2 processos e blocos de 3 linhas
+        Então as 10 feiras livres devem ser persistidas na ordem do arquivo.
+        '''
+        # Arrange
+        caminho = self.criar_arquivo([dict(LINHA, ID=str(i), REGISTRO=str(i))
+                                      for i in range(10)])
+        importador = ImportadorParalelo(bd.session, processos=2,
+                                        tamanho_bloco=3)
+        # Act
+        valor_atual = importador.importar(caminho)
+        # Assert
+        self.assertEqual(valor_atual, 10)
+        self.assertEqual([(i.id, i.registro) for i in FeiraLivre.query
+                          .order_by(FeiraLivre.id)],
+                         [(i + 1, str(i)) for i in range(10)])
+        self.assertEqual(Endereco.query.count(), 1)
+
+    def test_coordenada_invalida(self):
+        '''
+        Dado um arquivo csv cuja última linha tem latitude inválida
+        Quando o importo em blocos de 1 linha
+        Então deve lançar exceção CoordenadaInvalida com o número da linha \
+        e nenhuma feira deve ser persistida.
+        '''
+        # Arrange
+        caminho = self.criar_arquivo([dict(LINHA),
+                                      dict(LINHA, REGISTRO='2', LAT='0')])
+        importador = ImportadorParalelo(bd.session, processos=1,
+                                        tamanho_bloco=1)
+        # Act
+        with self.assertRaises(CoordenadaInvalida) as contexto:
+            importador.importar(caminho)
+        # Assert
+        self.assertTrue(str(contexto.exception).startswith('Linha 3:'))
+        self.assertEqual(FeiraLivre.query.count(), 0)
@@ -0,0 +1,70 @@
+''' Módulo responsável por manter/executar os testes da instrumentação \
+das instruções SQL. '''
+
+import unittest
+import logging
+from app import app
+from src.basedados import bd
+from src.instrumentacao import instrumentacao_sql
+from test.helpers import FeiraLivreBuilder
+
+logger = logging.getLogger('app')
+logger.setLevel(logging.CRITICAL)
+
+
+class TestInstrumentacaoSql(unittest.TestCase):
+    ''' Mantém os testes relacionados à classe InstrumentacaoSql. '''
+
+    def setUp(self):
+        app.config.from_object('config.TestingConfig')
+        self.app = app.test_client()
+        self.contexto = app.app_context()
+        self.contexto.push()
+        bd.create_all()
+        FeiraLivreBuilder(bd).with_registro('1').build()
+        self.limite_lento = instrumentacao_sql.limite_lento
+
+    def tearDown(self):
+        bd.session.remove()
+        bd.drop_all()
+        self.contexto.pop()
+        instrumentacao_sql.limite_lento = self.limite_lento
+
+    def test_server_timing(self):
+        '''
+        Dada uma feira livre cadastrada
+        Quando busco as feiras
+        Então devo receber no cabeçalho Server-Timing o tempo e a \
+        quantidade de instruções SQL executadas.
+        '''
+        # Arrange
+        # Act
+        resposta = self.app.get('/feiras')
+        # Assert
+        metricas = resposta.headers['Server-Timing'].split(', ')
+        self.assertTrue(metricas[0].startswith('sql;dur='))
+        self.assertEqual(metricas[1], 'sql-instrucoes;desc="2"')
+        self.assertTrue(metricas[2].startswith('app;dur='))
+
+    def test_instrucao_lenta(self):
+        '''
+        Dado o limite de instruções lentas igual a 0 ms
+        Quando busco as feiras
+        Então as instruções devem ser registradas no log.
+        '''
+        # Arrange
+        instrumentacao_sql.limite_lento = 0
+        instrucoes_lentas = instrumentacao_sql.instrucoes_lentas
+        # Act
+        with self.assertLogs('app', level='WARNING') as log:
+            self.app.get('/feiras')
+        # Assert
+        registro = log.records[0]
+        self.assertIn('FROM "FeiraLivre"', registro.sql)
+        self.assertGreaterEqual(registro.latencia_ms, 0)
+        self.assertEqual(instrumentacao_sql.instrucoes_lentas,
+                         instrucoes_lentas + 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+''' Módulo responsável por manter/executar os testes do log de requisições. '''
+
+import unittest
+import json
+import logging
+import os
+import tempfile
+from app import app, log_requisicoes
+from src.basedados import bd
+from src.logs import FormatadorEstruturado
+
+logger = logging.getLogger('app')
+logger.setLevel(logging.CRITICAL)
+
+
+class TestFormatadorEstruturado(unittest.TestCase):
+    ''' Mantém os testes unitários relacionados à classe \
+    FormatadorEstruturado. '''
+
+    def test_registro_requisicao(self):
+        '''
+        Dado um registro de log de uma requisição
+        Quando o formato
+        Então devo receber uma linha json contendo os dados da requisição.
+        '''
+        # Arrange
+        registro = logging.makeLogRecord({'levelname': 'INFO',
+                                          'metodo': 'GET',
+                                          'caminho': '/feiras',
+                                          'status': 200,
+                                          'corpo': 'ação'})
+        # Act
+        valor_atual = FormatadorEstruturado().format(registro)
+        # Assert
+        dados = json.loads(valor_atual)
+        self.assertEqual(dados['metodo'], 'GET')
+        self.assertEqual(dados['caminho'], '/feiras')
+        self.assertEqual(dados['status'], 200)
+        self.assertIn('ação', valor_atual)
+
+
+class TestLogRequisicoes(unittest.TestCase):
+    ''' Mantém os testes relacionados à classe LogRequisicoes. '''
+
+    def setUp(self):
+        app.config.from_object('config.TestingConfig')
+        self.app = app.test_client()
+        self.contexto = app.app_context()
+        self.contexto.push()
+        bd.create_all()
+
+    def tearDown(self):
+        bd.session.remove()
+        bd.drop_all()
+        self.contexto.pop()
+        log_requisicoes.amostragem_corpo = 0.0
+
+    def test_sucesso_sem_corpo(self):
+        '''
+        Dada a amostragem de corpo desativada
+        Quando busco as feiras
+        Então deve ser registrada a requisição sem o corpo da resposta.
+        '''
+        # Arrange
+        # Act
+        with self.assertLogs('app', level='INFO') as log:
+            self.app.get('/feiras?nome=x')
+        # Assert
+        registro = log.records[0]
+        self.assertEqual(registro.metodo, 'GET')
+        self.assertEqual(registro.caminho, '/feiras')
+        self.assertEqual(registro.parametros, 'nome=x')
+        self.assertEqual(registro.status, 200)
+        self.assertFalse(hasattr(registro, 'corpo'))
+
+    def test_sucesso_com_corpo(self):
+        '''
+        Dada a amostragem de corpo de todas as respostas
+        Quando busco as feiras
+        Então deve ser registrada a requisição com o corpo da resposta.
+        '''
+        # Arrange
+        log_requisicoes.amostragem_corpo = 1.0
+        # Act
+        with self.assertLogs('app', level='INFO') as log:
+            resposta = self.app.get('/feiras')
+        # Assert
+        self.assertEqual(log.records[0].corpo, resposta.get_data(as_text=True))
+
+    def test_erro(self):
+        '''
+        Dada uma feira livre inexistente
+        Quando removo a feira
+        Então deve ser registrado um erro com o corpo da resposta.
+        '''
+        # Arrange
+        # Act
+        with self.assertLogs('app', level='ERROR') as log:
+            resposta = self.app.delete('/feira?registro=123')
+        # Assert
+        self.assertEqual(log.records[0].status, 404)
+        self.assertEqual(log.records[0].corpo, resposta.get_data(as_text=True))
+
+    def test_escrita_em_segundo_plano(self):
+        '''
+        Dado o log direcionado para um arquivo
+        Quando busco as feiras e encerro a escrita
+        Então o arquivo deve conter uma linha json da requisição.
+        '''
+        # Arrange
+        diretorio = tempfile.mkdtemp()
+        app.config['LOG_ARQUIVO'] = os.path.join(diretorio, 'log.txt')
+        handlers = list(logger.handlers)
+        log_requisicoes.iniciar_escrita()
+        # Act
+        try:
+            self.app.get('/feiras')
+        finally:
+            log_requisicoes.parar_escrita()
+            logger.handlers = handlers
+            logger.setLevel(logging.CRITICAL)
+        # Assert
+        with open(app.config['LOG_ARQUIVO'], encoding='utf-8') as arquivo:
+            dados = json.loads(arquivo.readline())
+        self.assertEqual(dados['caminho'], '/feiras')
+        self.assertEqual(dados['status'], 200)
@@ -0,0 +1,150 @@
+''' Módulo responsável por manter/executar os testes das métricas. '''
+
+import unittest
+import logging
+import os
+import tempfile
+import threading
+from app import app
+from src.basedados import bd
+from src.metricas import RegistroMetricas, formatar_rotulos
+from src.metricas import criar_fragmento, serializar_fragmento
+
+logger = logging.getLogger('app')
+logger.setLevel(logging.CRITICAL)
+
+
+class TestFormatarRotulos(unittest.TestCase):
+    ''' Mantém os testes unitários relacionados à função formatar_rotulos. '''
+
+    def test_escapar(self):
+        '''
+        Dado um rótulo com aspas, barra invertida e quebra de linha
+        Quando formato os rótulos
+        Então devo receber os caracteres escapados.
+        '''
+        # Arrange
+        rotulos = (('rota', 'a"b\\c\nd'),)
+        valor_esperado = '{rota="a\\"b\\\\c\\nd"}'
+        # Act
+        valor_atual = formatar_rotulos(rotulos)
+        # Assert
+        self.assertEqual(valor_atual, valor_esperado)
+
+
+class TestRegistroMetricas(unittest.TestCase):
+    ''' Mantém os testes unitários relacionados à classe RegistroMetricas. '''
+
+    ROTULOS = (('metodo', 'GET'), ('rota', '/feiras'))
+
+    def test_histograma(self):
+        '''
+        Dadas observações de 0,003 s e 0,2 s
+        Quando exporto as métricas
+        Então devo receber os intervalos acumulados, a soma e a quantidade.
+        '''
+        # Arrange
+        registro = RegistroMetricas()
+        nome = 'feiraslivresapi_requisicao_duracao_segundos'
+        registro.observar(nome, self.ROTULOS, 0.003)
+        registro.observar(nome, self.ROTULOS, 0.2)
+        # Act
+        linhas = registro.exportar().splitlines()
+        # Assert
+        self.assertIn('# TYPE {0} histogram'.format(nome), linhas)
+        self.assertIn(nome + '_bucket{metodo="GET",rota="/feiras",'
+                      'le="0.0025"} 0', linhas)
+        self.assertIn(nome + '_bucket{metodo="GET",rota="/feiras",'
+                      'le="0.005"} 1', linhas)
+        self.assertIn(nome + '_bucket{metodo="GET",rota="/feiras",'
+                      'le="+Inf"} 2', linhas)
+        self.assertIn(nome + '_sum{metodo="GET",rota="/feiras"} 0.203',
+                      linhas)
+        self.assertIn(nome + '_count{metodo="GET",rota="/feiras"} 2', linhas)
+
+    def test_threads(self):
+        '''
+        Dados incrementos feitos por duas threads já encerradas
+        Quando exporto as métricas
+        Então devo receber a soma dos incrementos.
+        '''
+        # Arrange
+        registro = RegistroMetricas()
+        nome = 'feiraslivresapi_requisicoes_total'
+        threads = [threading.Thread(target=registro.incrementar,
+                                    args=(nome, self.ROTULOS, 2))
+                   for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Act
+        linhas = registro.exportar().splitlines()
+        # Assert
+        self.assertIn(nome + '{metodo="GET",rota="/feiras"} 4', linhas)
+        self.assertEqual(registro.fragmentos, [])
+
+    def test_processos(self):
+        '''
+        Dadas as amostras de outro processo gravadas no diretório
+        Quando exporto as métricas
+        Então devo receber a soma das amostras dos dois processos.
+        '''
+        # Arrange
+        nome = 'feiraslivresapi_requisicoes_total'
+        with tempfile.TemporaryDirectory() as diretorio:
+            registro = RegistroMetricas()
+            registro.diretorio = diretorio
+            outro = criar_fragmento()
+            outro['contadores'][(nome, self.ROTULOS)] = 3
+            with open(registro.caminho_processo(os.getpid() + 1), 'w') as \
+                    arquivo:
+                arquivo.write(serializar_fragmento(outro))
+            registro.incrementar(nome, self.ROTULOS)
+            # Act
+            linhas = registro.exportar().splitlines()
+            # Assert
+            self.assertIn(nome + '{metodo="GET",rota="/feiras"} 4', linhas)
+            self.assertTrue(os.path.exists(registro.caminho_processo()))
+
+
+class TestExportarMetricas(unittest.TestCase):
+    ''' Mantém os testes relacionados ao endpoint GET /metrics. '''
+
+    def setUp(self):
+        app.config.from_object('config.TestingConfig')
+        self.app = app.test_client()
+        self.contexto = app.app_context()
+        self.contexto.push()
+        bd.create_all()
+
+    def tearDown(self):
+        bd.session.remove()
+        bd.drop_all()
+        self.contexto.pop()
+
+    def test_exportar(self):
+        '''
+        Dadas duas buscas iguais de feiras
+        Quando consulto as métricas
+        Então devo receber, no formato do Prometheus, a quantidade de \
+        requisições, o tempo SQL e a taxa de acerto do cache de respostas.
+        '''
+        # Arrange
+        self.app.get('/feiras?bairro=metricas')
+        self.app.get('/feiras?bairro=metricas')
+        # Act
+        resposta = self.app.get('/metrics')
+        # Assert
+        texto = resposta.get_data(as_text=True)
+        self.assertEqual(resposta.mimetype, 'text/plain')
+        self.assertIn('feiraslivresapi_requisicoes_total{metodo="GET",'
+                      'rota="/feiras",status="200"}', texto)
+        self.assertIn('feiraslivresapi_sql_duracao_segundos_count{'
+                      'metodo="GET",rota="/feiras"}', texto)
+        self.assertIn('feiraslivresapi_cache_taxa_acerto{cache="respostas"}',
+                      texto)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,7 +6,8 @@ import logging
 from app import app
 from src.basedados import bd
 from src.excecoes import ViolacaoIndiceUnico
-from src.modelos import converter_dict, buscar_ou_criar
+from src.modelos import converter_dict, buscar_ou_criar, criar_ou_buscar
+from src.modelos import verificar_violacao_indice_unico
 from src.modelos import Subprefeitura, Distrito, Regiao5, Regiao8
 from src.modelos import Bairro, Logradouro, Endereco, FeiraLivre
 
@@ -165,6 +166,163 @@ class TestBuscarOuCriar(unittest.TestCase):
         self.assertEqual(valor_atual, valor_esperado)
 
 
+class TestCriarOuBuscar(unittest.TestCase):
+    ''' Mantém os testes unitários relacionados à função criar_ou_buscar. '''
+
+    def setUp(self):
+        app.config.from_object('config.TestingConfig')
+        self.contexto = app.app_context()
+        self.contexto.push()
+        bd.create_all()
+
+    def tearDown(self):
+        bd.session.remove()
+        bd.drop_all()
+        self.contexto.pop()
+
+    def test_criar(self):
+        '''
+        Dado um elemento com atributo codigo
+        Quando se cria o elemento de codigo='123'
+        Então deve persistir o elemento (com código '123') e
+              deve existir apenas um elemento no final.
+        '''
+        # Arrange
+        # Act
+        valor_atual = criar_ou_buscar(bd.session, Subprefeitura, codigo='123')
+        # Assert
+        self.assertEqual(valor_atual.codigo, '123')
+        self.assertEqual(Subprefeitura.query.count(), 1)
+
+    def test_buscar(self):
+        '''
+        Dado um elemento com atributo codigo='123'
+        Quando se cria o elemento de codigo='123'
+        Então não deve persistir outro elemento e
+              deve retornar o elemento existente.
+        '''
+        # Arrange
+        valor_esperado = Subprefeitura(codigo='123')
+        bd.session.add(valor_esperado)
+        bd.session.commit()
+        # Act
+        valor_atual = criar_ou_buscar(bd.session, Subprefeitura, codigo='123')
+        # Assert
+        self.assertEqual(valor_atual, valor_esperado)
+        self.assertEqual(Subprefeitura.query.count(), 1)
+
+    def test_violacao_indice_unico(self):
+        '''
+        Dado um distrito de codigo='123' e nome='dist'
+        Quando se cria o distrito de codigo='123' e nome='novo dist' após \
+        criar uma subprefeitura na mesma transação
+        Então deve lançar exceção ViolacaoIndiceUnico e
+              a subprefeitura não deve ser desfeita.
+        '''
+        # Arrange
+        bd.session.add(Distrito(codigo='123', nome='dist'))
+        bd.session.commit()
+        criar_ou_buscar(bd.session, Subprefeitura, codigo='1')
+        # Act
+        # Assert
+        with self.assertRaisesRegex(ViolacaoIndiceUnico, 'codigo'):
+            criar_ou_buscar(bd.session, Distrito, codigo='123',
+                            nome='novo dist')
+        bd.session.commit()
+        self.assertEqual(Distrito.query.count(), 1)
+        self.assertEqual(Subprefeitura.query.count(), 1)
+
+    def test_rollback(self):
+        '''
+        Dado um elemento criado em uma transação
+        Quando a transação é desfeita com rollback
+        Então o elemento não deve ser persistido.
+        '''
+        # Arrange
+        criar_ou_buscar(bd.session, Subprefeitura, codigo='123')
+        # Act
+        bd.session.rollback()
+        # Assert
+        self.assertEqual(Subprefeitura.query.count(), 0)
+
+
+class TestIndicesChaveUnica(unittest.TestCase):
+    ''' Mantém os testes relacionados aos índices de chave única dos \
+    modelos. '''
+
+    def setUp(self):
+        app.config.from_object('config.TestingConfig')
+        self.contexto = app.app_context()
+        self.contexto.push()
+        bd.create_all()
+
+    def tearDown(self):
+        bd.session.remove()
+        bd.drop_all()
+        self.contexto.pop()
+
+    def test_indice_de_uma_coluna(self):
+        '''
+        Dado o modelo Distrito, cujo índice único é apenas codigo
+        Quando recupero seus índices de chave única
+        Então devo receber uma tupla contendo apenas o índice (codigo,).
+        '''
+        # Arrange
+        valor_esperado = (('codigo',),)
+        # Act
+        valor_atual = Distrito.recuperar_indices_chave_unica()
+        # Assert
+        self.assertEqual(valor_atual, valor_esperado)
+
+    def test_indice_varias_colunas(self):
+        '''
+        Dado o modelo Bairro, cujo índice único é formado por nome e \
+        distrito_id
+        Quando recupero seus índices de chave única
+        Então devo receber uma tupla contendo o índice (nome, distrito_id).
+        '''
+        # Arrange
+        valor_esperado = (('nome', 'distrito_id'),)
+        # Act
+        valor_atual = Bairro.recuperar_indices_chave_unica()
+        # Assert
+        self.assertEqual(valor_atual, valor_esperado)
+
+    def test_calculado_uma_vez(self):
+        '''
+        Dado o modelo Bairro com mapeamento configurado
+        Quando recupero seus índices de chave única duas vezes
+        Então devo receber a mesma instância, sem recalcular os índices.
+        '''
+        # Arrange
+        Bairro.query.count()
+        # Act
+        with mock.patch.object(Bairro, 'calcular_indices_chave_unica') \
+                as mock_calcular:
+            valor_atual = Bairro.recuperar_indices_chave_unica()
+        # Assert
+        mock_calcular.assert_not_called()
+        self.assertIs(valor_atual, Bairro.indices_chave_unica)
+
+    def test_verificar_violacao(self):
+        '''
+        Dado um bairro de nome 'bairro' no distrito 1
+        Quando verifico a violação de índice único de um novo bairro de \
+        nome 'bairro' no distrito 1
+        Então deve ocorrer violação nas colunas nome e distrito_id.
+        '''
+        # Arrange
+        bd.session.add(Bairro(nome='bairro', distrito_id=1))
+        bd.session.commit()
+        valor_esperado = (True, ['nome', 'distrito_id'])
+        # Act
+        valor_atual = verificar_violacao_indice_unico(bd.session, Bairro,
+                                                      nome='bairro',
+                                                      distrito_id=1)
+        # Assert
+        self.assertEqual(valor_atual, valor_esperado)
+
+
 class TestSubprefeitura(unittest.TestCase):
     ''' Mantém os testes relacionados ao modelo Subprefeitura. '''
     CODIGO = '123'
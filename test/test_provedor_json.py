@@ -0,0 +1,99 @@
+''' Módulo responsável por manter/executar os testes do provedor json. '''
+
+import unittest
+import json
+import logging
+from app import app
+from src.modelos import FeiraLivre, Endereco, Bairro, Distrito, Subprefeitura
+from src.provedor_json import ProvedorJson, listar_codificadores_disponiveis
+from src.serializacao import Serializador
+
+logger = logging.getLogger('app')
+logger.setLevel(logging.CRITICAL)
+
+
+class TestProvedorJson(unittest.TestCase):
+    ''' Mantém os testes relacionados à classe ProvedorJson. '''
+    CONTEUDO = {'mensagem': 'Feira livre não encontrada.', 'erro': 404,
+                'feiras': [{'nome': 'PRAÇA', 'latitude': -23.5,
+                            'referencia': None}]}
+
+    def setUp(self):
+        self.provedor = ProvedorJson(app)
+
+    def test_codificadores_equivalentes(self):
+        '''
+        Dado um conteúdo com mensagem em português
+        Quando codifico o conteúdo com cada codificador disponível
+        Então devo receber json compacto, com as chaves ordenadas e o \\
+        mesmo conteúdo após a decodificação.
+        '''
+        # Arrange
+        for codificador in listar_codificadores_disponiveis():
+            self.provedor.codificador = codificador
+            # Act
+            valor_atual = self.provedor.codificar(self.CONTEUDO)
+            # Assert
+            self.assertEqual(json.loads(valor_atual), self.CONTEUDO)
+            self.assertEqual(list(json.loads(valor_atual)),
+                             sorted(self.CONTEUDO))
+            self.assertNotIn(b', ', valor_atual)
+
+    def test_formato_normalizado(self):
+        '''
+        Dadas feiras livres no formato normalizado, com bairros de ids 2 e 10
+        Quando codifico o conteúdo com cada codificador disponível
+        Então devo receber os mesmos bytes da biblioteca padrão, com as \
+        tabelas ordenadas pelo id numérico.
+        '''
+        # Arrange
+        subprefeitura = Subprefeitura(id=1, codigo='1', nome='subpref')
+        distrito = Distrito(id=1, codigo='1', nome='dist',
+                            subprefeitura=subprefeitura)
+        conteudo = Serializador().normalizar([
+            FeiraLivre(id=i, registro=str(i),
+                       endereco=Endereco(id=i, bairro=Bairro(
+                           id=i, nome='bairro' + str(i), distrito=distrito)))
+            for i in (10, 2)])
+        self.provedor.codificador = 'json'
+        valor_esperado = self.provedor.codificar(conteudo)
+        for codificador in listar_codificadores_disponiveis():
+            self.provedor.codificador = codificador
+            # Act
+            valor_atual = self.provedor.codificar(conteudo)
+            # Assert
+            self.assertEqual(valor_atual, valor_esperado, codificador)
+            self.assertEqual(list(json.loads(valor_atual)['bairros']),
+                             ['2', '10'])
+
+    def test_resposta(self):
+        '''
+        Dado um conteúdo com mensagem em português
+        Quando crio a resposta json
+        Então devo receber o conteúdo em UTF-8, terminado por nova linha.
+        '''
+        # Arrange
+        # Act
+        with app.app_context():
+            resposta = self.provedor.response(self.CONTEUDO)
+        # Assert
+        self.assertEqual(resposta.mimetype, 'application/json')
+        self.assertTrue(resposta.data.endswith(b'\n'))
+        self.assertEqual(json.loads(resposta.data.decode('utf-8')),
+                         self.CONTEUDO)
+
+    def test_codificador_indisponivel(self):
+        '''
+        Dado um codificador desconhecido
+        Quando escolho o codificador
+        Então devo receber ValueError.
+        '''
+        # Arrange
+        # Act
+        # Assert
+        self.assertRaises(ValueError, ProvedorJson.escolher_codificador,
+                          'desconhecido')
+
+
+if __name__ == '__main__':
+    unittest.main()
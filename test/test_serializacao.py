@@ -0,0 +1,72 @@
+''' Módulo responsável por manter/executar os testes da serialização das \
+feiras livres. '''
+
+import unittest
+import logging
+from unittest import mock
+from src.modelos import FeiraLivre, Endereco, Bairro, Distrito, Subprefeitura
+from src.serializacao import Serializador
+
+logger = logging.getLogger('app')
+logger.setLevel(logging.CRITICAL)
+
+
+class TestSerializador(unittest.TestCase):
+    ''' Mantém os testes unitários relacionados à classe Serializador. '''
+
+    def setUp(self):
+        subprefeitura = Subprefeitura(id=1, codigo='1', nome='subpref')
+        distrito = Distrito(id=2, codigo='2', nome='dist',
+                            subprefeitura=subprefeitura)
+        self.bairro = Bairro(id=3, nome='bairro', distrito=distrito)
+        self.feiras_livres = [
+            FeiraLivre(id=i, registro=str(i),
+                       endereco=Endereco(id=i, bairro=self.bairro))
+            for i in (1, 2)]
+
+    def test_converter(self):
+        '''
+        Dadas duas feiras livres no mesmo bairro
+        Quando converto as feiras livres
+        Então devo receber o mesmo dict de FeiraLivre.dict, calculando o \
+        dict do bairro uma única vez.
+        '''
+        # Arrange
+        valor_esperado = [i.dict for i in self.feiras_livres]
+        serializador = Serializador()
+        # Act
+        with mock.patch.object(Bairro, 'criar_dict',
+                               autospec=True,
+                               side_effect=Bairro.criar_dict) as criar_dict:
+            valor_atual = [serializador.converter(i)
+                           for i in self.feiras_livres]
+        # Assert
+        self.assertEqual(valor_atual, valor_esperado)
+        self.assertEqual(criar_dict.call_count, 1)
+
+    def test_normalizar(self):
+        '''
+        Dadas duas feiras livres no mesmo bairro
+        Quando normalizo as feiras livres
+        Então as feiras livres devem referenciar o bairro pelo id, e o \
+        bairro, o distrito e a subprefeitura devem ser listados uma única vez.
+        '''
+        # Arrange
+        serializador = Serializador()
+        # Act
+        valor_atual = serializador.normalizar(self.feiras_livres)
+        # Assert
+        self.assertEqual([i['endereco']['bairro']
+                          for i in valor_atual['feiras']], [3, 3])
+        self.assertEqual(valor_atual['bairros'],
+                         {3: {'nome': 'bairro', 'distrito': 2}})
+        self.assertEqual(valor_atual['distritos'],
+                         {2: {'codigo': '2', 'nome': 'dist',
+                              'subprefeitura': 1}})
+        self.assertEqual(valor_atual['subprefeituras'],
+                         {1: {'codigo': '1', 'nome': 'subpref'}})
+        self.assertEqual(valor_atual['logradouros'], {})
+
+
+if __name__ == '__main__':
+    unittest.main()